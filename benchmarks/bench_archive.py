@@ -0,0 +1,96 @@
+"""Archiving old tasks: throughput, hot table size and retrieve latency.
+
+Seeds ``--tasks`` rows for one user, created evenly over ``--years`` years,
+and times ``GET /api/tasks/<id>/`` for a recent task and an old one. Then
+moves every task older than TASK_ARCHIVE_AFTER_DAYS to the archive with
+archive.archive_tasks, and times the same reads again, the old task now
+served from the archive. Prints the on-disk size of the task table and its
+indexes before and after (SQLite's dbstat), the figure that has to fit in
+memory for the listings to stay fast.
+"""
+
+import argparse
+import time
+from datetime import timedelta
+
+from benchmarks.common import measure, seed_tasks, summarize, test_database
+
+
+def table_size(connection, table):
+    """Bytes used by ``table`` and its indexes."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+            [table, table],
+        )
+        return cursor.fetchone()[0] or 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.db import connection
+    from django.urls import reverse
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+
+    from task_app import archive
+    from task_app.models import Task, TaskArchive
+
+    with test_database():
+        user = User.objects.create_user(username="bench")
+        spread = timedelta(days=365 * args.years) / args.tasks
+        seed_tasks(user, args.tasks, spread=spread)
+        client = APIClient()
+        client.force_authenticate(user)
+        cutoff = timezone.now() - timedelta(days=settings.TASK_ARCHIVE_AFTER_DAYS)
+        tasks = Task.objects.filter(user=user).order_by("id")
+        oldest = tasks.values_list("id", flat=True).first()
+        newest = tasks.reverse().values_list("id", flat=True).first()
+
+        def retrieve(task_id):
+            def get():
+                # Every read goes to the database, as on a cache miss.
+                cache.clear()
+                client.get(reverse("task-detail", args=[task_id]))
+
+            return summarize(measure(get, args.repeat))
+
+        def report(label):
+            hot = table_size(connection, Task._meta.db_table)
+            cold = table_size(connection, TaskArchive._meta.db_table)
+            recent, old = retrieve(newest), retrieve(oldest)
+            print(
+                f"{label:<8} {hot / 2**20:>9.1f}MB {cold / 2**20:>11.1f}MB "
+                f"{recent['p50_ms']:>10.3f}ms {old['p50_ms']:>10.3f}ms"
+            )
+
+        print(f"{args.tasks} tasks over {args.years} years")
+        print(
+            f"{'':<8} {'task table':>11} {'archive':>13} "
+            f"{'recent p50':>12} {'old p50':>12}"
+        )
+        report("before")
+        start = time.perf_counter()
+        moved = archive.archive_tasks(
+            cutoff, batch_size=args.batch_size, max_batches=args.tasks
+        )
+        elapsed = time.perf_counter() - start
+        with connection.cursor() as cursor:
+            # Reclaim the freed pages so the sizes below are the live ones.
+            cursor.execute("VACUUM")
+        report("after")
+        print(f"\nArchived {moved} tasks in {elapsed:.2f}s, {moved / elapsed:.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Requests per second of the sync (WSGI) and async (ASGI) task endpoints.
+
+Starts the app once under gunicorn (WSGI) and once under uvicorn (ASGI), one
+worker process each, against a throwaway SQLite database, and keeps
+``--clients`` concurrent keep-alive connections busy for ``--duration``
+seconds per endpoint. Requires gunicorn and uvicorn to be installed.
+
+SQLite answers in microseconds, where SQL Server costs a network round trip
+per query; ``--db-latency`` adds that wait back, which is what async views
+overlap.
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.server import load, running_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--wsgi-threads", type=int, default=8)
+    parser.add_argument(
+        "--db-latency", type=float, default=0, help="Milliseconds added per query"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the task and user caches in the servers",
+    )
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["BENCH_DATABASE"] = os.path.join(workdir, "bench.sqlite3")
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.server_settings"
+    os.environ["BENCH_DB_LATENCY_MS"] = "0"
+
+    import django
+
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from benchmarks.common import seed_tasks
+    from task_app.models import Task
+
+    call_command("migrate", verbosity=0)
+    user = User.objects.create_user(username="bench")
+    seed_tasks(user, args.tasks)
+    token = str(RefreshToken.for_user(user).access_token)
+    task_id = Task.objects.filter(user=user).values_list("id", flat=True).first()
+    endpoints = {
+        "wsgi": {
+            "list": "/api/tasks/",
+            "retrieve": f"/api/tasks/{task_id}/",
+        },
+        "asgi": {
+            "list": "/api/async/tasks/",
+            "retrieve": f"/api/async/tasks/{task_id}/",
+        },
+    }
+
+    # Seed at full speed, then let the servers see the simulated latency.
+    os.environ["BENCH_DB_LATENCY_MS"] = str(args.db_latency)
+    os.environ["BENCH_NO_CACHE"] = "1" if args.no_cache else "0"
+    print(
+        f"{args.clients} clients, {args.duration:g}s per endpoint, "
+        f"{args.db_latency:g}ms per query, cache {'off' if args.no_cache else 'on'}"
+    )
+    print(f"{'server':<6} {'endpoint':<10} {'req/s':>10}  responses")
+    for name, paths in endpoints.items():
+        with running_server(name, args.wsgi_threads) as port:
+            for endpoint, path in paths.items():
+                counts, _ = load(port, path, token, args.clients, args.duration)
+                ok = counts.get(200, 0)
+                print(f"{name:<6} {endpoint:<10} {ok / args.duration:>10.1f}  {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Queries and latency spent on authentication per task API request.
+
+Replays the same bearer-token requests against the task endpoints with
+simplejwt's stock JWTAuthentication and with CachedJWTAuthentication.
+"""
+
+import argparse
+from unittest import mock
+
+from benchmarks.common import measure, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from task_app import views
+    from task_app.authentication import CachedJWTAuthentication
+    from task_app.models import Task
+
+    with test_database():
+        user = User.objects.create_user(username="bench")
+        task = Task.objects.create(user=user, title="Task", duration=5)
+        client = APIClient()
+        token = RefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        urls = [reverse("get-tasks"), reverse("task-detail", args=[task.id])]
+        task_views = [views.GetTaskView, views.RetrieveTaskView]
+
+        def requests():
+            for url in urls:
+                client.get(url)
+
+        print(f"{'authentication':<26} {'queries/req':>12} {'p50':>9} {'p99':>9}")
+        for auth_class in (JWTAuthentication, CachedJWTAuthentication):
+            patches = [
+                mock.patch.object(view, "authentication_classes", [auth_class])
+                for view in task_views
+            ]
+            for patch in patches:
+                patch.start()
+            requests()  # warm the task read cache and, if enabled, the user cache
+            with CaptureQueriesContext(connection) as queries:
+                timings = measure(requests, args.requests // len(urls))
+            for patch in patches:
+                patch.stop()
+            stats = summarize([timing / len(urls) for timing in timings])
+            print(
+                f"{auth_class.__name__:<26} {len(queries) / args.requests:>12.2f} "
+                f"{stats['p50_ms']:>7.3f}ms {stats['p99_ms']:>7.3f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
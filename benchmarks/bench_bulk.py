@@ -0,0 +1,95 @@
+"""Throughput of the single-item task endpoints against /api/tasks/bulk/.
+
+Both paths go through the full DRF request cycle with the test client, so the
+numbers include parsing, validation and rendering, not just the SQL.
+"""
+
+import argparse
+import time
+
+from benchmarks.common import test_database
+
+
+def rate(count, func):
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from task_app.models import Task
+
+    with test_database():
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="bench"))
+        items = [{"title": f"Task {i}", "duration": i % 240} for i in range(args.tasks)]
+        bulk_url = reverse("task-bulk")
+
+        def single_create():
+            for item in items:
+                client.post(reverse("task-create"), item, format="json")
+
+        def single_update():
+            for task_id in Task.objects.values_list("id", flat=True):
+                client.patch(
+                    reverse("task-update", args=[task_id]),
+                    {"title": "x"},
+                    format="json",
+                )
+
+        def single_delete():
+            for task_id in Task.objects.values_list("id", flat=True):
+                client.delete(reverse("task-delete", args=[task_id]))
+
+        def batches(payload):
+            return [
+                payload[i : i + args.batch] for i in range(0, len(payload), args.batch)
+            ]
+
+        def bulk_create():
+            for batch in batches(items):
+                client.post(bulk_url, batch, format="json")
+
+        def bulk_update():
+            ids = list(Task.objects.values_list("id", flat=True))
+            for batch in batches([{"id": i, "title": "x"} for i in ids]):
+                client.patch(bulk_url, batch, format="json")
+
+        def bulk_delete():
+            ids = list(Task.objects.values_list("id", flat=True))
+            for batch in batches(ids):
+                client.delete(bulk_url, batch, format="json")
+
+        def reset(with_rows):
+            Task.all_objects.all().delete()
+            if with_rows:
+                client.post(bulk_url, items, format="json")
+
+        print(f"{args.tasks} tasks, bulk batches of {args.batch}")
+        print(f"{'operation':<10} {'single/s':>12} {'bulk/s':>12} {'speedup':>9}")
+        for name, single, bulk, with_rows in (
+            ("create", single_create, bulk_create, False),
+            ("update", single_update, bulk_update, True),
+            ("delete", single_delete, bulk_delete, True),
+        ):
+            reset(with_rows)
+            single_rate = rate(args.tasks, single)
+            reset(with_rows)
+            bulk_rate = rate(args.tasks, bulk)
+            print(
+                f"{name:<10} {single_rate:>12.0f} {bulk_rate:>12.0f} "
+                f"{bulk_rate / single_rate:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
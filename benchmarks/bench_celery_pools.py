@@ -0,0 +1,80 @@
+"""Tasks per second through each Celery worker pool.
+
+Runs ``--tasks`` jobs through the solo, threads and prefork pools, the
+latter two with ``--concurrency`` slots (CELERY_WORKER_CONCURRENCY by
+default), for two kinds of work: "io" waits ``--io-ms`` milliseconds, like a
+task waiting on the database, and "cpu" formats ``--lines`` task lines the
+way print_task_details logs them. The jobs are handed to the pool directly,
+as the worker does once a message is received, so the broker's own overhead
+is left out and the numbers only compare the pools.
+"""
+
+import argparse
+import threading
+import time
+
+import benchmarks.common  # noqa: F401 Sets Django up.
+
+POOLS = ["solo", "threads", "prefork"]
+
+
+def wait(io_ms):
+    time.sleep(io_ms / 1000)
+
+
+def format_lines(lines):
+    return "\n".join(
+        f"Title: Task {i}, Duration: {i % 240}, "
+        f"Created At: 2024-01-01 00:00:00, Updated At: 2024-01-01 00:00:00"
+        for i in range(lines)
+    )
+
+
+def throughput(pool_name, concurrency, func, arg, count):
+    from celery.concurrency import get_implementation
+
+    from selteq_task.celery import app
+
+    pool = get_implementation(pool_name)(
+        limit=concurrency, app=app, initargs=(app, "bench")
+    )
+    pool.start()
+    try:
+        done = threading.Semaphore(0)
+        start = time.perf_counter()
+        for _ in range(count):
+            pool.apply_async(func, args=(arg,), callback=lambda result: done.release())
+        for _ in range(count):
+            done.acquire()
+        return count / (time.perf_counter() - start)
+    finally:
+        pool.stop()
+
+
+def main():
+    from django.conf import settings
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.CELERY_WORKER_CONCURRENCY
+    )
+    parser.add_argument("--io-ms", type=float, default=10)
+    parser.add_argument("--lines", type=int, default=10_000)
+    args = parser.parse_args()
+
+    workloads = [("io", wait, args.io_ms), ("cpu", format_lines, args.lines)]
+    print(f"{args.tasks} tasks, concurrency {args.concurrency}")
+    print(
+        f"{'pool':<8} " + " ".join(f"{name + ' tasks/s':>12}" for name, *_ in workloads)
+    )
+    for pool_name in POOLS:
+        rates = [
+            throughput(pool_name, args.concurrency, func, arg, args.tasks)
+            for _, func, arg in workloads
+        ]
+        print(f"{pool_name:<8} " + " ".join(f"{rate:>12.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
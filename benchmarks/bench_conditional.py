@@ -0,0 +1,76 @@
+"""Task read latency for full responses and for 304 Not Modified.
+
+Measures GetTaskView and RetrieveTaskView through the test client for a user
+with ``--tasks`` rows: a plain GET with the task cache disabled and enabled,
+then a conditional GET whose If-None-Match still holds, which is answered
+from the user's change version alone.
+"""
+
+import argparse
+
+from benchmarks.common import measure, seed_tasks, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from task_app.models import Task
+
+    with test_database():
+        user = User.objects.create_user(username="bench")
+        seed_tasks(user, args.tasks)
+        client = APIClient()
+        client.force_authenticate(user)
+        task_id = Task.objects.filter(user=user).values_list("id", flat=True)[0]
+        urls = {
+            "list": reverse("get-tasks") + "?min_duration=10",
+            "retrieve": reverse("task-detail", args=[task_id]),
+        }
+        caches = {
+            "disabled": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+            "enabled": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        }
+
+        print(f"{args.tasks} tasks, {args.repeat} requests per endpoint")
+        print(
+            f"{'endpoint':<10} {'cache':<9} {'request':<8} "
+            f"{'p50':>9} {'p99':>9} {'queries':>8}"
+        )
+        for name, url in urls.items():
+            for label, config in caches.items():
+                with override_settings(CACHES={"default": config}):
+                    etag = client.get(url)["ETag"]
+                    for request, headers in (
+                        ("200", {}),
+                        ("304", {"If-None-Match": etag}),
+                    ):
+                        response = client.get(url, headers=headers)
+                        assert response.status_code == int(request)
+                        with CaptureQueriesContext(connection) as queries:
+                            client.get(url, headers=headers)
+                        # Counted now: the next request resets the query log.
+                        count = len(queries)
+                        stats = summarize(
+                            measure(
+                                lambda: client.get(url, headers=headers), args.repeat
+                            )
+                        )
+                        print(
+                            f"{name:<10} {label:<9} {request:<8} "
+                            f"{stats['p50_ms']:>7.3f}ms {stats['p99_ms']:>7.3f}ms "
+                            f"{count:>8}"
+                        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Task and user deletion latency as the task table grows.
+
+For each size in ``--sizes``, seeds that many tasks for a user and times
+``DELETE /api/tasks/<id>/delete/`` through the test client (a soft delete),
+then deleting the user (whose tasks are left to the purge job), and finally
+purge_deleted_tasks clearing everything that was deleted.
+"""
+
+import argparse
+import io
+import time
+
+from benchmarks.common import measure, seed_tasks, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from task_app.models import Task
+    from task_app.tasks import purge_deleted_tasks
+
+    with test_database():
+        print(
+            f"{'tasks':>10} {'delete p50':>11} {'delete p99':>11} "
+            f"{'user delete':>12} {'purge':>10} {'purged/s':>10}"
+        )
+        for size in args.sizes:
+            user = User.objects.create_user(username=f"bench{size}")
+            seed_tasks(user, size)
+            for command in ("rebuild_task_summaries", "rebuild_task_search_index"):
+                call_command(command, "--user", str(user.id), stdout=io.StringIO())
+            client = APIClient()
+            client.force_authenticate(user)
+            task_ids = iter(
+                Task.objects.filter(user=user)
+                .order_by("-id")
+                .values_list("id", flat=True)[: args.repeat]
+            )
+
+            def delete_one():
+                client.delete(reverse("task-delete", args=[next(task_ids)]))
+
+            stats = summarize(measure(delete_one, args.repeat))
+
+            start = time.perf_counter()
+            user.delete()
+            user_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            purge_deleted_tasks(batch_size=args.batch_size, max_batches=size)
+            purge_s = time.perf_counter() - start
+            print(
+                f"{size:>10} {stats['p50_ms']:>9.3f}ms {stats['p99_ms']:>9.3f}ms "
+                f"{user_ms:>10.3f}ms {purge_s:>9.2f}s {size / purge_s:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
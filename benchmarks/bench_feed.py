@@ -0,0 +1,129 @@
+"""Database load of clients watching their tasks: polling vs the change feed.
+
+Runs ``--rounds`` rounds for ``--clients`` clients, one per user, each with
+``--tasks`` tasks. In each round ``--writes`` of the users change a task, then
+every client checks for changes once:
+
+- ``poll`` re-fetches GET /tasks/, as clients looping over the list do,
+- ``etag`` does the same with If-None-Match, answered 304 while unchanged,
+- ``feed`` asks GET /tasks/changes/ for the changes after its cursor with
+  timeout=0, the check a waiting long-poll or event stream makes every
+  TASK_FEED_POLL_INTERVAL seconds.
+
+Reports the queries and response bytes of all the checks, with the task cache
+disabled and enabled. Writes are not counted.
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import seed_tasks, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=100, help="Tasks per user")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--writes", type=int, default=5, help="Writes per round")
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from task_app.models import Task
+
+    def check_poll(client, state):
+        return client.get(reverse("get-tasks"))
+
+    def check_etag(client, state):
+        headers = {"If-None-Match": state["etag"]} if "etag" in state else {}
+        response = client.get(reverse("get-tasks"), headers=headers)
+        state["etag"] = response["ETag"]
+        return response
+
+    def check_feed(client, state):
+        response = client.get(
+            reverse("task-changes"), {"since": state["cursor"], "timeout": 0}
+        )
+        state["cursor"] = response.data["cursor"]
+        return response
+
+    modes = {"poll": check_poll, "etag": check_etag, "feed": check_feed}
+    caches = {
+        "disabled": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        "enabled": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+
+    with test_database():
+        users = [
+            User.objects.create_user(username=f"bench{i}")
+            for i in range(args.clients)
+        ]
+        for user in users:
+            seed_tasks(user, args.tasks)
+        clients = []
+        for user in users:
+            client = APIClient()
+            client.force_authenticate(user)
+            clients.append(client)
+        task_ids = {
+            user.id: list(Task.objects.filter(user=user).values_list("id", flat=True))
+            for user in users
+        }
+        checks = args.clients * args.rounds
+
+        print(
+            f"{args.clients} clients, {args.tasks} tasks each, {args.rounds} rounds "
+            f"of {args.writes} writes"
+        )
+        print(
+            f"{'mode':<6} {'cache':<9} {'queries':>8} {'per check':>10} "
+            f"{'KiB/check':>10} {'p50':>9}"
+        )
+        for label, config in caches.items():
+            with override_settings(CACHES={"default": config}):
+                for mode, check in modes.items():
+                    # The same writes for every mode.
+                    rng = random.Random(0)
+                    states = [{} for _ in clients]
+                    if mode == "feed":
+                        for client, state in zip(clients, states):
+                            state["cursor"] = client.get(
+                                reverse("task-changes")
+                            ).data["cursor"]
+                    queries = size = 0
+                    timings = []
+                    for _ in range(args.rounds):
+                        for i in rng.sample(range(len(users)), args.writes):
+                            clients[i].patch(
+                                reverse(
+                                    "task-update",
+                                    args=[rng.choice(task_ids[users[i].id])],
+                                ),
+                                {"duration": rng.randrange(240)},
+                                format="json",
+                            )
+                        for client, state in zip(clients, states):
+                            with CaptureQueriesContext(connection) as captured:
+                                start = time.perf_counter()
+                                response = check(client, state)
+                                timings.append((time.perf_counter() - start) * 1000)
+                            # Counted now: the next request resets the query log.
+                            queries += len(captured)
+                            size += len(response.content)
+                    stats = summarize(timings)
+                    print(
+                        f"{mode:<6} {label:<9} {queries:>8} "
+                        f"{queries / checks:>10.2f} {size / checks / 1024:>10.2f} "
+                        f"{stats['p50_ms']:>7.3f}ms"
+                    )
+
+
+if __name__ == "__main__":
+    main()
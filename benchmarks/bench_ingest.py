@@ -0,0 +1,95 @@
+"""Task creation under a burst: direct writes vs the buffered ingest queue.
+
+Sends ``--requests`` POST /tasks/create/ requests, spread over ``--users``
+users, as fast as a single client can:
+
+- ``direct`` writes each task in its own transaction before answering,
+- ``buffered`` queues it on an in-memory broker and answers 202, then
+  flush_task_buffer writes the queue in batches of ``--batch-size``.
+
+Reports the latency of the requests, the queries they ran, and the tasks
+written per second from the first request until the last task is in the
+database, flushes included.
+"""
+
+import argparse
+import time
+
+from benchmarks.common import summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    from unittest import mock
+
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from task_app.models import Task
+    from task_app.tasks import flush_task_buffer
+
+    with test_database():
+        clients = []
+        for i in range(args.users):
+            client = APIClient()
+            client.force_authenticate(User.objects.create_user(username=f"bench{i}"))
+            clients.append(client)
+
+        print(
+            f"{args.requests} creates over {args.users} users, "
+            f"batches of {args.batch_size}"
+        )
+        print(
+            f"{'mode':<9} {'p50':>9} {'p99':>9} {'queries':>8} "
+            f"{'flush':>9} {'tasks/s':>9}"
+        )
+        for mode in ["direct", "buffered"]:
+            Task.objects.all().delete()
+            cache.clear()
+            with override_settings(
+                TASK_INGEST_BUFFERED=mode == "buffered",
+                TASK_INGEST_BROKER_URL="memory://",
+                TASK_INGEST_BATCH_SIZE=args.batch_size,
+            ), mock.patch.object(flush_task_buffer, "apply_async"):
+                timings = []
+                queries = 0
+                start = time.perf_counter()
+                for i in range(args.requests):
+                    client = clients[i % len(clients)]
+                    with CaptureQueriesContext(connection) as captured:
+                        request_start = time.perf_counter()
+                        client.post(
+                            reverse("task-create"),
+                            {"title": f"Task {i}", "duration": i % 240},
+                            format="json",
+                        )
+                        timings.append((time.perf_counter() - request_start) * 1000)
+                    queries += len(captured)
+                    # Kept across requests while captured, past the log's cap.
+                    connection.queries_log.clear()
+                flush_start = time.perf_counter()
+                if mode == "buffered":
+                    # What the scheduled runs would do, back to back.
+                    flush_task_buffer(max_batches=args.requests)
+                end = time.perf_counter()
+            assert Task.objects.count() == args.requests
+            stats = summarize(timings)
+            print(
+                f"{mode:<9} {stats['p50_ms']:>7.3f}ms {stats['p99_ms']:>7.3f}ms "
+                f"{queries:>8} {end - flush_start:>8.2f}s "
+                f"{args.requests / (end - start):>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
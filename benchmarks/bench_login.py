@@ -0,0 +1,78 @@
+"""Logins per second through the old and the current token endpoint.
+
+The previous CustomJwtAuthToken (an existence query in front of
+TokenObtainPairSerializer) is reproduced here as the "before" path. Valid
+logins are bound by the PBKDF2 password hash either way; repeated bad
+credentials and token refreshes are where the new pipeline saves work.
+"""
+
+import argparse
+import time
+
+from benchmarks.common import test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.response import Response
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+    from rest_framework_simplejwt.views import TokenObtainPairView
+
+    from task_app.views import CustomJwtAuthToken, CustomJwtRefreshToken
+
+    class LegacyJwtAuthToken(TokenObtainPairView):
+        serializer_class = TokenObtainPairSerializer
+
+        def post(self, request, *args, **kwargs):
+            username = request.data.get("username")
+            if not User.objects.filter(username=username).exists():
+                return Response({"detail": "Invalid username"}, status=401)
+
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            return Response({"Token": serializer.validated_data["access"]})
+
+    factory = APIRequestFactory()
+
+    def run(view, data, count):
+        cache.clear()
+        view(factory.post("/", data, format="json"))  # warm up, not counted
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(count):
+                response = view(factory.post("/", data, format="json"))
+            elapsed = time.perf_counter() - start
+        return count / elapsed, len(queries) / count, response
+
+    with test_database():
+        User.objects.create_user(username="bench", password="benchpassword")
+        valid = {"username": "bench", "password": "benchpassword"}
+        invalid = {"username": "bench", "password": "wrongpassword"}
+        legacy, current = LegacyJwtAuthToken.as_view(), CustomJwtAuthToken.as_view()
+
+        print(f"{'scenario':<24} {'path':<8} {'req/s':>10} {'queries/req':>12}")
+        for scenario, data in (
+            ("valid login", valid),
+            ("repeated bad password", invalid),
+        ):
+            for label, view in (("before", legacy), ("after", current)):
+                rate, queries, _ = run(view, data, args.requests)
+                print(f"{scenario:<24} {label:<8} {rate:>10.1f} {queries:>12.1f}")
+
+        refresh = current(factory.post("/", valid, format="json")).data["Refresh"]
+        rate, queries, _ = run(
+            CustomJwtRefreshToken.as_view(), {"refresh": refresh}, args.requests * 50
+        )
+        print(f"{'token refresh':<24} {'after':<8} {rate:>10.1f} {queries:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
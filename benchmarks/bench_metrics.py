@@ -0,0 +1,78 @@
+"""Overhead of the request metrics middleware.
+
+Replays task list and detail requests through the test client with metrics
+disabled (middleware skipped), enabled for every request and enabled for a
+10% sample. The configurations take turns request by request, shuffled, so
+that drift on the machine affects them alike, and their median latencies
+are compared against the disabled run. A second disabled client shows the
+noise floor.
+"""
+
+import argparse
+import random
+import statistics
+
+from benchmarks.common import measure, seed_tasks, test_database
+
+CONFIGS = {
+    "disabled": {"METRICS_ENABLED": False},
+    "disabled again": {"METRICS_ENABLED": False},
+    "sampled 10%": {"METRICS_ENABLED": True, "METRICS_SAMPLE_RATE": 0.1},
+    "enabled": {"METRICS_ENABLED": True, "METRICS_SAMPLE_RATE": 1.0},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3000)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from task_app.models import Task
+
+    with test_database():
+        user = User.objects.create_user(username="bench")
+        seed_tasks(user, args.tasks)
+        task_id = Task.objects.filter(user=user).values_list("id", flat=True)[0]
+        requests = {
+            "list": reverse("get-tasks"),
+            "detail": reverse("task-detail", args=[task_id]),
+        }
+        clients = {}
+        for label, config in CONFIGS.items():
+            with override_settings(**config):
+                client = clients[label] = APIClient()
+                client.force_authenticate(user)
+                # The middleware chain is built, with these settings, on the
+                # client's first request.
+                client.get(requests["list"])
+
+        print(f"{args.repeat} requests per configuration, cache cleared")
+        print(f"{'endpoint':<8} {'metrics':<12} {'p50':>9} {'overhead':>9}")
+        for name, url in requests.items():
+            timings = {label: [] for label in CONFIGS}
+            # Take turns request by request, in a random order, so neither
+            # drift nor position in the rotation favours a configuration.
+            order = list(clients.items())
+            for _ in range(args.repeat):
+                random.shuffle(order)
+                for label, client in order:
+                    cache.clear()
+                    timings[label] += measure(lambda: client.get(url), 1)
+            base = statistics.median(timings["disabled"])
+            for label, values in timings.items():
+                median = statistics.median(values)
+                print(
+                    f"{name:<8} {label:<12} {median:>7.3f}ms "
+                    f"{(median / base - 1) * 100:>+8.2f}%"
+                )
+
+
+if __name__ == "__main__":
+    main()
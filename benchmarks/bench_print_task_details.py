@@ -0,0 +1,69 @@
+"""Full-table vs incremental print_task_details runs.
+
+Seeds ``--tasks`` rows for one user and times the original implementation,
+which formatted every task on each run, against the incremental task on its
+first run and on a run after ``--changed`` tasks were updated.
+"""
+
+import argparse
+import logging
+import time
+
+from benchmarks.common import seed_tasks, test_database
+
+
+def legacy_report(user_id):
+    from django.utils import timezone
+
+    from task_app.models import Task
+
+    details = [
+        f"Title: {task.title}, Duration: {task.duration}, "
+        f"Created At: {timezone.localtime(task.created_at).strftime('%Y-%m-%d %H:%M:%S')}, "
+        f"Updated At: {timezone.localtime(task.updated_at).strftime('%Y-%m-%d %H:%M:%S')}"
+        for task in Task.objects.filter(user_id=user_id)
+    ]
+    return "\n".join(details)
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--changed", type=int, default=100)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.db.models import F
+    from django.utils import timezone
+
+    from task_app.models import Task
+    from task_app.tasks import print_task_details
+
+    logging.getLogger("task_app.tasks").disabled = True
+    with test_database():
+        user = User.objects.create_user(username="bench")
+        seed_tasks(user, args.tasks)
+
+        def incremental():
+            print_task_details(user_id=user.id, chunk_size=args.chunk_size)
+
+        print(f"{args.tasks} tasks, {args.changed} changed between runs")
+        print(f"{'full scan':<22} {timed(lambda: legacy_report(user.id)):>10.1f}ms")
+        print(f"{'incremental, first':<22} {timed(incremental):>10.1f}ms")
+        ids = Task.objects.filter(user=user).values_list("id", flat=True)
+        Task.objects.filter(id__in=list(ids[: args.changed])).update(
+            duration=F("duration") + 1, updated_at=timezone.now()
+        )
+        print(f"{'incremental, changes':<22} {timed(incremental):>10.1f}ms")
+        print(f"{'incremental, idle':<22} {timed(incremental):>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Indexed title search vs title__icontains over a large task table.
+
+Seeds ``--tasks`` rows for one user (plus a tenth as many for a second one),
+builds the title index with the rebuild_task_search_index command, then times
+a page of results for a few queries both through ``search.matching_task_ids``,
+as /tasks/search/ and the admin run it, and with the ``title__icontains``
+scan it replaced. Prints both query plans. A word nearly every title contains
+is the index's worst case: every matching id is read before the newest page
+can be picked, while the scan stops after the first few rows.
+"""
+
+import argparse
+import io
+
+from benchmarks.common import measure, seed_tasks, summarize, test_database
+
+# seed_tasks() titles tasks "Task <n>": a word every task shares, one that
+# matches about a thousandth of them and one that matches a single task.
+QUERIES = ["task", "1234", "task 987654"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    from task_app import search
+    from task_app.models import Task
+
+    with test_database():
+        user = User.objects.create_user(username="bench")
+        seed_tasks(user, args.tasks)
+        seed_tasks(User.objects.create_user(username="noise"), args.tasks // 10)
+        call_command("rebuild_task_search_index", stdout=io.StringIO())
+
+        def indexed(query, user_id):
+            tasks = Task.objects.filter(id__in=search.matching_task_ids(query, user_id))
+            if user_id is not None:
+                tasks = tasks.filter(user_id=user_id)
+            return tasks.order_by("-id")
+
+        def scanned(query, user_id):
+            tasks = Task.objects.all()
+            if user_id is not None:
+                tasks = tasks.filter(user_id=user_id)
+            for term in query.split():
+                tasks = tasks.filter(title__icontains=term)
+            return tasks.order_by("-id")
+
+        print(f"{args.tasks} tasks, page size {args.page_size}")
+        print(
+            f"{'query':<14} {'scope':<6} {'index p50':>11} {'index p99':>11} "
+            f"{'icontains p50':>14} {'icontains p99':>14}"
+        )
+        for query in QUERIES:
+            for scope, user_id in (("user", user.id), ("all", None)):
+                index_stats = summarize(
+                    measure(
+                        lambda: list(indexed(query, user_id)[: args.page_size]),
+                        args.repeat,
+                    )
+                )
+                scan_stats = summarize(
+                    measure(
+                        lambda: list(scanned(query, user_id)[: args.page_size]),
+                        args.repeat,
+                    )
+                )
+                print(
+                    f"{query:<14} {scope:<6} {index_stats['p50_ms']:>9.3f}ms "
+                    f"{index_stats['p99_ms']:>9.3f}ms "
+                    f"{scan_stats['p50_ms']:>12.3f}ms "
+                    f"{scan_stats['p99_ms']:>12.3f}ms"
+                )
+
+        print("\nIndexed plan:")
+        print(indexed(QUERIES[-1], user.id)[: args.page_size].explain())
+        print("\nicontains plan:")
+        print(scanned(QUERIES[-1], user.id)[: args.page_size].explain())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""TaskSerializer + JSONRenderer vs the values() read path + FastJSONRenderer.
+
+Seeds ``--tasks`` rows and times each stage of turning them into a response
+body: fetching (model instances vs ``values()`` dicts), building the payload
+(``TaskSerializer(many=True).data`` vs ``task_payloads()``) and rendering
+(DRF's stdlib-backed JSONRenderer vs the orjson-backed FastJSONRenderer).
+Both paths must produce the same bytes, which is checked before timing.
+"""
+
+import argparse
+
+from benchmarks.common import measure, seed_tasks, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from rest_framework.renderers import JSONRenderer
+
+    from task_app import renderers
+    from task_app.models import Task
+    from task_app.serializers import TASK_FIELDS, TaskSerializer, task_payloads
+
+    if renderers.orjson is None:
+        print("orjson is not installed, FastJSONRenderer falls back to JSONRenderer")
+
+    with test_database():
+        user = User.objects.create_user(username="bench")
+        seed_tasks(user, args.tasks)
+        tasks = Task.objects.filter(user=user).order_by("-id")
+
+        instances = list(tasks)
+        rows = list(tasks.values(*TASK_FIELDS))
+        serializer_data = TaskSerializer(instances, many=True).data
+        payloads = task_payloads(rows)
+        slow_body = JSONRenderer().render(serializer_data)
+        fast_body = renderers.FastJSONRenderer().render(payloads)
+        assert fast_body == slow_body, "read paths rendered different bytes"
+
+        stages = [
+            (
+                "fetch",
+                lambda: list(tasks.all()),
+                lambda: list(tasks.values(*TASK_FIELDS)),
+            ),
+            (
+                "serialize",
+                lambda: TaskSerializer(instances, many=True).data,
+                lambda: task_payloads(rows),
+            ),
+            (
+                "render",
+                lambda: JSONRenderer().render(serializer_data),
+                lambda: renderers.FastJSONRenderer().render(payloads),
+            ),
+            (
+                "total",
+                lambda: JSONRenderer().render(
+                    TaskSerializer(list(tasks.all()), many=True).data
+                ),
+                lambda: renderers.FastJSONRenderer().render(
+                    task_payloads(list(tasks.values(*TASK_FIELDS)))
+                ),
+            ),
+        ]
+        print(f"{args.tasks} tasks, {len(fast_body)} bytes of JSON")
+        print(
+            f"{'stage':>10} {'serializer p50':>15} {'fast path p50':>15} {'speedup':>8}"
+        )
+        for name, slow, fast in stages:
+            slow_stats = summarize(measure(slow, args.repeat))
+            fast_stats = summarize(measure(fast, args.repeat))
+            print(
+                f"{name:>10} {slow_stats['p50_ms']:>13.1f}ms "
+                f"{fast_stats['p50_ms']:>13.1f}ms "
+                f"{slow_stats['p50_ms'] / fast_stats['p50_ms']:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Task read latency with the per-user cache disabled and enabled.
+
+Measures GetTaskView and RetrieveTaskView through the test client for a user
+with ``--tasks`` rows. Pass ``--cache-url redis://...`` to measure the Redis
+backend instead of the local-memory LRU.
+"""
+
+import argparse
+
+from benchmarks.common import measure, seed_tasks, summarize, test_database
+
+
+def backend(cache_url):
+    if cache_url:
+        return {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": cache_url,
+        }
+    return {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--cache-url")
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from task_app import cache
+    from task_app.models import Task
+
+    with test_database():
+        user = User.objects.create_user(username="bench")
+        seed_tasks(user, args.tasks)
+        client = APIClient()
+        client.force_authenticate(user)
+        task_id = Task.objects.filter(user=user).values_list("id", flat=True)[0]
+        urls = {
+            "list": reverse("get-tasks") + "?min_duration=10",
+            "retrieve": reverse("task-detail", args=[task_id]),
+        }
+
+        print(f"{args.tasks} tasks, {args.repeat} requests per endpoint")
+        print(f"{'endpoint':<10} {'cache':<9} {'p50':>9} {'p99':>9}")
+        for name, url in urls.items():
+            for label, config in (
+                (
+                    "disabled",
+                    {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+                ),
+                ("enabled", backend(args.cache_url)),
+            ):
+                with override_settings(CACHES={"default": config}):
+                    cache.reset_stats()
+                    stats = summarize(measure(lambda: client.get(url), args.repeat))
+                    print(
+                        f"{name:<10} {label:<9} {stats['p50_ms']:>7.3f}ms "
+                        f"{stats['p99_ms']:>7.3f}ms  {cache.stats()}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
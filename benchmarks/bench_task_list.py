@@ -0,0 +1,75 @@
+"""Keyset vs OFFSET pagination over a large per-user task table.
+
+Seeds ``--tasks`` rows for one user, then times fetching a page at increasing
+depths with the cursor used by ``GetTaskView`` (``id < last_seen``) and with
+the OFFSET slicing it replaced, and prints both query plans.
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.common import measure, seed_tasks, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+
+    from task_app.models import Task
+
+    with test_database():
+        user = User.objects.create_user(username="bench")
+        seed_tasks(user, args.tasks)
+        # A second user so the (user, ...) indexes have something to skip.
+        seed_tasks(User.objects.create_user(username="noise"), args.tasks // 10)
+
+        tasks = Task.objects.filter(user=user).order_by("-id")
+        newest_id = tasks.values_list("id", flat=True).first()
+
+        print(f"{args.tasks} tasks, page size {args.page_size}")
+        print(
+            f"{'depth':>10} {'keyset p50':>12} {'keyset p99':>12} "
+            f"{'offset p50':>12} {'offset p99':>12}"
+        )
+        depth = args.page_size
+        while depth < args.tasks:
+            cursor = newest_id - depth
+
+            def keyset():
+                list(tasks.filter(id__lt=cursor)[: args.page_size])
+
+            def offset():
+                list(tasks[depth : depth + args.page_size])
+
+            keyset_stats = summarize(measure(keyset, args.repeat))
+            offset_stats = summarize(measure(offset, args.repeat))
+            print(
+                f"{depth:>10} {keyset_stats['p50_ms']:>10.3f}ms "
+                f"{keyset_stats['p99_ms']:>10.3f}ms "
+                f"{offset_stats['p50_ms']:>10.3f}ms "
+                f"{offset_stats['p99_ms']:>10.3f}ms"
+            )
+            depth *= 10
+
+        middle = newest_id - args.tasks // 2
+        print("\nKeyset plan:")
+        print(tasks.filter(id__lt=middle)[: args.page_size].explain())
+        print("\nOffset plan:")
+        offset = args.tasks // 2
+        print(tasks[offset : offset + args.page_size].explain())
+        print("\nCreated-at range plan:")
+        since = timezone.now() - timedelta(days=1)
+        recent = Task.objects.filter(user=user, created_at__gte=since).order_by(
+            "created_at"
+        )
+        print(recent[: args.page_size].explain())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway test database created from the configured
+settings module, so point ``DJANGO_SETTINGS_MODULE`` at whichever database
+should be measured. Run them from the repository root, e.g.::
+
+    python -m benchmarks.bench_task_list --tasks 1000000
+"""
+
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "selteq_task.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone  # noqa: E402
+
+
+@contextmanager
+def test_database():
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let seeded rows keep the created_at/updated_at values they were given."""
+    from task_app.models import Task
+
+    created_at = Task._meta.get_field("created_at")
+    updated_at = Task._meta.get_field("updated_at")
+    created_at.auto_now_add = updated_at.auto_now = False
+    try:
+        yield
+    finally:
+        created_at.auto_now_add = updated_at.auto_now = True
+
+
+def seed_tasks(user, count, batch_size=5000, spread=timedelta(minutes=1)):
+    """Bulk insert ``count`` tasks for ``user``, one ``spread`` apart in age."""
+    from task_app.models import Task
+
+    now = timezone.now()
+    with explicit_timestamps():
+        for start in range(0, count, batch_size):
+            tasks = []
+            for i in range(start, min(start + batch_size, count)):
+                stamp = now - spread * (count - i)
+                tasks.append(
+                    Task(
+                        user=user,
+                        title=f"Task {i}",
+                        duration=i % 240,
+                        created_at=stamp,
+                        updated_at=stamp,
+                    )
+                )
+            Task.objects.bulk_create(tasks, batch_size=batch_size)
+
+
+def measure(func, repeat):
+    """Call ``func`` ``repeat`` times and return the wall times in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(timings):
+    return {
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+    }
@@ -0,0 +1,121 @@
+"""Run the app under a real server and load it with concurrent HTTP clients.
+
+The servers use ``benchmarks.server_settings`` (set ``BENCH_DATABASE`` first)
+and need gunicorn and uvicorn to be installed. The load generator is a
+minimal HTTP/1.1 keep-alive client on asyncio, so nothing else is required.
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+SERVERS = {
+    "wsgi": lambda port, threads: [
+        sys.executable, "-m", "gunicorn", "selteq_task.wsgi:application",
+        "--bind", f"127.0.0.1:{port}", "--workers", "1",
+        "--worker-class", "gthread", "--threads", str(threads),
+        "--backlog", "2048", "--log-level", "warning",
+        # Over gunicorn.conf.py: no worker restarts halfway through a run.
+        "--max-requests", "0",
+    ],
+    "asgi": lambda port, threads: [
+        sys.executable, "-m", "uvicorn", "selteq_task.asgi:application",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+        "--backlog", "2048", "--log-level", "warning", "--no-access-log",
+    ],
+}  # fmt: skip
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+@contextmanager
+def running_server(name, threads=8):
+    """Start the ``wsgi`` or ``asgi`` server and yield the port it listens on."""
+    port = free_port()
+    # As in docker-compose.yml: ASGI runs without persistent connections.
+    env = dict(os.environ, DB_CONN_MAX_AGE="60" if name == "wsgi" else "0")
+    server = subprocess.Popen(SERVERS[name](port, threads), env=env)
+    try:
+        wait_for(port)
+        yield port
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    headers = head.lower()
+    if b"transfer-encoding: chunked" in headers:
+        # Streaming responses (the export) arrive chunked.
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        for line in headers.split(b"\r\n"):
+            if line.startswith(b"content-length:"):
+                await reader.readexactly(int(line.split(b":", 1)[1]))
+    return int(head.split(b" ", 2)[1]), b"connection: close" in headers
+
+
+async def client(port, request, deadline, counts, timings):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            start = time.perf_counter()
+            writer.write(request)
+            status, close = await read_response(reader)
+            timings.append((time.perf_counter() - start) * 1000)
+            counts[status] = counts.get(status, 0) + 1
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError):
+            counts["errors"] = counts.get("errors", 0) + 1
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+def load(port, path, token, clients, duration):
+    """GET ``path`` from ``clients`` connections for ``duration`` seconds.
+
+    Returns the response counts by status and the latencies in milliseconds.
+    """
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+        f"Authorization: Bearer {token}\r\n\r\n"
+    ).encode()
+    counts, timings = {}, []
+
+    async def run():
+        deadline = time.monotonic() + duration
+        await asyncio.gather(
+            *(client(port, request, deadline, counts, timings) for _ in range(clients))
+        )
+
+    asyncio.run(run())
+    return counts, timings
@@ -0,0 +1,45 @@
+"""Settings for benchmarks that run the app under a real server process.
+
+Uses a file-backed SQLite database at ``BENCH_DATABASE`` as a stand-in for
+SQL Server, so the benchmark and the server processes share the same data.
+``BENCH_DB_LATENCY_MS`` adds a fixed delay to every query to approximate the
+network round trip to a database server, and ``BENCH_NO_CACHE=1`` turns the
+task cache off so that every read reaches the database.
+"""
+
+import os
+import time
+
+from django.db.backends.signals import connection_created
+
+from selteq_task.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ["*"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["BENCH_DATABASE"],
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"timeout": 30},
+    }
+}
+
+if os.environ.get("BENCH_NO_CACHE") == "1":
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def add_latency(connection, **kwargs):
+    delay = float(os.environ.get("BENCH_DB_LATENCY_MS", 0)) / 1000
+
+    def delayed(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+
+    if delay:
+        connection.execute_wrappers.append(delayed)
+
+
+connection_created.connect(add_latency)
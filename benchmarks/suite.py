@@ -0,0 +1,441 @@
+"""Latency, throughput, queries and allocations for every task API URL.
+
+Seeds ``--users`` users with ``--tasks`` tasks each, then sends ``--repeat``
+requests to each URL in task_app/urls.py through the Django test client,
+authenticated with a JWT like a real client. Each scenario runs as a user of
+its own, seeded with ``--tasks`` tasks as well. Every URL must have a scenario
+below, so new endpoints cannot silently go unmeasured.
+
+For each scenario it reports p50/p95/p99 latency, requests per second for a
+single client, queries per request and the peak memory allocated while
+handling a request. ``--output`` saves the results as JSON. The results are
+compared against ``--baseline`` (benchmarks/baseline.json by default), and
+the script exits with status 1 if a URL got slower than ``--tolerance``
+allows, runs more queries, or allocates over 25% more. Use
+``--save-baseline`` to record a new baseline after an intended change.
+
+``--server wsgi|asgi`` also puts the GET endpoints under ``--clients``
+concurrent connections through gunicorn or uvicorn (see benchmarks.server)
+and reports their throughput and latency.
+
+    python -m benchmarks.suite --output results.json
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import weakref
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlencode
+
+BASELINE = Path(__file__).with_name("baseline.json")
+PASSWORD = "bench-password"
+
+# ``prepare`` runs untimed before each request and returns the URL kwargs and
+# the request body, or the query string parameters for GET. ``max_repeat`` caps slow scenarios (password hashing).
+Scenario = namedtuple(
+    "Scenario", "url_name method prepare max_repeat", defaults=(None,)
+)
+
+
+def no_args(ctx):
+    return {}, None
+
+
+def first_task(ctx):
+    return {"task_id": ctx.task_ids[0]}, None
+
+
+def new_task(ctx):
+    return {"task_id": ctx.create_tasks(1)[0]}, None
+
+
+def feed_cursor(ctx):
+    from task_app import feed
+
+    # The check of a client waiting for changes, without the wait.
+    return {}, {"since": feed.format_cursor(feed.start(ctx.user.id)), "timeout": 0}
+
+
+def ingest_key(ctx):
+    from task_app.models import TaskIngestKey
+
+    # The status of a buffered create, once written.
+    TaskIngestKey.objects.get_or_create(
+        user=ctx.user, key="bench", defaults={"task_id": ctx.task_ids[0]}
+    )
+    return {"key": "bench"}, None
+
+
+SCENARIOS = [
+    Scenario(
+        "token_create",
+        "post",
+        lambda ctx: ({}, {"username": ctx.user.username, "password": PASSWORD}),
+        max_repeat=20,
+    ),
+    Scenario("token_refresh", "post", lambda ctx: ({}, {"refresh": ctx.refresh})),
+    Scenario(
+        "task-create", "post", lambda ctx: ({}, {"title": "Task", "duration": 30})
+    ),
+    Scenario("get-tasks", "get", no_args),
+    Scenario(
+        "task-bulk",
+        "post",
+        lambda ctx: ({}, [{"title": f"Task {i}", "duration": i} for i in range(100)]),
+    ),
+    Scenario(
+        "task-bulk",
+        "patch",
+        lambda ctx: ({}, [{"id": i, "duration": 45} for i in ctx.task_ids[:100]]),
+    ),
+    Scenario("task-bulk", "delete", lambda ctx: ({}, ctx.create_tasks(100))),
+    Scenario("task-export", "get", no_args),
+    Scenario("task-stats", "get", no_args),
+    Scenario("task-search", "get", lambda ctx: ({}, {"q": "task 12"})),
+    Scenario("task-changes", "get", feed_cursor),
+    Scenario("task-ingest-status", "get", ingest_key),
+    Scenario("task-detail", "get", first_task),
+    Scenario(
+        "task-update",
+        "patch",
+        lambda ctx: ({"task_id": ctx.task_ids[0]}, {"duration": 45}),
+    ),
+    Scenario("task-delete", "delete", new_task),
+    Scenario(
+        "async-task-create",
+        "post",
+        lambda ctx: ({}, {"title": "Task", "duration": 30}),
+    ),
+    Scenario("async-get-tasks", "get", no_args),
+    Scenario("async-task-changes", "get", feed_cursor),
+    Scenario("async-task-detail", "get", first_task),
+    Scenario(
+        "async-task-update",
+        "patch",
+        lambda ctx: ({"task_id": ctx.task_ids[0]}, {"duration": 45}),
+    ),
+    Scenario("async-task-delete", "delete", new_task),
+]
+
+
+class Context:
+    """The benchmark user, their tokens and task ids, shared by scenarios."""
+
+    def __init__(self, user, warm_cache=False):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        from task_app.models import Task
+
+        self.user = user
+        self.warm_cache = warm_cache
+        refresh = RefreshToken.for_user(user)
+        self.refresh = str(refresh)
+        self.token = str(refresh.access_token)
+        self.task_ids = list(
+            Task.objects.filter(user=user).order_by("id").values_list("id", flat=True)
+        )
+
+    def create_tasks(self, count):
+        from task_app.models import Task
+
+        tasks = Task.objects.bulk_create_with_ids(
+            [Task(title=f"Task {i}", duration=i, user=self.user) for i in range(count)]
+        )
+        return [task.id for task in tasks]
+
+
+def scenario_key(scenario):
+    return f"{scenario.method.upper()} {scenario.url_name}"
+
+
+def check_coverage():
+    from task_app.urls import urlpatterns
+
+    missing = {pattern.name for pattern in urlpatterns} - {
+        scenario.url_name for scenario in SCENARIOS
+    }
+    if missing:
+        sys.exit(f"No benchmark scenario for URL(s): {', '.join(sorted(missing))}")
+
+
+def scenario_url(scenario, kwargs, data):
+    from django.urls import reverse
+
+    url = reverse(scenario.url_name, kwargs=kwargs)
+    if scenario.method == "get" and data:
+        url = f"{url}?{urlencode(data)}"
+    return url
+
+
+def send(client, scenario, ctx):
+    from django.core.cache import cache
+
+    kwargs, data = scenario.prepare(ctx)
+    if not ctx.warm_cache:
+        cache.clear()
+    url = scenario_url(scenario, kwargs, data)
+    method = getattr(client, scenario.method)
+    if data is None or scenario.method == "get":
+        body = {}
+    else:
+        body = {"data": json.dumps(data)}
+
+    def request():
+        response = method(url, content_type="application/json", **body)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+    return request
+
+
+def drop_client_finalizers():
+    """Detach the weakref.finalize entries the test client piles up.
+
+    On every request, Django's test client reconnects close_old_connections
+    to request_finished, and each connect() registers another finalizer for
+    that function, which never dies. Their registry grows for the whole run,
+    and the request that crossed one of its resize thresholds was charged
+    with the larger table, 36 KiB by the end of a run, whatever its view did.
+    """
+    from django.db import close_old_connections
+
+    for finalizer in list(weakref.finalize._registry):
+        info = finalizer.peek()
+        if info is not None and info[0] is close_old_connections:
+            finalizer.detach()
+
+
+def run_scenario(client, scenario, ctx, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from benchmarks.common import summarize
+
+    repeat = min(repeat, scenario.max_repeat or repeat)
+    timings, queries = [], []
+    for _ in range(repeat):
+        request = send(client, scenario, ctx)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = request()
+            timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            sys.exit(
+                f"{scenario_key(scenario)} returned {response.status_code}: "
+                f"{response.content[:200]!r}"
+            )
+        queries.append(len(captured))
+
+    # tracemalloc slows everything down, so allocations get their own pass.
+    peaks = []
+    for _ in range(min(repeat, 20)):
+        request = send(client, scenario, ctx)
+        drop_client_finalizers()
+        tracemalloc.start()
+        try:
+            request()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    return {
+        **summarize(timings),
+        "rps": round(1000 * len(timings) / sum(timings), 1),
+        "queries": max(queries),
+        "alloc_kib": round(max(peaks) / 1024, 1),
+    }
+
+
+def run_server(name, ctx, clients, duration):
+    from benchmarks.common import summarize
+    from benchmarks.server import load, running_server
+
+    results = {}
+    with running_server(name) as port:
+        for scenario in SCENARIOS:
+            if scenario.method != "get":
+                continue
+            path = scenario_url(scenario, *scenario.prepare(ctx))
+            counts, timings = load(port, path, ctx.token, clients, duration)
+            results[f"{name.upper()} {scenario_key(scenario)}"] = {
+                **summarize(timings),
+                "rps": round(counts.get(200, 0) / duration, 1),
+                "errors": sum(n for status, n in counts.items() if status != 200),
+            }
+    return results
+
+
+# Allowed growth per metric; None uses --tolerance. rps may shrink instead.
+LIMITS = {
+    "p50_ms": None,
+    "p95_ms": None,
+    "p99_ms": None,
+    "rps": None,
+    "queries": 0,
+    "alloc_kib": 0.25,
+}
+
+
+def compare(results, baseline, tolerance):
+    """Return a line for each metric that regressed past its limit."""
+    regressions = []
+    for key, metrics in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric, limit in LIMITS.items():
+            if metric not in metrics or metric not in base:
+                continue
+            limit = tolerance if limit is None else limit
+            value, expected = metrics[metric], base[metric]
+            if metric == "rps":
+                regressed = value < expected / (1 + limit)
+            else:
+                regressed = value > expected * (1 + limit)
+            if regressed:
+                regressions.append(f"{key}: {metric} {value} (baseline {expected})")
+    return regressions
+
+
+@contextmanager
+def database(server):
+    from django.core.management import call_command
+
+    from benchmarks.common import test_database
+
+    if server:
+        # The server processes need a database they can open too.
+        call_command("migrate", verbosity=0)
+        yield
+    else:
+        with test_database():
+            yield
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=1000, help="Tasks per user")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--warm-cache",
+        action="store_true",
+        help="Keep the cache between requests instead of measuring full reads",
+    )
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Write the results to --baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed latency growth and throughput loss, as a fraction",
+    )
+    parser.add_argument("--server", choices=["wsgi", "asgi"])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=5)
+    args = parser.parse_args()
+
+    if args.server:
+        os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.server_settings"
+        os.environ["BENCH_DATABASE"] = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+
+    from benchmarks.common import seed_tasks  # Sets Django up first.
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.test import Client
+
+    check_coverage()
+    config = {
+        "users": args.users,
+        "tasks": args.tasks,
+        "repeat": args.repeat,
+        "warm_cache": args.warm_cache,
+    }
+    results = {}
+    with database(args.server):
+        for i in range(args.users):
+            seed_tasks(User.objects.create_user(username=f"bench{i}"), args.tasks)
+
+        def seeded_context(username):
+            user = User.objects.create_user(username=username, password=PASSWORD)
+            seed_tasks(user, args.tasks)
+            # seed_tasks() bypasses the write paths that maintain summaries
+            # and the title search index.
+            for command in ("rebuild_task_summaries", "rebuild_task_search_index"):
+                call_command(command, "--user", str(user.id), stdout=io.StringIO())
+            return Context(user, args.warm_cache)
+
+        print(
+            f"{args.users} users x {args.tasks} tasks, {args.repeat} requests "
+            f"per URL, cache {'warm' if args.warm_cache else 'cleared'}"
+        )
+        print(
+            f"{'scenario':<28} {'p50':>9} {'p95':>9} {'p99':>9} "
+            f"{'req/s':>8} {'queries':>8} {'alloc':>10}"
+        )
+        for n, scenario in enumerate(SCENARIOS):
+            # A user per scenario, so one scenario's writes cannot change what
+            # the next measures (and its tokens cannot expire mid-run).
+            ctx = seeded_context(f"scenario{n}")
+            client = Client(headers={"Authorization": f"Bearer {ctx.token}"})
+            key = scenario_key(scenario)
+            metrics = results[key] = run_scenario(client, scenario, ctx, args.repeat)
+            print(
+                f"{key:<28} {metrics['p50_ms']:>7.2f}ms {metrics['p95_ms']:>7.2f}ms "
+                f"{metrics['p99_ms']:>7.2f}ms {metrics['rps']:>8.1f} "
+                f"{metrics['queries']:>8} {metrics['alloc_kib']:>7.1f}KiB"
+            )
+
+        if args.server:
+            print(f"\n{args.server} server, {args.clients} clients")
+            served = run_server(
+                args.server, seeded_context("server"), args.clients, args.duration
+            )
+            for key, metrics in served.items():
+                print(
+                    f"{key:<33} {metrics['p50_ms']:>7.2f}ms "
+                    f"{metrics['p95_ms']:>7.2f}ms {metrics['p99_ms']:>7.2f}ms "
+                    f"{metrics['rps']:>8.1f} req/s, {metrics['errors']} errors"
+                )
+            results.update(served)
+
+    document = {"config": config, "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}, nothing to compare")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["config"] != config:
+        print(f"\nWarning: baseline was recorded with {baseline['config']}")
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print("\nRegressions against the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
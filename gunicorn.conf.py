@@ -0,0 +1,23 @@
+"""gunicorn settings for the WSGI app, read from the working directory.
+
+    gunicorn selteq_task.wsgi:application
+
+WEB_CONCURRENCY worker processes (gunicorn's own variable) of
+GUNICORN_THREADS threads each. Persistent database connections are kept per
+thread, so each thread reuses its own across requests.
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+# Recycle workers now and then, so that a leak in a dependency cannot grow a
+# worker for ever; the jitter keeps them from restarting all at once.
+max_requests = 10000
+max_requests_jitter = 1000
+# Queries waiting on a slow database get this long before the worker is
+# restarted.
+timeout = 60
+graceful_timeout = 30
@@ -1,6 +1,8 @@
 import os
 
 from celery import Celery
+from celery.signals import task_postrun
+from django.db import reset_queries
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "selteq_task.settings")
 
@@ -9,3 +11,11 @@ app = Celery("selteq_task")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
+
+
+@task_postrun.connect
+def clear_query_log(**kwargs):
+    # With DEBUG on, Django logs the queries of each connection until the next
+    # request starts, which never happens in a worker: without this, workers
+    # would hold on to the SQL of thousands of past queries.
+    reset_queries()
@@ -0,0 +1,13 @@
+"""Project settings, in layers: base holds what every environment shares,
+dev and prod the defaults of each.
+
+DJANGO_ENV=prod loads the production settings, anything else the development
+ones, so DJANGO_SETTINGS_MODULE stays selteq_task.settings everywhere.
+"""
+
+import os
+
+if os.environ.get("DJANGO_ENV", "dev") == "prod":
+    from selteq_task.settings.prod import *  # noqa: F401,F403
+else:
+    from selteq_task.settings.dev import *  # noqa: F401,F403
@@ -0,0 +1,359 @@
+"""Settings shared by every environment.
+
+Everything that differs between deployments comes from environment
+variables. selteq_task.settings.dev and selteq_task.settings.prod layer the
+development and production defaults on top (see selteq_task.settings).
+"""
+
+import os
+from datetime import timedelta
+from pathlib import Path
+from celery.schedules import crontab
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+SECRET_KEY = os.environ.get(
+    "DJANGO_SECRET_KEY",
+    "django-insecure-y6urf=)n@rhf_+5_$g1ufs0^&)c9az+7%e#a6z#03)*4)h8z@+",
+)
+
+# SECURITY WARNING: don't run with debug turned on in production!
+# With DEBUG on, Django also keeps the SQL of every query a connection runs
+# until the next request starts.
+DEBUG = False
+
+ALLOWED_HOSTS = list(
+    filter(None, os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(","))
+)
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "rest_framework",
+    "rest_framework_simplejwt",
+    "task_app",
+    "django_celery_beat",
+]
+
+MIDDLEWARE = [
+    "task_app.metrics.MetricsMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "task_app.routing.PrimaryReplicaMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "selteq_task.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "selteq_task.wsgi.application"
+
+# Database
+# SQL Server, at the DB_* variables docker-compose.yml sets. For a local
+# server, set DB_HOST=localhost.
+
+DATABASES = {
+    "default": {
+        "ENGINE": "mssql",
+        "NAME": os.environ.get("DB_NAME", "selteq_db"),
+        "USER": os.environ.get("DB_USER", "sa"),
+        "PASSWORD": os.environ.get("DB_PASSWORD", "StrongPassword123!"),
+        "HOST": os.environ.get("DB_HOST", "sql_server"),
+        "PORT": os.environ.get("DB_PORT", "1433"),
+        "OPTIONS": {
+            "driver": "ODBC Driver 17 for SQL Server",
+            "extra_params": "TrustServerCertificate=yes;",
+            # Multi-row INSERTs return the new ids (OUTPUT INSERTED), sparing
+            # Task.objects.bulk_create_with_ids() a query to read them back.
+            # mssql-django leaves this off as it fails on tables with
+            # triggers, which this schema has none of.
+            "return_rows_bulk_insert": True,
+        },
+        # Keep connections open between requests, checking them before reuse.
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Read replicas
+# Comma-separated hosts of read-only replicas of the default database, e.g.
+# DB_REPLICA_HOSTS=sql_replica_1,sql_replica_2. Requests read from them
+# (see task_app.routing); without any, everything uses the default database.
+
+DATABASE_REPLICAS = []
+for host in filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")):
+    alias = f"replica_{len(DATABASE_REPLICAS)}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        # Tests run against the default database alone.
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["task_app.routing.PrimaryReplicaRouter"]
+# Seconds a user's reads stay on the primary after they change something,
+# longer than the replicas are expected to lag.
+DB_PRIMARY_STICKY_SECONDS = int(os.environ.get("DB_PRIMARY_STICKY_SECONDS", 10))
+
+# Cache
+# Redis in production (CACHE_URL=redis://...), a local-memory LRU otherwise.
+
+if os.environ.get("CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["CACHE_URL"],
+            # Passed to the redis-py connection pool: a Redis that stopped
+            # answering fails a request within a second instead of hanging
+            # it, and idle pooled connections are checked before reuse.
+            "OPTIONS": {
+                "socket_connect_timeout": 1,
+                "socket_timeout": 1,
+                "health_check_interval": 30,
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+TASK_CACHE_ALIAS = "default"
+TASK_CACHE_TIMEOUT = 300  # Seconds a cached task read may be served
+
+# Request metrics
+# Latency, SQL and serializer timings for a sample of requests, served at
+# /metrics and in a Server-Timing header. Disabled, the middleware is skipped.
+# /metrics shares the public port, so it only answers requests carrying
+# "Authorization: Bearer <METRICS_TOKEN>", and not at all without a token.
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "0") == "1"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE", 1.0))
+METRICS_SERVER_TIMING = True
+
+# Password validation
+# https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.2/topics/i18n/
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "UTC"
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.2/howto/static-files/
+
+STATIC_URL = "static/"
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# JWT
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "task_app.authentication.CachedJWTAuthentication",
+    ],
+    # DRF's defaults, with the JSON renderer swapped for the orjson-backed one.
+    "DEFAULT_RENDERER_CLASSES": [
+        "task_app.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+
+SIMPLE_JWT = {
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),  # Token expires after 5 minutes
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=1),  # Renew access tokens for a day
+}
+
+LOGIN_FAILURE_CACHE_TIMEOUT = 30  # Seconds a failed credential pair is rejected
+AUTH_USER_CACHE_TIMEOUT = 60  # Seconds an authenticated user row is reused
+
+# Celery
+
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6380/0")
+CELERY_ACCEPT_CONTENT = ["json"]
+CELERY_TASK_SERIALIZER = "json"
+
+# Nothing reads task return values back, so by default no result backend is
+# configured and no results are stored; a task whose result is needed sets
+# ignore_result=False and requires CELERY_RESULT_BACKEND.
+CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND") or None
+CELERY_TASK_IGNORE_RESULT = True
+
+# "default" is for work a user is waiting on, "periodic" for the beat jobs.
+# docker-compose.yml runs a worker per queue, so a slow report or purge never
+# holds up the former.
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "task_app.tasks.print_task_details": {"queue": "periodic"},
+    "task_app.tasks.purge_deleted_tasks": {"queue": "periodic"},
+    "task_app.tasks.purge_task_events": {"queue": "periodic"},
+    "task_app.tasks.archive_old_tasks": {"queue": "periodic"},
+}
+
+# Tasks are acknowledged once they finish, so the broker redelivers those of a
+# worker that died mid-task (every task here is safe to run twice), and each
+# worker process reserves one task at a time, so a long task never holds back
+# those queued behind it.
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Unacknowledged tasks are redelivered after this long: keep it above every
+# time limit below.
+CELERY_BROKER_TRANSPORT_OPTIONS = {"visibility_timeout": 3600}
+
+# Per-task limits. The soft time limit raises SoftTimeLimitExceeded in the
+# task; the batch jobs commit as they go, so the next run carries on from
+# there. Other tasks get the defaults.
+CELERY_TASK_SOFT_TIME_LIMIT = 30
+CELERY_TASK_TIME_LIMIT = 60
+CELERY_TASK_ANNOTATIONS = {
+    # Scheduled every minute: finish before the next run is due.
+    "task_app.tasks.print_task_details": {
+        "rate_limit": "60/m",
+        "soft_time_limit": 50,
+        "time_limit": 55,
+    },
+    "task_app.tasks.purge_deleted_tasks": {"soft_time_limit": 540, "time_limit": 570},
+    "task_app.tasks.archive_old_tasks": {"soft_time_limit": 1800, "time_limit": 1860},
+    "task_app.tasks.flush_task_buffer": {"soft_time_limit": 120, "time_limit": 150},
+}
+
+# Worker pool: "prefork" (a process per slot, the default) or "threads". The
+# tasks mostly wait on the database, which threads do in less memory (see
+# benchmarks/bench_celery_pools.py), but only prefork enforces the hard time
+# limits above.
+CELERY_WORKER_POOL = os.environ.get("CELERY_WORKER_POOL", "prefork")
+CELERY_WORKER_CONCURRENCY = int(os.environ.get("CELERY_WORKER_CONCURRENCY", 4))
+
+CELERY_BEAT_SCHEDULE = {
+    "print-task-every-minute": {
+        "task": "task_app.tasks.print_task_details",
+        "schedule": crontab(minute="*/1"),  # Every minute
+        "kwargs": {"user_id": 1},
+        # Drop runs still queued when the next one is due.
+        "options": {"expires": 60},
+    },
+    "purge-deleted-tasks": {
+        "task": "task_app.tasks.purge_deleted_tasks",
+        "schedule": crontab(minute="*/10"),  # Every 10 minutes
+    },
+    "purge-archived-tasks": {
+        "task": "task_app.tasks.purge_deleted_tasks",
+        "schedule": crontab(hour=4, minute=30),  # Daily at 04:30
+        "kwargs": {"archived": True},
+    },
+    "purge-task-events": {
+        "task": "task_app.tasks.purge_task_events",
+        "schedule": crontab(minute=45),  # Hourly
+    },
+    "archive-old-tasks": {
+        "task": "task_app.tasks.archive_old_tasks",
+        "schedule": crontab(hour=3, minute=30),  # Daily at 03:30
+    },
+}
+
+# Task reports
+# Seconds between the scheduled print_task_details runs, as in the beat
+# schedule above. A run that takes longer defers the next ones for as long.
+
+TASK_REPORT_INTERVAL = 60
+
+# Task archive
+# archive_old_tasks moves tasks older than this to TaskArchive and, when an
+# export directory is set, writes each batch there as gzipped NDJSON.
+
+TASK_ARCHIVE_AFTER_DAYS = int(os.environ.get("TASK_ARCHIVE_AFTER_DAYS", 365))
+TASK_ARCHIVE_EXPORT_DIR = os.environ.get("TASK_ARCHIVE_EXPORT_DIR") or None
+
+# Task change feed
+# GET /tasks/changes/ answers at once with the changes after the client's
+# cursor. Under ASGI, GET /async/tasks/changes/ also waits up to
+# TASK_FEED_TIMEOUT seconds for them, or streams them as server-sent events
+# for up to TASK_FEED_STREAM_SECONDS, checking the cache for new events every
+# TASK_FEED_POLL_INTERVAL seconds. Events are kept TASK_FEED_RETENTION_HOURS;
+# clients with an older cursor reload their tasks.
+
+TASK_FEED_POLL_INTERVAL = 1.0
+TASK_FEED_TIMEOUT = 25
+TASK_FEED_STREAM_SECONDS = 300
+TASK_FEED_HEARTBEAT_SECONDS = 15
+TASK_FEED_MAX_EVENTS = 100
+TASK_FEED_RETENTION_HOURS = 24
+
+# Buffered task creation
+# With TASK_INGEST_BUFFERED=1, POST /tasks/create/ queues the task on the
+# broker and answers 202 Accepted; flush_task_buffer writes the queue in
+# batches of TASK_INGEST_BATCH_SIZE, TASK_INGEST_FLUSH_SECONDS after the first
+# task queued. GET /tasks/ingest/<key>/ tells whether a queued task is created.
+# Keys are remembered TASK_INGEST_KEY_RETENTION_HOURS, within which a task
+# submitted again under the same key is created once. Tasks that cannot be
+# written are moved to TASK_INGEST_DEAD_LETTER_QUEUE and reported "failed".
+
+TASK_INGEST_BUFFERED = os.environ.get("TASK_INGEST_BUFFERED", "0") == "1"
+TASK_INGEST_BROKER_URL = CELERY_BROKER_URL
+TASK_INGEST_QUEUE = "task-ingest"
+TASK_INGEST_DEAD_LETTER_QUEUE = "task-ingest-dead"
+# At most half of MAX_QUERY_PARAMS: see task_app.ingest.write().
+TASK_INGEST_BATCH_SIZE = 500
+TASK_INGEST_FLUSH_SECONDS = 1
+TASK_INGEST_KEY_RETENTION_HOURS = 24
@@ -0,0 +1,10 @@
+"""Development settings: local hosts allowed, debugging on with DJANGO_DEBUG=1."""
+
+import os
+
+from selteq_task.settings.base import *  # noqa: F401,F403
+from selteq_task.settings.base import ALLOWED_HOSTS
+
+DEBUG = os.environ.get("DJANGO_DEBUG", "0") == "1"
+
+ALLOWED_HOSTS = ALLOWED_HOSTS or ["localhost", "127.0.0.1", "[::1]"]
@@ -0,0 +1,41 @@
+"""Production settings: no debugging, and no insecure defaults.
+
+DJANGO_SECRET_KEY and DJANGO_ALLOWED_HOSTS are required. Serve the project
+with gunicorn (selteq_task.wsgi, configured in gunicorn.conf.py) or uvicorn
+(selteq_task.asgi), never runserver.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from selteq_task.settings.base import *  # noqa: F401,F403
+from selteq_task.settings.base import ALLOWED_HOSTS, TEMPLATES
+
+DEBUG = False
+
+if "DJANGO_SECRET_KEY" not in os.environ:
+    raise ImproperlyConfigured("Set DJANGO_SECRET_KEY in production.")
+if not ALLOWED_HOSTS:
+    raise ImproperlyConfigured("Set DJANGO_ALLOWED_HOSTS in production.")
+
+# Templates are read and compiled once per process. Django does so by default
+# when no loaders are set; they are listed so that it does not depend on it.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **TEMPLATES[0]["OPTIONS"],
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                )
+            ],
+        },
+    }
+]
@@ -1,11 +1,229 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import actions, helpers
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.admin.options import get_content_type_for_model
+from django.contrib.admin.utils import model_ngettext
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
 
+from task_app import feed, search, summaries, versions
 from task_app.models import Task
+from task_app.pagination import EstimatedCountPaginator
+from task_app.signals import tasks_changed
+from task_app.utils import MAX_QUERY_PARAMS, chunked
+
+
+class TaskActionForm(helpers.ActionForm):
+    duration = forms.IntegerField(required=False, label="New duration:")
 
 
 class TaskAdmin(admin.ModelAdmin):
     list_display = ("title", "user", "duration", "created_at")
-    search_fields = ("title", "user__username")
+    list_select_related = ("user",)
+    date_hierarchy = "created_at"
+    # Counting every task on each page is a full index scan; the page count
+    # comes from table statistics instead, and the unfiltered total is
+    # not shown next to filtered results.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = TaskActionForm
+    actions = ["delete_selected", "set_duration"]
+    # Shows the search box; get_search_results() does the matching.
+    search_fields = ("title", "=user__username")
+    search_help_text = (
+        "Tasks with title words starting with every search term, or tasks of "
+        "the user with exactly this username."
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Instead of title/username LIKE '%term%' across a join, which scans
+        # every task, use the title index and an exact username lookup.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        condition = Q(user__in=User.objects.filter(username=search_term))
+        ids = search.matching_task_ids(search_term)
+        if ids is not None:
+            condition |= Q(id__in=ids)
+        return queryset.filter(condition), False
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            old = None
+            if change:
+                old = (
+                    Task.objects.select_for_update()
+                    .filter(pk=obj.pk)
+                    .values_list("user_id", "created_at", "duration")
+                    .first()
+                )
+            super().save_model(request, obj, form, change)
+            if old is not None:
+                # The form may move the task to another user.
+                user_id, created_at, duration = old
+                summaries.remove_tasks(user_id, [(created_at, duration)])
+                versions.bump(user_id, obj.user_id)
+                if user_id != obj.user_id:
+                    feed.record(user_id, "deleted", [obj.id])
+                feed.record(obj.user_id, "updated", [obj.id])
+            else:
+                versions.bump(obj.user_id)
+                feed.record(obj.user_id, "created", [obj.id])
+            summaries.add_tasks(obj.user_id, [(obj.created_at, obj.duration)])
+            search.reindex_tasks(obj.user_id, [(obj.id, obj.title)])
+        if old is not None and old[0] != obj.user_id:
+            # Gone from the previous owner's tasks.
+            tasks_changed.send(
+                sender=Task, user_id=old[0], action="deleted", task_ids=[obj.id]
+            )
+        tasks_changed.send(
+            sender=Task,
+            user_id=obj.user_id,
+            action="updated" if change else "created",
+            task_ids=[obj.id],
+        )
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Task.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            rows = self._delete_tasks(queryset)
+        self._send_deleted(rows)
+
+    @admin.action(
+        permissions=["delete"],
+        description=gettext_lazy("Delete selected %(verbose_name_plural)s"),
+    )
+    def delete_selected(self, request, queryset):
+        # Django's action writes a LogEntry per task, an INSERT each, before
+        # deleting them. Here the deletion log is one bulk insert.
+        if not request.POST.get("post"):
+            # The confirmation page.
+            return actions.delete_selected(self, request, queryset)
+        with transaction.atomic():
+            rows = self._delete_tasks(queryset)
+            LogEntry.objects.bulk_create(
+                (
+                    LogEntry(
+                        user_id=request.user.pk,
+                        content_type_id=get_content_type_for_model(Task).pk,
+                        object_id=str(task_id),
+                        object_repr=title[:200],
+                        action_flag=DELETION,
+                        change_message="",
+                    )
+                    for task_id, _, title, _, _ in rows
+                ),
+                # Seven columns bound per inserted row.
+                batch_size=MAX_QUERY_PARAMS // 7,
+            )
+        self._send_deleted(rows)
+        if rows:
+            self.message_user(
+                request,
+                f"Successfully deleted {len(rows)} "
+                f"{model_ngettext(self.opts, len(rows))}.",
+                messages.SUCCESS,
+            )
+
+    @admin.action(
+        permissions=["change"],
+        description="Set the duration of selected %(verbose_name_plural)s",
+    )
+    def set_duration(self, request, queryset):
+        form = self.action_form(request.POST)
+        form.fields["action"].choices = self.get_action_choices(request)
+        if not form.is_valid() or form.cleaned_data["duration"] is None:
+            self.message_user(
+                request, "Enter the new duration next to the action.", messages.ERROR
+            )
+            return
+        duration = form.cleaned_data["duration"]
+        changed = {}
+        with transaction.atomic():
+            rows = queryset.select_for_update().values_list(
+                "id", "user_id", "created_at", "duration"
+            )
+            for task_id, user_id, created_at, old in rows:
+                changed.setdefault(user_id, []).append((task_id, created_at, old))
+            task_ids = [
+                task_id for tasks in changed.values() for task_id, _, _ in tasks
+            ]
+            now = timezone.now()
+            for chunk in chunked(task_ids, MAX_QUERY_PARAMS - 100):
+                Task.objects.filter(id__in=chunk).update(
+                    duration=duration, updated_at=now
+                )
+            for user_id, tasks in changed.items():
+                summaries.change_durations(
+                    user_id,
+                    [(created_at, old, duration) for _, created_at, old in tasks],
+                )
+            versions.bump(*changed)
+            feed.record_many(
+                "updated",
+                {
+                    user_id: [task_id for task_id, _, _ in tasks]
+                    for user_id, tasks in changed.items()
+                },
+            )
+        for user_id, tasks in changed.items():
+            tasks_changed.send(
+                sender=Task,
+                user_id=user_id,
+                action="updated",
+                task_ids=[task_id for task_id, _, _ in tasks],
+            )
+        self.message_user(
+            request,
+            f"Set the duration of {len(task_ids)} "
+            f"{model_ngettext(self.opts, len(task_ids))} to {duration}.",
+            messages.SUCCESS,
+        )
+
+    def _delete_tasks(self, queryset):
+        """Soft-delete the tasks by id, with their summary counts and index
+        entries.
+
+        Returns the deleted ``(id, user_id, title, created_at, duration)``
+        rows. Call it inside a transaction.
+        """
+        rows = list(
+            queryset.select_for_update().values_list(
+                "id", "user_id", "title", "created_at", "duration"
+            )
+        )
+        removed = {}
+        for _, user_id, _, created_at, duration in rows:
+            removed.setdefault(user_id, []).append((created_at, duration))
+        # By id rather than by the changelist filters, so tasks created since
+        # the rows were read are left alone.
+        task_ids = [row[0] for row in rows]
+        for chunk in chunked(task_ids, MAX_QUERY_PARAMS - 100):
+            Task.objects.filter(id__in=chunk).soft_delete()
+        for user_id, tasks in removed.items():
+            summaries.remove_tasks(user_id, tasks)
+        versions.bump(*removed)
+        feed.record_many("deleted", self._task_ids_by_user(rows))
+        search.unindex_tasks(task_ids)
+        return rows
+
+    def _task_ids_by_user(self, rows):
+        task_ids = {}
+        for task_id, user_id, *_ in rows:
+            task_ids.setdefault(user_id, []).append(task_id)
+        return task_ids
+
+    def _send_deleted(self, rows):
+        for user_id, task_ids in self._task_ids_by_user(rows).items():
+            tasks_changed.send(
+                sender=Task, user_id=user_id, action="deleted", task_ids=task_ids
+            )
 
 
 admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+
+from django.db import transaction
+
+from task_app import feed, search, versions
+from task_app.exports import EXPORT_FIELDS
+from task_app.models import Task, TaskArchive
+from task_app.signals import tasks_changed
+from task_app.utils import MAX_QUERY_PARAMS, datetime_formatter
+
+# Moves old tasks out of task_app_task into TaskArchive, so that the hot table
+# and its indexes only hold the tasks users still work with. Archived tasks
+# keep their id and are still returned by the detail endpoints and counted by
+# the summaries, but they leave the listings and the title index.
+
+ARCHIVE_FIELDS = (*EXPORT_FIELDS, "user_id")
+
+
+def archive_tasks(cutoff, batch_size=1000, max_batches=100, export_dir=None):
+    """Move tasks created before ``cutoff`` to the archive, oldest first.
+
+    Each batch of up to ``batch_size`` tasks is copied, deleted and unindexed
+    in its own transaction, and written to ``export_dir`` as a gzipped NDJSON
+    file when one is given. Stops after ``max_batches`` batches and returns
+    the number of tasks moved. Soft-deleted tasks are left to the purge.
+    """
+    # The task ids go into an IN (...) list.
+    batch_size = min(batch_size, MAX_QUERY_PARAMS - 100)
+    # task_created_idx returns the oldest tasks in order, without a sort.
+    tasks = (
+        Task.objects.filter(created_at__lt=cutoff)
+        .order_by("created_at", "id")
+        .values_list(*ARCHIVE_FIELDS)
+    )
+    moved = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            rows = list(tasks.select_for_update()[:batch_size])
+            if not rows:
+                break
+            TaskArchive.objects.bulk_create(
+                (
+                    TaskArchive(
+                        id=task_id,
+                        title=title,
+                        duration=duration,
+                        created_at=created_at,
+                        updated_at=updated_at,
+                        user_id=user_id,
+                    )
+                    for task_id, title, duration, created_at, updated_at, user_id in rows
+                ),
+                # Six columns bound per inserted row.
+                batch_size=MAX_QUERY_PARAMS // 6,
+            )
+            task_ids = [row[0] for row in rows]
+            Task.all_objects.filter(id__in=task_ids).delete()
+            search.unindex_tasks(task_ids)
+            by_user = {}
+            for row in rows:
+                by_user.setdefault(row[-1], []).append(row[0])
+            versions.bump(*by_user)
+            feed.record_many("archived", by_user)
+            if export_dir:
+                write_export(export_dir, rows)
+
+        for user_id, user_task_ids in by_user.items():
+            tasks_changed.send(
+                sender=Task, user_id=user_id, action="archived", task_ids=user_task_ids
+            )
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+    return moved
+
+
+def write_export(export_dir, rows):
+    """Write archived rows to ``tasks-<first id>-<last id>.ndjson.gz``.
+
+    The file is written under a temporary name and renamed into place, so a
+    file with the final name is always complete. A batch retried after a
+    failed commit overwrites its own file.
+    """
+    task_ids = [row[0] for row in rows]
+    path = os.path.join(export_dir, f"tasks-{min(task_ids)}-{max(task_ids)}.ndjson.gz")
+    os.makedirs(export_dir, exist_ok=True)
+    format_datetime = datetime_formatter()
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as file:
+        file.writelines(
+            encode(
+                {
+                    "id": task_id,
+                    "user_id": user_id,
+                    "title": title,
+                    "duration": duration,
+                    "created_at": format_datetime(created_at),
+                    "updated_at": format_datetime(updated_at),
+                }
+            )
+            + "\n"
+            for task_id, title, duration, created_at, updated_at, user_id in rows
+        )
+    os.replace(f"{path}.tmp", path)
+    return path
@@ -0,0 +1,232 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.parsers import JSONParser
+from rest_framework.request import ForcedAuthentication, Request
+
+from task_app import cache, conditional, feed, ingest
+from task_app.authentication import CachedJWTAuthentication
+from task_app.models import Task, TaskArchive
+from task_app.renderers import FastJSONRenderer
+from task_app.serializers import TASK_FIELDS, TaskSerializer, task_payload
+from task_app.services import create_task, delete_task, update_task
+from task_app.signals import tasks_changed
+from task_app.views import (
+    TaskChangesMixin,
+    TaskPageMixin,
+    event_stream_response,
+    get_ingest_key,
+    ingest_accepted,
+)
+
+# Async counterparts of the task endpoints in task_app.views, for deployments
+# behind an ASGI server. DRF views are synchronous, so these are plain Django
+# views that authenticate, validate and serialize with the same classes and
+# return the same payloads, awaiting the ORM and cache instead of blocking
+# the event loop. Writes run the transactional helpers in task_app.services in
+# a worker thread, as the async ORM cannot open a transaction.
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type="application/json",
+        status=status,
+        headers=headers,
+    )
+
+
+def task_not_found():
+    return json_response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+async def send_tasks_changed(user_id, action, task_ids):
+    # The receivers do blocking cache I/O.
+    await sync_to_async(tasks_changed.send)(
+        sender=Task, user_id=user_id, action=action, task_ids=task_ids
+    )
+
+
+class AsyncTaskView(View):
+    """Base view requiring a valid JWT, like IsAuthenticated on the DRF views."""
+
+    authentication = CachedJWTAuthentication()
+    parser_classes = [JSONParser]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Token authenticated, so CSRF exempt like every APIView.
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            auth = await self.authentication.aauthenticate(request)
+            if auth is None:
+                raise exceptions.NotAuthenticated()
+            request.user, request.auth = auth
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(request, exc)
+
+    def handle_exception(self, request, exc):
+        headers = None
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            headers = {
+                "WWW-Authenticate": self.authentication.authenticate_header(request)
+            }
+        data = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+        return json_response(data, status=exc.status_code, headers=headers)
+
+    def initialize_request(self, request):
+        """Wrap the authenticated request for DRF parsing and pagination."""
+        return Request(
+            request,
+            parsers=[parser() for parser in self.parser_classes],
+            authenticators=[ForcedAuthentication(request.user, request.auth)],
+        )
+
+    def get_data(self, request):
+        # ASGI requests arrive with the body already read, so parsing it here
+        # does not block on the client.
+        return self.initialize_request(request).data
+
+
+class AsyncCreateTaskView(AsyncTaskView):
+    async def post(self, request):
+        serializer = TaskSerializer(data=self.get_data(request))
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if settings.TASK_INGEST_BUFFERED:
+            key = get_ingest_key(request)
+            # Publishing to the broker blocks.
+            await sync_to_async(ingest.submit)(
+                request.user.id, key, serializer.validated_data
+            )
+            data, headers = ingest_accepted(key)
+            return json_response(
+                data, status=status.HTTP_202_ACCEPTED, headers=headers
+            )
+        task = await sync_to_async(create_task)(
+            request.user.id, serializer.validated_data
+        )
+        await send_tasks_changed(request.user.id, "created", [task.id])
+        return json_response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
+
+
+class AsyncGetTaskView(TaskPageMixin, AsyncTaskView):
+    async def get(self, request):
+        # DRF's paginator evaluates the page synchronously, so it runs in the
+        # thread the async ORM would use as well.
+        request = self.initialize_request(request)
+        version, changed_at = await conditional.achanges(request.user.id)
+        etag = conditional.not_modified(request, version, changed_at)
+        if etag:
+            return conditional.not_modified_response(etag, changed_at)
+
+        @sync_to_async
+        def get_page():
+            return conditional.entry(version, changed_at, self.get_page(request))
+
+        cached = await cache.aget_or_set(
+            request.user.id, cache.request_key(request, "page"), get_page
+        )
+        return conditional.add_validators(
+            json_response(cached["data"]),
+            conditional.etag(request, cached["version"]),
+            cached["changed_at"],
+        )
+
+
+class AsyncRetrieveTaskView(AsyncTaskView):
+    async def get(self, request, task_id):
+        version, changed_at = await conditional.achanges(request.user.id)
+        etag = conditional.task_not_modified(request, version)
+        if etag:
+            return conditional.not_modified_response(etag, changed_at)
+
+        async def get_task():
+            # Archived tasks are looked up only when the task table misses.
+            for model in (Task, TaskArchive):
+                task = (
+                    await model.objects.filter(id=task_id, user_id=request.user.id)
+                    .values(*TASK_FIELDS)
+                    .afirst()
+                )
+                if task:
+                    return conditional.entry(version, changed_at, task_payload(task))
+            return None
+
+        cached = await cache.aget_or_set(request.user.id, f"task:{task_id}", get_task)
+        if cached is None:
+            return task_not_found()
+        task_stamp = conditional.stamp(cached["data"])
+        etag = conditional.not_modified(
+            request, cached["version"], cached["changed_at"], task_stamp
+        )
+        if etag:
+            return conditional.not_modified_response(etag, cached["changed_at"])
+        return conditional.add_validators(
+            json_response(cached["data"]),
+            conditional.etag(request, cached["version"], task_stamp),
+            cached["changed_at"],
+        )
+
+
+class AsyncUpdateTaskView(AsyncTaskView):
+    async def patch(self, request, task_id):
+        serializer = TaskSerializer(data=self.get_data(request), partial=True)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        task = await sync_to_async(update_task)(
+            request.user.id, task_id, serializer.validated_data
+        )
+        if task is None:
+            return task_not_found()
+        await send_tasks_changed(request.user.id, "updated", [task_id])
+        return json_response(task_payload(task))
+
+
+class AsyncDeleteTaskView(AsyncTaskView):
+    async def delete(self, request, task_id):
+        if not await sync_to_async(delete_task)(request.user.id, task_id):
+            return task_not_found()
+        await send_tasks_changed(request.user.id, "deleted", [task_id])
+        return json_response({"message": "Task deleted successfully"})
+
+
+class AsyncTaskChangesView(TaskChangesMixin, AsyncTaskView):
+    """TaskChangesView for ASGI, where a waiting client holds no thread.
+
+    Waits ?timeout= seconds (TASK_FEED_TIMEOUT at most) for changes after
+    the cursor, or streams them as server-sent events with ?format=sse or
+    Accept: text/event-stream. Served by a WSGI server, it answers at once
+    like TaskChangesView.
+    """
+
+    def can_wait(self, request):
+        return isinstance(request._request, ASGIRequest)
+
+    async def get(self, request):
+        request = self.initialize_request(request)
+        cursor = self.get_cursor(request)
+        if self.wants_stream(request):
+            if cursor is None:
+                cursor = await feed.astart(request.user.id)
+            return event_stream_response(
+                feed.Stream(request.user.id, cursor).aevents()
+            )
+        timeout = self.get_timeout(request)
+        if cursor is None:
+            cursor, changes = await feed.astart(request.user.id), None
+        else:
+            cursor, changes = await feed.await_changes(
+                request.user.id, cursor, timeout
+            )
+        return json_response(feed.response_data(cursor, changes))
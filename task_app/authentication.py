@@ -0,0 +1,152 @@
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from task_app import routing
+
+
+def user_cache_key(user_id):
+    return f"auth:user-entry:{user_id}"
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that keeps recently authenticated users in the cache.
+
+    Only what authentication needs is cached (see cache_entry()), never the
+    password hash or the profile fields; those are loaded from the database
+    if a view reads them. Entries live for AUTH_USER_CACHE_TIMEOUT seconds
+    and are dropped whenever the user is saved or deleted (see
+    task_app.signals), so deactivation and password changes take effect on
+    the next request.
+
+    Users who wrote recently have the rest of the request read from the
+    primary database (see task_app.routing).
+    """
+
+    def authenticate(self, request):
+        auth = super().authenticate(request)
+        if auth is not None and settings.DATABASE_REPLICAS:
+            routing.read_primary_if_pinned(auth[0].pk)
+        return auth
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            user = super().get_user(validated_token)
+            cache.set(key, self.cache_entry(user), settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+        self.check_revoked(validated_token, entry)
+        return self.cached_user(entry)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views, taking a plain HttpRequest."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = await self.aget_user(validated_token)
+        if settings.DATABASE_REPLICAS:
+            await routing.aread_primary_if_pinned(user.pk)
+        return user, validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        key = user_cache_key(user_id)
+        entry = await cache.aget(key)
+        if entry is None:
+            user = await sync_to_async(super().get_user)(validated_token)
+            await cache.aset(
+                key, self.cache_entry(user), settings.AUTH_USER_CACHE_TIMEOUT
+            )
+            return user
+        self.check_revoked(validated_token, entry)
+        return self.cached_user(entry)
+
+    def cache_entry(self, user):
+        """What the cache keeps of an authenticated user: its id and active
+        flag, and, when tokens can be revoked, the digest of its password
+        hash they carry."""
+        entry = {"id": user.pk, "is_active": user.is_active}
+        if api_settings.CHECK_REVOKE_TOKEN:
+            entry["password_digest"] = get_md5_hash_password(user.password)
+        return entry
+
+    def cached_user(self, entry):
+        """The user of a cache entry, its other fields deferred."""
+        return self.user_model.from_db(
+            None, ["id", "is_active"], [entry["id"], entry["is_active"]]
+        )
+
+    def check_revoked(self, validated_token, entry):
+        # Inactive users are never cached, but a cached user may still be
+        # presenting a token issued before a password change.
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != entry.get("password_digest"):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+
+
+def _failed_logins_generation_key(username):
+    digest = salted_hmac(
+        "task_app.failed-login-generation", username, algorithm="sha256"
+    ).hexdigest()
+    return f"login:failed-generation:{digest}"
+
+
+def _failed_login_key(username, password):
+    # Entries are keyed by the username's current generation too, so that
+    # forget_failed_logins() can drop them all without knowing the passwords.
+    generation = cache.get(_failed_logins_generation_key(username), "")
+    # Only a keyed digest of the credentials ever reaches the cache.
+    digest = salted_hmac(
+        "task_app.failed-login",
+        f"{username}\0{password}\0{generation}",
+        algorithm="sha256",
+    ).hexdigest()
+    return f"login:failed:{digest}"
+
+
+def is_recent_failed_login(username, password):
+    return cache.get(_failed_login_key(username, password)) is not None
+
+
+def remember_failed_login(username, password):
+    cache.set(
+        _failed_login_key(username, password),
+        True,
+        settings.LOGIN_FAILURE_CACHE_TIMEOUT,
+    )
+
+
+def forget_failed_logins(username):
+    """Stop rejecting the failed logins remembered for ``username``, which may
+    succeed now that the account was created or changed."""
+    # A new generation rather than a deleted one: entries made before the
+    # first generation was set must not match either. It only has to last
+    # as long as they do.
+    cache.set(
+        _failed_logins_generation_key(username),
+        uuid4().hex,
+        settings.LOGIN_FAILURE_CACHE_TIMEOUT,
+    )
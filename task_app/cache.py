@@ -0,0 +1,104 @@
+import hashlib
+import threading
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Task read payloads are cached under a per-user version token. Writes replace
+# the token instead of deleting keys, so every entry cached for the previous
+# version becomes unreachable at once and simply ages out.
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _cache():
+    return caches[settings.TASK_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f"tasks:version:{user_id}"
+
+
+def _user_version(cache, user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        # add() so that concurrent first readers settle on the same token.
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+async def _auser_version(cache, user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = uuid4().hex
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key, version)
+    return version
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def request_key(request, prefix="list"):
+    """Cache key fragment for a read that depends on the query string and host."""
+    params = sorted(request.query_params.lists())
+    digest = hashlib.md5(
+        f"{request.get_host()}?{params}".encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def get_or_set(user_id, name, build):
+    """Return the cached payload ``name`` for the user, building it on a miss.
+
+    ``build`` may return ``None`` for "nothing to cache" (e.g. a missing task).
+    """
+    cache = _cache()
+    key = f"tasks:{user_id}:{_user_version(cache, user_id)}:{name}"
+    payload = cache.get(key)
+    if payload is not None:
+        _record("hits")
+        return payload
+    _record("misses")
+    payload = build()
+    if payload is not None:
+        cache.set(key, payload, settings.TASK_CACHE_TIMEOUT)
+    return payload
+
+
+async def aget_or_set(user_id, name, build):
+    """get_or_set() for async views; ``build`` is a coroutine function."""
+    cache = _cache()
+    key = f"tasks:{user_id}:{await _auser_version(cache, user_id)}:{name}"
+    payload = await cache.aget(key)
+    if payload is not None:
+        _record("hits")
+        return payload
+    _record("misses")
+    payload = await build()
+    if payload is not None:
+        await cache.aset(key, payload, settings.TASK_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate(user_id):
+    _cache().set(_version_key(user_id), uuid4().hex, timeout=None)
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        for outcome in _stats:
+            _stats[outcome] = 0
@@ -0,0 +1,108 @@
+import hashlib
+import re
+
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from task_app import cache, versions
+
+# Conditional GETs on the task reads. ETags are "<version>.<digest>" for a
+# page of tasks and "<version>.<stamp>.<digest>" for a single task, where
+# version is the user's TaskChangeVersion, stamp the task's updated_at and
+# digest covers the URL and the media type. A request whose If-None-Match
+# (or, without one, If-Modified-Since) still holds for the current version is
+# answered 304 Not Modified without reading or serializing a single task.
+#
+# Cached payloads are stored with the version read before their tasks were,
+# so a payload is never older than the version its ETag names.
+
+
+def changes(user_id):
+    """The user's ``(version, changed_at)``, cached like the payloads."""
+    return cache.get_or_set(user_id, "changes", lambda: versions.current(user_id))
+
+
+async def achanges(user_id):
+    return await cache.aget_or_set(
+        user_id, "changes", lambda: versions.acurrent(user_id)
+    )
+
+
+def entry(version, changed_at, data):
+    """A cache entry for ``data`` read at ``version``."""
+    if data is None:
+        return None
+    return {"version": version, "changed_at": changed_at, "data": data}
+
+
+def stamp(payload):
+    """The per-task part of a task's ETag, its updated_at digits."""
+    return re.sub(r"\W", "", payload["updated_at"])
+
+
+def _digest(request):
+    media_type = getattr(request, "accepted_media_type", "application/json")
+    key = f"{request.get_host()}{request.get_full_path()};{media_type}"
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def etag(request, version, task_stamp=None):
+    parts = [str(version), _digest(request)]
+    if task_stamp is not None:
+        parts.insert(1, task_stamp)
+    return '"%s"' % ".".join(parts)
+
+
+def _client_etags(request):
+    """``(etag, version, stamp)`` of the If-None-Match ETags of this URL."""
+    digest = _digest(request)
+    for tag in parse_etags(request.headers["If-None-Match"]):
+        *parts, tag_digest = tag.strip('"').split(".")
+        if parts and tag_digest == digest:
+            yield tag, parts[0], parts[1] if len(parts) == 2 else None
+
+
+def not_modified(request, version, changed_at, task_stamp=None):
+    """The ETag to answer 304 Not Modified with, or None to send the data.
+
+    The client's copy is current if one of its If-None-Match ETags has the
+    current version or, given ``task_stamp``, the task's current stamp.
+    If-Modified-Since is only checked without If-None-Match.
+    """
+    current = etag(request, version, task_stamp)
+    if "If-None-Match" in request.headers:
+        for _, tag_version, tag_stamp in _client_etags(request):
+            if tag_version == str(version):
+                return current
+            if task_stamp is not None and tag_stamp == task_stamp:
+                return current
+        return None
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    if since is None or changed_at is None or int(changed_at.timestamp()) > since:
+        return None
+    return current
+
+
+def task_not_modified(request, version):
+    """not_modified() for a single task, before reading it.
+
+    Only If-None-Match is checked: the client's ETag for the current version
+    is the current one, stamp included.
+    """
+    if "If-None-Match" not in request.headers:
+        return None
+    for tag, tag_version, tag_stamp in _client_etags(request):
+        if tag_version == str(version) and tag_stamp is not None:
+            return tag
+    return None
+
+
+def add_validators(response, etag, changed_at):
+    response["ETag"] = etag
+    if changed_at is not None:
+        response["Last-Modified"] = http_date(changed_at.timestamp())
+    return response
+
+
+def not_modified_response(etag, changed_at):
+    return add_validators(HttpResponseNotModified(), etag, changed_at)
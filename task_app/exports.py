@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+from operator import itemgetter
+
+from task_app.serializers import TaskSerializer
+from task_app.utils import datetime_formatter, iterate_in_chunks
+
+# Same columns, in the same order, as the API's task payloads.
+EXPORT_FIELDS = TaskSerializer.Meta.fields
+
+
+def export_batches(queryset, chunk_size):
+    """Yield lists of ``EXPORT_FIELDS`` tuples without building model instances."""
+    rows = queryset.values_list(*EXPORT_FIELDS)
+    return iterate_in_chunks(rows, chunk_size, pk=itemgetter(0))
+
+
+def ndjson_lines(batches):
+    """Yield NDJSON text, one string per batch of export rows."""
+    format_datetime = datetime_formatter()
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for batch in batches:
+        yield "".join(
+            encode(
+                {
+                    "id": task_id,
+                    "title": title,
+                    "duration": duration,
+                    "created_at": format_datetime(created_at),
+                    "updated_at": format_datetime(updated_at),
+                }
+            )
+            + "\n"
+            for task_id, title, duration, created_at, updated_at in batch
+        )
+
+
+def csv_lines(batches):
+    """Yield CSV text with a header row, one string per batch of export rows."""
+    format_datetime = datetime_formatter()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for batch in batches:
+        writer.writerows(
+            (
+                task_id,
+                title,
+                duration,
+                format_datetime(created_at),
+                format_datetime(updated_at),
+            )
+            for task_id, title, duration, created_at, updated_at in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
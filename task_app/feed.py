@@ -0,0 +1,237 @@
+import asyncio
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from task_app import cache, routing
+from task_app.models import Task, TaskChangeEvent
+from task_app.renderers import FastJSONRenderer
+from task_app.serializers import TASK_FIELDS, task_payloads
+from task_app.utils import MAX_QUERY_PARAMS, chunked
+
+# The task change feed. Every write path appends a TaskChangeEvent for each
+# user whose tasks it changed, holding the action and the task ids. It does so
+# after versions.bump() in the same transaction: the bump locks the user's
+# version row until the commit, so a user's events get their ids in the order
+# they become visible, and a reader that has seen one event has seen all the
+# earlier ones.
+#
+# Clients follow the feed with a cursor, the id of the last event they have
+# seen. The id of the user's latest event is cached like the task reads and
+# dropped with them on every write, so checking a cursor for news costs a
+# cache read, and waiting for changes no query at all. Once there are newer
+# events, the client gets the delta: the current payloads of the tasks they
+# touched, and the ids of those no longer listed (deleted, archived or moved
+# to another user).
+
+# "<event id>.<issued at>": the user's last event the client has seen, and
+# when the cursor was handed out. Events are purged after
+# TASK_FEED_RETENTION_HOURS, so older cursors may have missed some.
+Cursor = namedtuple("Cursor", "event_id issued_at")
+
+# Leeway for events created just before the cursor naming them was issued.
+EXPIRY_MARGIN = 60
+
+
+def record(user_id, action, task_ids):
+    """Append an event for a change to the user's tasks.
+
+    Call it inside the transaction of the change, after versions.bump().
+    """
+    record_many(action, {user_id: task_ids})
+
+
+def record_many(action, task_ids_by_user):
+    """record() for the changes of several users, in one INSERT."""
+    TaskChangeEvent.objects.bulk_create(
+        (
+            TaskChangeEvent(user_id=user_id, action=action, task_ids=list(task_ids))
+            for user_id, task_ids in task_ids_by_user.items()
+        ),
+        # Four columns bound per inserted row.
+        batch_size=MAX_QUERY_PARAMS // 4,
+    )
+
+
+def issue(event_id):
+    return Cursor(event_id, int(time.time()))
+
+
+def format_cursor(cursor):
+    return "%d.%d" % cursor
+
+
+def parse_cursor(value):
+    """The Cursor in ``value``, or None if it is not one."""
+    try:
+        event_id, issued_at = (int(part) for part in value.split("."))
+    except ValueError:
+        return None
+    return Cursor(event_id, issued_at)
+
+
+def expired(cursor):
+    """Whether events after the cursor may have been purged already."""
+    retention = settings.TASK_FEED_RETENTION_HOURS * 3600
+    return cursor.issued_at < time.time() - retention + EXPIRY_MARGIN
+
+
+def _latest(user_id):
+    return (
+        TaskChangeEvent.objects.filter(user_id=user_id)
+        .order_by("-id")
+        .values_list("id", flat=True)
+    )
+
+
+def latest(user_id):
+    """The id of the user's latest event, 0 if there is none; cached."""
+    return cache.get_or_set(user_id, "feed", lambda: _latest(user_id).first() or 0)
+
+
+async def alatest(user_id):
+    async def build():
+        return await _latest(user_id).afirst() or 0
+
+    return await cache.aget_or_set(user_id, "feed", build)
+
+
+def read(user_id, cursor):
+    """``(cursor, changes)`` for the events after ``cursor``.
+
+    ``changes`` is None when there are none, and covers at most
+    TASK_FEED_MAX_EVENTS events; the returned cursor is at the last of them.
+    """
+    events = list(
+        TaskChangeEvent.objects.filter(user_id=user_id, id__gt=cursor.event_id)
+        .order_by("id")
+        .values_list("id", "task_ids")[: settings.TASK_FEED_MAX_EVENTS]
+    )
+    if not events:
+        return cursor, None
+    # Each task once, however many of the events touched it.
+    task_ids = list(dict.fromkeys(task_id for _, ids in events for task_id in ids))
+    tasks = []
+    for chunk in chunked(task_ids, MAX_QUERY_PARAMS - 100):
+        tasks.extend(
+            Task.objects.filter(user_id=user_id, id__in=chunk).values(*TASK_FIELDS)
+        )
+    listed = {task["id"] for task in tasks}
+    tasks.sort(key=lambda task: task["id"], reverse=True)
+    changes = {
+        "changed": task_payloads(tasks),
+        "removed": [task_id for task_id in task_ids if task_id not in listed],
+    }
+    return issue(events[-1][0]), changes
+
+
+def poll(user_id, cursor):
+    """read() once the cached latest event is past ``cursor``."""
+    # The latest event is cached from whatever the user's reads go to; a
+    # lagging replica must not hide the change that just dropped the cache.
+    routing.read_primary_if_pinned(user_id)
+    if latest(user_id) <= cursor.event_id:
+        return cursor, None
+    return read(user_id, cursor)
+
+
+async def apoll(user_id, cursor):
+    await routing.aread_primary_if_pinned(user_id)
+    if await alatest(user_id) <= cursor.event_id:
+        return cursor, None
+    return await sync_to_async(read)(user_id, cursor)
+
+
+def start(user_id):
+    """A cursor at the user's latest event."""
+    return issue(latest(user_id))
+
+
+async def astart(user_id):
+    return issue(await alatest(user_id))
+
+
+def response_data(cursor, changes):
+    return {
+        "cursor": format_cursor(cursor),
+        **(changes or {"changed": [], "removed": []}),
+    }
+
+
+def _interval(deadline):
+    return min(settings.TASK_FEED_POLL_INTERVAL, max(deadline - time.monotonic(), 0))
+
+
+def check(user_id, cursor):
+    """poll() once; without changes, the cursor is issued anew."""
+    new_cursor, changes = poll(user_id, cursor)
+    if changes is None:
+        return issue(cursor.event_id), None
+    return new_cursor, changes
+
+
+async def await_changes(user_id, cursor, timeout):
+    """apoll() every TASK_FEED_POLL_INTERVAL seconds until there are changes
+    or ``timeout`` seconds have passed.
+
+    Returns ``(cursor, changes)``; on timeout, the cursor is issued anew.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        new_cursor, changes = await apoll(user_id, cursor)
+        if changes is not None:
+            return new_cursor, changes
+        if time.monotonic() >= deadline:
+            return issue(cursor.event_id), None
+        await asyncio.sleep(_interval(deadline))
+
+
+def event(cursor, changes=None):
+    """A server-sent event with the cursor as its id, and the changes if any.
+
+    Without changes there is no data, so the client only updates its last
+    event id, sent back as Last-Event-ID when it reconnects.
+    """
+    lines = [b"id: " + format_cursor(cursor).encode()]
+    if changes is not None:
+        lines.append(b"event: changes")
+        lines.append(b"data: " + FastJSONRenderer().render(changes))
+    return b"\n".join(lines) + b"\n\n"
+
+
+class Stream:
+    """The state of a server-sent event stream of the user's changes.
+
+    Streams end after TASK_FEED_STREAM_SECONDS, for the client to reconnect
+    from its last event, and renew the cursor every
+    TASK_FEED_HEARTBEAT_SECONDS while nothing changes, which keeps idle
+    connections from timing out.
+    """
+
+    def __init__(self, user_id, cursor):
+        self.user_id = user_id
+        self.cursor = cursor
+        now = time.monotonic()
+        self.deadline = now + settings.TASK_FEED_STREAM_SECONDS
+        self.sent_at = now
+
+    def send(self, cursor, changes=None):
+        self.cursor, self.sent_at = cursor, time.monotonic()
+        return event(cursor, changes)
+
+    def heartbeat_due(self):
+        return time.monotonic() - self.sent_at >= settings.TASK_FEED_HEARTBEAT_SECONDS
+
+    async def aevents(self):
+        yield event(self.cursor)
+        while time.monotonic() < self.deadline:
+            cursor, changes = await apoll(self.user_id, self.cursor)
+            if changes is not None:
+                yield self.send(cursor, changes)
+                # More events may be waiting past TASK_FEED_MAX_EVENTS.
+                continue
+            if self.heartbeat_due():
+                yield self.send(issue(self.cursor.event_id))
+            await asyncio.sleep(_interval(self.deadline))
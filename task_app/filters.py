@@ -0,0 +1,60 @@
+from rest_framework import serializers
+
+from task_app import search
+
+
+class TaskFilterSerializer(serializers.Serializer):
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+    min_duration = serializers.IntegerField(required=False)
+    max_duration = serializers.IntegerField(required=False)
+
+
+FILTER_LOOKUPS = {
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lt",
+    "updated_after": "updated_at__gte",
+    "updated_before": "updated_at__lt",
+    "min_duration": "duration__gte",
+    "max_duration": "duration__lte",
+}
+
+
+def filter_tasks(queryset, query_params):
+    serializer = TaskFilterSerializer(data=query_params)
+    serializer.is_valid(raise_exception=True)
+    lookups = {
+        FILTER_LOOKUPS[name]: value for name, value in serializer.validated_data.items()
+    }
+    return queryset.filter(**lookups)
+
+
+class TaskSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=255)
+
+
+def search_tasks(queryset, query_params, user_id):
+    """Narrow ``queryset`` to the user's tasks whose title matches ``?q=``."""
+    serializer = TaskSearchSerializer(data=query_params)
+    serializer.is_valid(raise_exception=True)
+    ids = search.matching_task_ids(serializer.validated_data["q"], user_id)
+    if ids is None:
+        return queryset.none()
+    return queryset.filter(id__in=ids)
+
+
+class SummaryFilterSerializer(serializers.Serializer):
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+
+
+def filter_summaries(queryset, query_params):
+    serializer = SummaryFilterSerializer(data=query_params)
+    serializer.is_valid(raise_exception=True)
+    if "since" in serializer.validated_data:
+        queryset = queryset.filter(day__gte=serializer.validated_data["since"])
+    if "until" in serializer.validated_data:
+        queryset = queryset.filter(day__lte=serializer.validated_data["until"])
+    return queryset
@@ -0,0 +1,260 @@
+import logging
+import math
+import re
+from functools import reduce
+from operator import or_
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import InterfaceError, OperationalError, transaction
+from django.db.models import Q
+from kombu import Queue, pools
+
+from selteq_task.celery import app
+from task_app import feed, search, summaries, versions
+from task_app.models import Task, TaskIngestKey
+from task_app.signals import tasks_changed
+from task_app.utils import MAX_QUERY_PARAMS
+
+# Buffered task creation. With TASK_INGEST_BUFFERED, the create endpoints
+# validate the task, put it on the TASK_INGEST_QUEUE queue of the broker
+# (Redis, or memory:// in tests) under a key, and answer 202 Accepted without
+# touching the database. flush_task_buffer then writes the queue in batches of
+# up to TASK_INGEST_BATCH_SIZE tasks: one bulk_create, with the summary, index,
+# change version and change feed upkeep of the whole batch, per transaction.
+# The first task queued schedules a flush TASK_INGEST_FLUSH_SECONDS later, so
+# no task waits much longer than that, however few follow it.
+#
+# Delivery is at least once: messages are acknowledged only after their batch
+# commits, and go back to the queue if the database could not be reached, for
+# flush_task_buffer to retry.
+# Every task is written with a TaskIngestKey row, unique per user, so a task
+# delivered or submitted twice under the same key is created once. A batch
+# failing otherwise is written again one task at a time; tasks that still fail
+# are moved to TASK_INGEST_DEAD_LETTER_QUEUE, and their keys report "failed",
+# rather than failing every flush after them.
+
+logger = logging.getLogger(__name__)
+
+# Client keys go in URLs, so they are kept to URL-safe characters.
+KEY_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Pending marker value of a task moved to the dead letter queue.
+FAILED = "failed"
+
+# Errors a later attempt may not run into: the batch goes back to the queue.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+def _cache():
+    return caches[settings.TASK_CACHE_ALIAS]
+
+
+def _pending_key(user_id, key):
+    return f"ingest:pending:{user_id}:{key}"
+
+
+def _connection():
+    return pools.connections[
+        app.connection_for_write(settings.TASK_INGEST_BROKER_URL)
+    ].acquire(block=True)
+
+
+def new_key():
+    return uuid4().hex
+
+
+def submit(user_id, key, data):
+    """Queue a task with the validated ``data`` under ``key``.
+
+    Returns False, queueing nothing, if the user submitted the key within
+    TASK_INGEST_KEY_RETENTION_HOURS already.
+    """
+    retention = settings.TASK_INGEST_KEY_RETENTION_HOURS * 3600
+    if not _cache().add(_pending_key(user_id, key), True, retention):
+        return False
+    body = {"user_id": user_id, "key": key, "task": dict(data)}
+    try:
+        with _connection() as connection:
+            producer = connection.Producer(serializer="json")
+            producer.publish(
+                body,
+                routing_key=settings.TASK_INGEST_QUEUE,
+                declare=[Queue(settings.TASK_INGEST_QUEUE)],
+                retry=True,
+            )
+    except Exception:
+        # So that the client can submit it again.
+        _cache().delete(_pending_key(user_id, key))
+        raise
+    schedule_flush()
+    return True
+
+
+def schedule_flush():
+    """Have flush_task_buffer run in TASK_INGEST_FLUSH_SECONDS, unless a run
+    is already due by then."""
+    from task_app.tasks import flush_task_buffer
+
+    countdown = settings.TASK_INGEST_FLUSH_SECONDS
+    # Redis expiries are whole seconds.
+    if _cache().add("ingest:flush-scheduled", True, math.ceil(countdown)):
+        flush_task_buffer.apply_async(countdown=countdown)
+
+
+def status(user_id, key):
+    """``(status, task_id)`` of a submitted task: ``("created", id)``,
+    ``("pending", None)`` or ``("failed", None)``. None for keys the user never
+    submitted."""
+    task_id = (
+        TaskIngestKey.objects.filter(user_id=user_id, key=key)
+        .values_list("task_id", flat=True)
+        .first()
+    )
+    if task_id is not None:
+        return "created", task_id
+    marker = _cache().get(_pending_key(user_id, key))
+    if marker == FAILED:
+        return FAILED, None
+    if marker:
+        return "pending", None
+    return None
+
+
+def flush(max_batches):
+    """Write up to ``max_batches`` batches of queued tasks.
+
+    Returns ``(created, more)``: the number of tasks created, and whether
+    tasks were left in the queue.
+    """
+    batch_size = settings.TASK_INGEST_BATCH_SIZE
+    created = 0
+    with _connection() as connection:
+        queue = Queue(settings.TASK_INGEST_QUEUE)(connection.default_channel)
+        queue.declare()
+        for _ in range(max_batches):
+            messages = []
+            while len(messages) < batch_size:
+                message = queue.get(no_ack=False)
+                if message is None:
+                    break
+                messages.append(message)
+            if not messages:
+                return created, False
+            created += _write_messages(connection, messages)
+            if len(messages) < batch_size:
+                return created, False
+    return created, True
+
+
+def _write_messages(connection, messages):
+    """write() the tasks of ``messages`` and acknowledge them."""
+    try:
+        created = write([message.payload for message in messages])
+    except TRANSIENT_ERRORS:
+        for message in messages:
+            message.requeue()
+        raise
+    except Exception:
+        if len(messages) == 1:
+            _dead_letter(connection, messages[0])
+            return 0
+        logger.exception(
+            "Writing %d buffered tasks failed, writing them one at a time.",
+            len(messages),
+        )
+        created = 0
+        for i, message in enumerate(messages):
+            try:
+                created += _write_messages(connection, [message])
+            except TRANSIENT_ERRORS:
+                for message in messages[i + 1 :]:
+                    message.requeue()
+                raise
+        return created
+    for message in messages:
+        message.ack()
+    return created
+
+
+def _dead_letter(connection, message):
+    """Move a task that cannot be written to the dead letter queue."""
+    body = message.payload
+    logger.exception(
+        "Buffered task %r of user %s cannot be written, moving it to %s.",
+        body["key"],
+        body["user_id"],
+        settings.TASK_INGEST_DEAD_LETTER_QUEUE,
+    )
+    connection.Producer(serializer="json").publish(
+        body,
+        routing_key=settings.TASK_INGEST_DEAD_LETTER_QUEUE,
+        declare=[Queue(settings.TASK_INGEST_DEAD_LETTER_QUEUE)],
+        retry=True,
+    )
+    message.ack()
+    retention = settings.TASK_INGEST_KEY_RETENTION_HOURS * 3600
+    _cache().set(_pending_key(body["user_id"], body["key"]), FAILED, retention)
+
+
+def write(items):
+    """Create the tasks of queued ``items`` not created yet; returns how many
+    were."""
+    # The last of each key, should a batch hold one twice.
+    items = {(item["user_id"], item["key"]): item for item in items}
+    by_user = {}
+    for user_id, key in items:
+        by_user.setdefault(user_id, []).append(key)
+    with transaction.atomic():
+        # By user and keys, along the (user, key) index. One parameter per
+        # user and per key, fewer than MAX_QUERY_PARAMS for any batch size up
+        # to half of it.
+        done = TaskIngestKey.objects.filter(
+            reduce(
+                or_,
+                (Q(user_id=user_id, key__in=keys) for user_id, keys in by_user.items()),
+            )
+        ).values_list("user_id", "key")
+        for done_key in done:
+            items.pop(done_key, None)
+        if not items:
+            return 0
+        tasks = Task.objects.bulk_create_with_ids(
+            [
+                Task(user_id=user_id, **item["task"])
+                for (user_id, _), item in items.items()
+            ]
+        )
+        TaskIngestKey.objects.bulk_create(
+            (
+                TaskIngestKey(user_id=user_id, key=key, task_id=task.id)
+                for (user_id, key), task in zip(items, tasks)
+            ),
+            # Four columns bound per inserted row.
+            batch_size=MAX_QUERY_PARAMS // 4,
+        )
+        created = {}
+        for task in tasks:
+            created.setdefault(task.user_id, []).append(task)
+        for user_id, user_tasks in created.items():
+            summaries.add_tasks(
+                user_id, [(task.created_at, task.duration) for task in user_tasks]
+            )
+            search.index_tasks(user_id, [(task.id, task.title) for task in user_tasks])
+        versions.bump(*created)
+        feed.record_many(
+            "created",
+            {
+                user_id: [task.id for task in user_tasks]
+                for user_id, user_tasks in created.items()
+            },
+        )
+    for user_id, user_tasks in created.items():
+        tasks_changed.send(
+            sender=Task,
+            user_id=user_id,
+            action="created",
+            task_ids=[task.id for task in user_tasks],
+        )
+    return len(tasks)
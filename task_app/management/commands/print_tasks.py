@@ -1,22 +1,113 @@
+import argparse
 import time
 
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
+from task_app import routing
+from task_app.exports import csv_lines, export_batches, ndjson_lines
 from task_app.models import Task
+from task_app.utils import non_negative_float, positive_int, timestamp_formatter
+
+
+def aware_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"Invalid datetime: {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def row_formatter():
+    """Return a function rendering an export row as the command's text line."""
+    format_timestamp = timestamp_formatter()
+
+    def format_row(row):
+        _, title, duration, created_at, _ = row
+        return (
+            f"Task title: {title}, Duration: {duration}, "
+            f"Created At: {format_timestamp(created_at)}"
+        )
+
+    return format_row
+
+
+def text_lines(batches):
+    """Yield the command's text output, one string per batch of export rows."""
+    format_row = row_formatter()
+    for batch in batches:
+        yield "".join(format_row(row) + "\n" for row in batch)
 
 
 class Command(BaseCommand):
-    help = "Prints all tasks one by one every 10 seconds"
+    help = (
+        "Prints tasks one by one every --interval seconds, or all at once in "
+        "batches when --format is given"
+    )
+    formats = {"text": text_lines, "ndjson": ndjson_lines, "csv": csv_lines}
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only print this user's tasks")
+        parser.add_argument(
+            "--since",
+            type=aware_datetime,
+            help="Only print tasks created at or after this ISO 8601 datetime",
+        )
+        parser.add_argument(
+            "--resume-from-id",
+            type=int,
+            help="Only print tasks with a higher id, e.g. the last id printed",
+        )
+        parser.add_argument("--batch-size", type=positive_int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=non_negative_float,
+            default=10,
+            help="Seconds to wait after each task when printing one by one",
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(self.formats),
+            help="Print all tasks in batches in this format, without waiting",
+        )
 
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
         tasks = Task.objects.all()
-        if not tasks:
+        if options["resume_from_id"] is not None:
+            tasks = tasks.filter(id__gt=options["resume_from_id"])
+        if options["user"] is not None:
+            tasks = tasks.filter(user_id=options["user"])
+        if options["since"] is not None:
+            tasks = tasks.filter(created_at__gte=options["since"])
+        batches = export_batches(tasks, options["batch_size"])
+
+        # A read-only scan of the whole table, best kept off the primary.
+        with routing.replica_reads():
+            if options["format"]:
+                printed = False
+                for text in self.formats[options["format"]](batches):
+                    self.stdout.write(text, ending="")
+                    printed = True
+            else:
+                printed = self.print_slowly(batches, options["interval"])
+        if not printed:
             self.stdout.write("No tasks found in the database.")
-            return
-
-        for task in tasks:
-            created_at = task.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            self.stdout.write(
-                f"Task title: {task.title}, Duration: {task.duration}, Created At: {created_at}"
-            )
-            time.sleep(10)
+
+    def print_slowly(self, batches, interval):
+        format_row = row_formatter()
+        last_id = None
+        try:
+            for batch in batches:
+                for row in batch:
+                    self.stdout.write(format_row(row))
+                    last_id = row[0]
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            if last_id is not None:
+                self.stderr.write(
+                    f"Interrupted, resume with --resume-from-id {last_id}"
+                )
+            raise
+        return last_id is not None
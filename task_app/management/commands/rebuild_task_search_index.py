@@ -0,0 +1,55 @@
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from task_app import search
+from task_app.models import Task, TaskTitleToken
+from task_app.utils import iterate_in_chunks, positive_int
+
+
+class Command(BaseCommand):
+    help = "Recomputes the title search index from the task table, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only reindex this user's tasks")
+        parser.add_argument(
+            "--batch-size",
+            type=positive_int,
+            default=1000,
+            help="Tasks reindexed per transaction",
+        )
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.all()
+        entries = TaskTitleToken.objects.all()
+        if options["user"] is not None:
+            tasks = tasks.filter(user_id=options["user"])
+            entries = entries.filter(user_id=options["user"])
+        rows = tasks.values_list("id", "user_id", "title")
+        reindexed = 0
+        for chunk in iterate_in_chunks(rows, options["batch_size"], pk=itemgetter(0)):
+            with transaction.atomic():
+                search.unindex_tasks([task_id for task_id, _, _ in chunk])
+                by_user = {}
+                for task_id, user_id, title in chunk:
+                    by_user.setdefault(user_id, []).append((task_id, title))
+                for user_id, user_tasks in by_user.items():
+                    search.index_tasks(user_id, user_tasks)
+            reindexed += len(chunk)
+        # Entries of tasks deleted around the write paths, removed in id
+        # ranges of up to --batch-size of them, so that no single DELETE holds
+        # its locks for long.
+        entries = entries.filter(~Exists(tasks.filter(id=OuterRef("task_id"))))
+        stale = 0
+        for chunk in iterate_in_chunks(
+            entries.values_list("id", flat=True),
+            options["batch_size"],
+            pk=lambda pk: pk,
+        ):
+            deleted, _ = entries.filter(id__range=(chunk[0], chunk[-1])).delete()
+            stale += deleted
+        self.stdout.write(
+            f"Reindexed {reindexed} tasks, removed {stale} stale index entries."
+        )
@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from task_app import cache
+from task_app.models import Task, TaskArchive, TaskDailySummary
+from task_app.utils import MAX_QUERY_PARAMS, iterate_in_chunks, positive_int
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-day task summaries from the task table and the "
+        "archive, a batch of users at a time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only rebuild this user")
+        parser.add_argument(
+            "--batch-size",
+            type=positive_int,
+            default=500,
+            help="Users whose summaries are rebuilt per transaction",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.values_list("pk", flat=True)
+        if options["user"] is not None:
+            users = users.filter(pk=options["user"])
+        # The user ids go into an IN (...) list.
+        batch_size = min(options["batch_size"], MAX_QUERY_PARAMS - 100)
+        rebuilt = 0
+        for user_ids in iterate_in_chunks(users, batch_size, pk=lambda pk: pk):
+            rebuilt += self.rebuild(user_ids)
+        self.stdout.write(f"Rebuilt {rebuilt} daily summaries.")
+
+    # Recounts of a batch before giving up on it.
+    attempts = 3
+
+    def rebuild(self, user_ids):
+        for attempt in range(1, self.attempts + 1):
+            try:
+                rebuilt = self.recount(user_ids)
+                break
+            except IntegrityError:
+                # A writer created a (user, day) row between the DELETE and
+                # the INSERT below; its task is committed, so count again.
+                if attempt == self.attempts:
+                    raise
+        # Cached /tasks/stats/ payloads were built from the old rows.
+        for user_id in user_ids:
+            cache.invalidate(user_id)
+        return rebuilt
+
+    def recount(self, user_ids):
+        with transaction.atomic():
+            # Deleting first makes concurrent writers to the existing rows wait
+            # until the recount below is committed. Writers to days without a
+            # row insert one instead, and the INSERT below fails on it.
+            TaskDailySummary.objects.filter(user_id__in=user_ids).delete()
+            # Archived tasks still count towards their day.
+            days = {}
+            for model in (Task, TaskArchive):
+                rows = (
+                    model.objects.filter(user_id__in=user_ids)
+                    .annotate(day=TruncDate("created_at"))
+                    .values_list("user_id", "day")
+                    .annotate(Count("id"), Sum("duration"))
+                    .order_by()
+                )
+                for user_id, day, task_count, total_duration in rows:
+                    counts = days.setdefault((user_id, day), [0, 0])
+                    counts[0] += task_count
+                    counts[1] += total_duration
+            summaries = TaskDailySummary.objects.bulk_create(
+                (
+                    TaskDailySummary(
+                        user_id=user_id,
+                        day=day,
+                        task_count=task_count,
+                        total_duration=total_duration,
+                    )
+                    for (user_id, day), (task_count, total_duration) in days.items()
+                ),
+                # Four columns bound per inserted row.
+                batch_size=MAX_QUERY_PARAMS // 4,
+            )
+        return len(summaries)
@@ -0,0 +1,287 @@
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from task_app import cache, scheduling
+
+# In-process request metrics in the Prometheus text format. Every worker
+# process keeps its own registry, so /metrics reports the process that
+# answered the scrape, as with prometheus_client's default registry.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# Counted by the workers in the shared cache, so every process reports them.
+SINGLE_FLIGHT_TASKS = (
+    "task_app.tasks.print_task_details",
+    "task_app.tasks.flush_task_buffer",
+)
+
+_current = ContextVar("request_timings", default=None)
+_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+_response_size = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+_requests = defaultdict(int)
+_queries = defaultdict(int)
+_query_seconds = defaultdict(float)
+_serialize_seconds = defaultdict(float)
+
+
+class RequestTimings:
+    """Database and serialization time spent by one sampled request."""
+
+    __slots__ = ("queries", "db", "serialize")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+def record_serialization(seconds):
+    """Add serializer time to the current request, if it is being sampled."""
+    timings = _current.get()
+    if timings is not None:
+        timings.serialize += seconds
+
+
+def record(view, method, status, seconds, timings, size=None):
+    with _lock:
+        _latency[view, method].observe(seconds)
+        _requests[view, method, status] += 1
+        _queries[(view,)] += timings.queries
+        _query_seconds[(view,)] += timings.db
+        _serialize_seconds[(view,)] += timings.serialize
+        if size is not None:
+            _response_size[(view,)].observe(size)
+
+
+def reset():
+    with _lock:
+        for registry in (
+            _latency,
+            _response_size,
+            _requests,
+            _queries,
+            _query_seconds,
+            _serialize_seconds,
+        ):
+            registry.clear()
+
+
+def _wrap_connections(wrapper):
+    # What connection.execute_wrapper() does, minus a context manager per
+    # connection on every request.
+    wrapped = connections.all()
+    for connection in wrapped:
+        connection.execute_wrappers.append(wrapper)
+    return wrapped
+
+
+def _unwrap_connections(wrapped, wrapper):
+    for connection in wrapped:
+        connection.execute_wrappers.remove(wrapper)
+
+
+class MetricsMiddleware:
+    """Time a METRICS_SAMPLE_RATE share of requests and report them.
+
+    Sampled requests get a Server-Timing header (total, database and
+    serializer time) and are added to the /metrics registry. With
+    METRICS_ENABLED off the middleware removes itself from the stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_SAMPLE_RATE
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        wrapped = _wrap_connections(timings.record_query)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - start
+            _unwrap_connections(wrapped, timings.record_query)
+            _current.reset(token)
+        return self.report(request, response, elapsed, timings)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        # The connections of the thread sync_to_async runs the ORM in, not
+        # those of the event loop's.
+        wrapped = await sync_to_async(_wrap_connections)(timings.record_query)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - start
+            await sync_to_async(_unwrap_connections)(wrapped, timings.record_query)
+            _current.reset(token)
+        return self.report(request, response, elapsed, timings)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def report(self, request, response, elapsed, timings):
+        match = request.resolver_match
+        size = None if response.streaming else len(response.content)
+        record(
+            match.view_name if match else "unmatched",
+            request.method,
+            response.status_code,
+            elapsed,
+            timings,
+            size,
+        )
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = (
+                f"app;dur={elapsed * 1000:.2f}, "
+                f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries", '
+                f"serialize;dur={timings.serialize * 1000:.2f}"
+            )
+        return response
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def _histogram(lines, name, help_text, histograms, label_names):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        labels = _labels(**dict(zip(label_names, key)))
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+def _counter(lines, name, help_text, values, label_names):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for key, value in sorted(values.items()):
+        lines.append(f"{name}{{{_labels(**dict(zip(label_names, key)))}}} {value}")
+
+
+def render():
+    """The registry in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    with _lock:
+        _histogram(
+            lines,
+            "http_request_duration_seconds",
+            "Time spent handling requests, by view.",
+            _latency,
+            ("view", "method"),
+        )
+        _counter(
+            lines,
+            "http_requests_total",
+            "Sampled requests, by view and status.",
+            _requests,
+            ("view", "method", "status"),
+        )
+        _histogram(
+            lines,
+            "http_response_size_bytes",
+            "Size of non-streaming response bodies, by view.",
+            _response_size,
+            ("view",),
+        )
+        _counter(
+            lines, "db_queries_total", "SQL queries, by view.", _queries, ("view",)
+        )
+        _counter(
+            lines,
+            "db_query_duration_seconds_total",
+            "Time spent in SQL queries, by view.",
+            _query_seconds,
+            ("view",),
+        )
+        _counter(
+            lines,
+            "serialization_duration_seconds_total",
+            "Time spent serializing tasks, by view.",
+            _serialize_seconds,
+            ("view",),
+        )
+    stats = cache.stats()
+    _counter(
+        lines,
+        "task_cache_requests_total",
+        "Task read cache lookups, by outcome.",
+        {("hit",): stats["hits"], ("miss",): stats["misses"]},
+        ("outcome",),
+    )
+    _counter(
+        lines,
+        "celery_task_runs_total",
+        "Runs of single-flight Celery tasks, by outcome.",
+        scheduling.run_counts(SINGLE_FLIGHT_TASKS),
+        ("task", "outcome"),
+    )
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED or not settings.METRICS_TOKEN:
+        raise Http404
+    if not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        response = HttpResponse(status=401)
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.17 on 2026-10-18 20:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('task_app', '0003_task_report_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('task_count', models.IntegerField(default=0)),
+                ('total_duration', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskdailysummary',
+            constraint=models.UniqueConstraint(fields=('user', 'day'), name='task_summary_user_day_uniq'),
+        ),
+    ]
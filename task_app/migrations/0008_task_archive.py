@@ -0,0 +1,37 @@
+# Generated by Django 4.2.17 on 2026-10-18 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def compress_archive(apps, schema_editor):
+    # Archived rows are written once and rarely read back: on SQL Server,
+    # page compression makes the table a fraction of its size.
+    if schema_editor.connection.vendor == "microsoft":
+        schema_editor.execute(
+            "ALTER TABLE task_app_taskarchive REBUILD WITH (DATA_COMPRESSION = PAGE)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('task_app', '0007_task_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('duration', models.IntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(compress_archive, migrations.RunPython.noop),
+    ]
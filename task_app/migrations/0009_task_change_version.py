@@ -0,0 +1,41 @@
+# Generated by Django 4.2.17 on 2026-10-19 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def create_versions(apps, schema_editor):
+    # New users get their row when they are created; existing ones here, so
+    # that the write paths only ever UPDATE it.
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    TaskChangeVersion = apps.get_model("task_app", "TaskChangeVersion")
+    now = timezone.now()
+    TaskChangeVersion.objects.bulk_create(
+        (
+            TaskChangeVersion(user_id=user_id, changed_at=now)
+            for user_id in User.objects.values_list("pk", flat=True).iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('task_app', '0008_task_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChangeVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.BigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
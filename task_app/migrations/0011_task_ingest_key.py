@@ -0,0 +1,33 @@
+# Generated by Django 4.2.17 on 2026-10-19 11:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('task_app', '0010_task_change_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskIngestKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('task', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='task_app.task')),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='task_ingest_created_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskingestkey',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='task_ingest_user_key_uniq'),
+        ),
+    ]
@@ -1,13 +1,230 @@
+from collections import defaultdict, deque
+
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from task_app.utils import MAX_QUERY_PARAMS
+
+
+class TaskQuerySet(models.QuerySet):
+    def soft_delete(self):
+        """Mark the tasks deleted; purge_deleted_tasks removes the rows later."""
+        return self.update(deleted_at=timezone.now())
+
+    def bulk_create_with_ids(self, tasks):
+        """bulk_create() the tasks, making sure they get their ids.
+
+        Backends that cannot return rows from a multi-row INSERT (SQL Server
+        without the return_rows_bulk_insert option) leave the ids unset. They
+        are read back then, matching each row on its user and on the
+        created_at the insert gave it, so that tasks other requests created
+        meanwhile are told apart.
+        """
+        # One parameter per inserted column; the primary key is generated.
+        batch_size = MAX_QUERY_PARAMS // (len(Task._meta.concrete_fields) - 1)
+        tasks = self.bulk_create(tasks, batch_size=batch_size)
+        if not tasks or tasks[0].id is not None:
+            return tasks
+        # bulk_create() bound the queryset to the database it wrote to.
+        rows = (
+            self.filter(
+                user_id__in={task.user_id for task in tasks},
+                created_at__range=(
+                    min(task.created_at for task in tasks),
+                    max(task.created_at for task in tasks),
+                ),
+            )
+            .order_by("id")
+            .values_list("user_id", "created_at", "id")
+        )
+        ids = defaultdict(deque)
+        for user_id, created_at, task_id in rows:
+            ids[user_id, created_at].append(task_id)
+        for task in tasks:
+            task.id = ids[task.user_id, task.created_at].popleft()
+        return tasks
+
+
+class LiveTaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 
 class Task(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Deleting a user leaves their tasks behind for purge_deleted_tasks,
+    # rather than collecting and deleting every one of them in the request.
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False)
     title = models.CharField(max_length=255)
     duration = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Tasks that are not soft-deleted.
+    objects = LiveTaskManager()
+    # Soft-deleted tasks as well, for purging them.
+    all_objects = models.Manager.from_queryset(TaskQuerySet)()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-id"], name="task_user_id_desc_idx"),
+            models.Index(fields=["user", "created_at"], name="task_user_created_idx"),
+            models.Index(
+                fields=["user", "updated_at", "id"], name="task_user_updated_idx"
+            ),
+            # The admin's date hierarchy, across all users.
+            models.Index(fields=["created_at"], name="task_created_idx"),
+            # Only the soft-deleted rows waiting for purge_deleted_tasks.
+            models.Index(
+                fields=["deleted_at"],
+                name="task_deleted_idx",
+                condition=Q(deleted_at__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class TaskReportCursor(models.Model):
+    """Last (updated_at, id) position print_task_details reported for a user."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    updated_at = models.DateTimeField()
+    task_id = models.BigIntegerField()
+
+
+class TaskChangeVersion(models.Model):
+    """Counter of the changes made to a user's tasks.
+
+    Created with the user, and bumped by every task write path through
+    task_app.versions in the same transaction as the change. The task reads
+    use it, and the time of the last change, as their ETag and Last-Modified
+    validators.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField()
+
+
+class TaskChangeEvent(models.Model):
+    """One write to a user's tasks, as followed through the change feed.
+
+    Appended by the task write paths through task_app.feed, right after the
+    TaskChangeVersion bump in the same transaction, and removed after
+    TASK_FEED_RETENTION_HOURS by purge_task_events. Only the ids of the tasks
+    are kept: the feed reads their current rows when it sends the change.
+    """
+
+    # Expired with the rest of the events rather than with the user.
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    action = models.CharField(max_length=16)
+    task_ids = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="task_event_user_idx"),
+            models.Index(fields=["created_at"], name="task_event_created_idx"),
+        ]
+
+
+class TaskIngestKey(models.Model):
+    """The key a buffered task was submitted under, and the task it became.
+
+    Written with the task by flush_task_buffer (see task_app.ingest), so a
+    task delivered or submitted twice under the same key is created once.
+    Removed after TASK_INGEST_KEY_RETENTION_HOURS by purge_task_events.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    key = models.CharField(max_length=64)
+    task = models.ForeignKey(
+        Task, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="task_ingest_user_key_uniq"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["created_at"], name="task_ingest_created_idx"),
+        ]
+
+
+class TaskDailySummary(models.Model):
+    """Number and total duration of a user's tasks created on one day.
+
+    Kept up to date by the task write paths through task_app.summaries, and
+    rebuilt from the task table by the rebuild_task_summaries command.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    day = models.DateField()
+    task_count = models.IntegerField(default=0)
+    total_duration = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "day"], name="task_summary_user_day_uniq"
+            )
+        ]
+
+    @property
+    def average_duration(self):
+        if not self.task_count:
+            return None
+        return self.total_duration / self.task_count
+
+
+class TaskTitleToken(models.Model):
+    """One word of a task title, the inverted index behind title search.
+
+    Maintained by the task write paths through task_app.search. The task
+    relation has no database constraint or cascade, so that deleting tasks
+    stays a single DELETE; the index entries are removed alongside.
+    """
+
+    # Like the tasks, the entries of deleted users are left to
+    # purge_deleted_tasks.
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False)
+    task = models.ForeignKey(
+        Task, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "token", "task"], name="task_token_user_idx"),
+            # Searches across all users (the admin).
+            models.Index(fields=["token", "task"], name="task_token_idx"),
+        ]
+
+
+class TaskArchive(models.Model):
+    """A task moved out of task_app_task by archive_old_tasks.
+
+    Same id and columns as the task. Archived tasks are only read back one at
+    a time by primary key, or per user by summary rebuilds and purges, so the
+    listing indexes of Task are left out.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    title = models.CharField(max_length=255)
+    duration = models.IntegerField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
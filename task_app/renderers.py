@@ -0,0 +1,65 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding with orjson when it is installed.
+
+    The output is byte for byte what JSONRenderer produces with DRF's default
+    settings: compact, UTF-8, with U+2028/U+2029 escaped. Dates and times
+    still go through DRF's encoder, as orjson formats them differently, and
+    anything orjson refuses (non-string keys, integers beyond 64 bits) is
+    rendered by JSONRenderer. Indented output, as asked for by the browsable
+    API, and non-default UNICODE_JSON/COMPACT_JSON/STRICT_JSON settings are
+    left to JSONRenderer as well. The one visible difference is the spelling
+    of floats in exponent notation (1e16 rather than 1e+16), which parses to
+    the same number; task payloads carry no floats.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as JSONRenderer, for embedding in JavaScript.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    # Export bodies are streamed by the view; this renders error payloads.
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class CSVRenderer(FastJSONRenderer):
+    # Export bodies are streamed by the view. Error payloads stay JSON, as a
+    # CSV body could not carry a validation error message.
+    media_type = "text/csv"
+    format = "csv"
+
+
+class EventStreamRenderer(FastJSONRenderer):
+    # Event streams are written by the change feed view; this renders error
+    # payloads.
+    media_type = "text/event-stream"
+    format = "sse"
@@ -0,0 +1,185 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Primary/replica routing. Writes always go to the primary. Reads made while
+# handling a request go to one of settings.DATABASE_REPLICAS, unless:
+# - they run inside a transaction, which must see its own writes,
+# - the request has already written something,
+# - or the user has written something in the last DB_PRIMARY_STICKY_SECONDS
+#   (read-your-writes across requests, whatever the replication lag).
+# Outside requests (Celery tasks, management commands) reads go to the
+# primary, unless the code opts in with replica_reads(): jobs that read and
+# then write what they read must not work from a lagging copy.
+
+PRIMARY = "default"
+# Sessions are read before the user is known, and must not lag their login.
+PRIMARY_APPS = {"sessions"}
+
+_request = ContextVar("db_routing_request", default=None)
+_replica_reads = ContextVar("db_replica_reads", default=False)
+
+
+class RequestRouting:
+    """Routing state of the request being handled."""
+
+    __slots__ = ("primary", "wrote", "pinned")
+
+    def __init__(self):
+        self.primary = False
+        self.wrote = False
+        self.pinned = set()
+
+
+def _cache():
+    return caches[settings.TASK_CACHE_ALIAS]
+
+
+def _pin_key(user_id):
+    return f"db:primary:{user_id}"
+
+
+def _replica():
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        if model._meta.app_label in PRIMARY_APPS:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        if _replica_reads.get():
+            return _replica()
+        state = _request.get()
+        if state is None or state.primary:
+            return PRIMARY
+        return _replica()
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None:
+            # The rest of the request reads what it wrote.
+            state.primary = state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+@contextmanager
+def replica_reads():
+    """Send the block's reads to the replicas, for batch jobs that can lag."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin(*user_ids):
+    """Keep the users' reads on the primary for DB_PRIMARY_STICKY_SECONDS."""
+    if not settings.DATABASE_REPLICAS:
+        return
+    state = _request.get()
+    if state is not None:
+        user_ids = set(user_ids) - state.pinned
+        state.pinned |= user_ids
+    if user_ids:
+        _cache().set_many(
+            {_pin_key(user_id): True for user_id in user_ids},
+            settings.DB_PRIMARY_STICKY_SECONDS,
+        )
+
+
+def read_primary_if_pinned(user_id):
+    """Read from the primary for the rest of the request if the user wrote
+    recently."""
+    state = _request.get()
+    if state is not None and not state.primary:
+        state.primary = _cache().get(_pin_key(user_id), False)
+
+
+async def aread_primary_if_pinned(user_id):
+    state = _request.get()
+    if state is not None and not state.primary:
+        state.primary = await _cache().aget(_pin_key(user_id), False)
+
+
+class PrimaryReplicaMiddleware:
+    """Scope the routing state to the request.
+
+    Pins the user to the primary once the request has written anything, and
+    routes the reads of session users who wrote recently to it. Token users
+    are checked by CachedJWTAuthentication, which is where they are known.
+    Without DATABASE_REPLICAS the middleware removes itself from the stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request.set(RequestRouting())
+        try:
+            if self.has_session(request):
+                user_id = self.session_user_id(request)
+                if user_id is not None:
+                    read_primary_if_pinned(user_id)
+            response = self.get_response(request)
+            self.pin_writer(request)
+        finally:
+            _request.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        token = _request.set(RequestRouting())
+        try:
+            if self.has_session(request):
+                # request.auser() only arrives in Django 5.0.
+                user_id = await sync_to_async(self.session_user_id)(request)
+                if user_id is not None:
+                    await aread_primary_if_pinned(user_id)
+            response = await self.get_response(request)
+            if _request.get().wrote:
+                await sync_to_async(self.pin_writer)(request)
+        finally:
+            _request.reset(token)
+        return response
+
+    def has_session(self, request):
+        return settings.SESSION_COOKIE_NAME in request.COOKIES
+
+    def session_user_id(self, request):
+        user = request.user
+        return user.pk if user.is_authenticated else None
+
+    def pin_writer(self, request):
+        if not _request.get().wrote:
+            return
+        # The token views set request.user to the user they authenticated.
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin(user.pk)
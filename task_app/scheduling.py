@@ -0,0 +1,69 @@
+import math
+from contextlib import contextmanager
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Coordination between Celery workers through the task cache: Redis in
+# production, shared by every worker. The local-memory fallback only
+# coordinates the threads of one process, which is enough for tests.
+
+OUTCOMES = ("ran", "coalesced", "deferred")
+
+
+def _cache():
+    return caches[settings.TASK_CACHE_ALIAS]
+
+
+@contextmanager
+def single_flight(name, timeout):
+    """Hold the lock ``name`` for the block if no one else holds it.
+
+    Yields whether the lock was acquired. It expires after ``timeout``
+    seconds, in case its holder dies without releasing it, so ``timeout``
+    should exceed the longest the holder may run.
+    """
+    cache = _cache()
+    key = f"singleflight:lock:{name}"
+    token = uuid4().hex
+    # add() only stores the key if it is absent, atomically on Redis.
+    acquired = cache.add(key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
+
+
+def defer(name, seconds):
+    """Have ``deferred(name)`` return True for the next ``seconds`` seconds."""
+    # Redis expiries are whole seconds.
+    _cache().set(f"singleflight:deferred:{name}", True, math.ceil(seconds))
+
+
+def deferred(name):
+    return _cache().get(f"singleflight:deferred:{name}", False)
+
+
+def count_run(task, outcome):
+    """Count a run of ``task`` as one of ``OUTCOMES``."""
+    cache = _cache()
+    key = f"singleflight:runs:{task}:{outcome}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr().
+        cache.add(key, 1, timeout=None)
+
+
+def run_counts(tasks):
+    """``{(task, outcome): count}`` for every task and outcome."""
+    keys = {
+        f"singleflight:runs:{task}:{outcome}": (task, outcome)
+        for task in tasks
+        for outcome in OUTCOMES
+    }
+    counts = _cache().get_many(list(keys))
+    return {label: counts.get(key, 0) for key, label in keys.items()}
@@ -0,0 +1,75 @@
+import re
+
+from django.db.models import Exists, OuterRef
+
+from task_app.models import TaskTitleToken
+from task_app.utils import MAX_QUERY_PARAMS, chunked
+
+# Title search over an inverted index: one TaskTitleToken row per distinct
+# word of each title. A search term matches the words it is a prefix of,
+# which the (user, token, ...) and (token, ...) indexes answer with a prefix
+# seek, where title__icontains has to scan every title. Like summaries, the
+# write paths call these inside the transaction that writes the tasks.
+
+TOKEN_LENGTH = TaskTitleToken._meta.get_field("token").max_length
+_WORDS = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """The distinct lowercased words of ``text``, cut to the indexed length."""
+    return {word[:TOKEN_LENGTH] for word in _WORDS.findall(text.lower())}
+
+
+def index_tasks(user_id, tasks):
+    """Add index entries for new tasks, given as ``(id, title)`` pairs."""
+    TaskTitleToken.objects.bulk_create(
+        (
+            TaskTitleToken(user_id=user_id, task_id=task_id, token=token)
+            for task_id, title in tasks
+            for token in tokenize(title)
+        ),
+        # Three columns bound per inserted row.
+        batch_size=MAX_QUERY_PARAMS // 3,
+    )
+
+
+def unindex_tasks(task_ids):
+    """Drop the index entries of the given tasks."""
+    for chunk in chunked(task_ids, MAX_QUERY_PARAMS - 100):
+        TaskTitleToken.objects.filter(task_id__in=chunk).delete()
+
+
+def reindex_tasks(user_id, tasks):
+    """Replace the entries of retitled tasks, given as ``(id, title)`` pairs."""
+    tasks = list(tasks)
+    unindex_tasks([task_id for task_id, _ in tasks])
+    index_tasks(user_id, tasks)
+
+
+def _starting_with(term):
+    # LIKE 'term%' rather than a token >= term AND token < next-string range:
+    # the range assumes the column sorts by code point, which SQL Server's
+    # default collation does not ("quiz" < "qui{" fails under it), while a
+    # LIKE with a constant prefix is still an index seek there.
+    return TaskTitleToken.objects.filter(token__startswith=term)
+
+
+def matching_task_ids(query, user_id=None):
+    """Subquery of the ids of tasks matching every word of ``query``.
+
+    Returns None when ``query`` has no words. Restricted to ``user_id``'s
+    tasks when given.
+    """
+    # The longest term tends to be the most selective, so its range drives
+    # the lookup and the other terms are checked per candidate task.
+    terms = sorted(tokenize(query), key=lambda term: (-len(term), term))
+    if not terms:
+        return None
+    tokens = _starting_with(terms[0])
+    if user_id is not None:
+        tokens = tokens.filter(user_id=user_id)
+    for term in terms[1:]:
+        tokens = tokens.filter(
+            Exists(_starting_with(term).filter(task_id=OuterRef("task_id")))
+        )
+    return tokens.values("task_id")
@@ -1,10 +1,133 @@
+import time
+
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from task_app import metrics
+from task_app.authentication import is_recent_failed_login, remember_failed_login
+from task_app.models import Task, TaskDailySummary
+from task_app.utils import MAX_QUERY_PARAMS, datetime_formatter
+
+
+class TimedDataMixin:
+    """Report the time spent building ``.data`` to the request metrics."""
+
+    @property
+    def data(self):
+        start = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            metrics.record_serialization(time.perf_counter() - start)
+
+
+class TaskListSerializer(TimedDataMixin, serializers.ListSerializer):
+    def create(self, validated_data):
+        return Task.objects.bulk_create_with_ids(
+            [Task(**attrs) for attrs in validated_data]
+        )
 
-from task_app.models import Task
+    def update(self, instance, validated_data):
+        # ``instance`` holds the already fetched tasks the items may refer to.
+        tasks = {task.id: task for task in instance}
+        updated = {}
+        fields = {"updated_at"}
+        now = timezone.now()
+        for attrs in validated_data:
+            task = tasks.get(attrs["id"])
+            if task is None:
+                continue
+            for field, value in attrs.items():
+                setattr(task, field, value)
+                fields.add(field)
+            task.updated_at = now
+            updated[task.id] = task
+        fields.discard("id")
+        if updated:
+            # bulk_update binds a pk and a value per field per row (CASE WHEN)
+            # plus the pk again in the WHERE clause.
+            batch_size = MAX_QUERY_PARAMS // (2 * len(fields) + 1)
+            Task.objects.bulk_update(
+                updated.values(), sorted(fields), batch_size=batch_size
+            )
+        return list(updated.values())
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ["id", "title", "duration", "created_at", "updated_at"]
         read_only_fields = ["created_at", "updated_at"]
+        list_serializer_class = TaskListSerializer
+
+
+# Columns to select with values() for task_payloads(), in TaskSerializer order.
+TASK_FIELDS = TaskSerializer.Meta.fields
+
+
+def task_payloads(rows):
+    """Build ``TaskSerializer(tasks, many=True).data`` from values() rows.
+
+    ``rows`` are dicts from ``values(*TASK_FIELDS)``. Copying them and
+    formatting the two timestamps skips the model instances and the per-row,
+    per-field serializer calls, which dominate the cost of a large page.
+    """
+    start = time.perf_counter()
+    format_datetime = datetime_formatter()
+    try:
+        return [
+            {
+                **row,
+                "created_at": format_datetime(row["created_at"]),
+                "updated_at": format_datetime(row["updated_at"]),
+            }
+            for row in rows
+        ]
+    finally:
+        metrics.record_serialization(time.perf_counter() - start)
+
+
+def task_payload(row):
+    """``TaskSerializer(task).data`` for a single values() row."""
+    return task_payloads([row])[0]
+
+
+class TaskDailySummarySerializer(serializers.ModelSerializer):
+    average_duration = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = TaskDailySummary
+        fields = ["day", "task_count", "total_duration", "average_duration"]
+
+
+class TaskBulkUpdateSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField()
+
+    class Meta:
+        model = Task
+        fields = ["id", "title", "duration"]
+        list_serializer_class = TaskListSerializer
+
+    def validate(self, attrs):
+        # Bulk updates are always partial, which would also make the id optional.
+        if "id" not in attrs:
+            raise serializers.ValidationError({"id": ["This field is required."]})
+        return attrs
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    def validate(self, attrs):
+        # A credential pair that just failed is rejected without the user
+        # lookup and password hash that authenticate() would repeat.
+        credentials = (attrs[self.username_field], attrs["password"])
+        if is_recent_failed_login(*credentials):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        try:
+            return super().validate(attrs)
+        except AuthenticationFailed:
+            remember_failed_login(*credentials)
+            raise
@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.utils import timezone
+
+from task_app import feed, search, summaries, versions
+from task_app.models import Task
+from task_app.serializers import TASK_FIELDS
+
+# Single-task writes shared by the sync and async views. Each one changes the
+# task, its TaskDailySummary row, its title index entries, the user's change
+# version and change feed in one transaction.
+
+
+def create_task(user_id, data):
+    with transaction.atomic():
+        task = Task.objects.create(user_id=user_id, **data)
+        summaries.add_tasks(user_id, [(task.created_at, task.duration)])
+        search.index_tasks(user_id, [(task.id, task.title)])
+        versions.bump(user_id)
+        feed.record(user_id, "created", [task.id])
+    return task
+
+
+def update_task(user_id, task_id, data):
+    """Apply validated ``data`` to the user's task.
+
+    Returns the updated task's ``TASK_FIELDS`` values, or None if there is
+    none. The row is read back in the same transaction, so a concurrent
+    delete or archive cannot take it away in between.
+    """
+    tasks = Task.objects.filter(id=task_id, user_id=user_id)
+    with transaction.atomic():
+        old = None
+        if "duration" in data:
+            old = (
+                tasks.select_for_update().values_list("created_at", "duration").first()
+            )
+            if old is None:
+                return None
+        if not tasks.update(**data, updated_at=timezone.now()):
+            return None
+        if old is not None:
+            summaries.change_durations(user_id, [(*old, data["duration"])])
+        if "title" in data:
+            search.reindex_tasks(user_id, [(task_id, data["title"])])
+        versions.bump(user_id)
+        feed.record(user_id, "updated", [task_id])
+        # The ORM has no UPDATE ... RETURNING, so read the row back by pk.
+        return tasks.values(*TASK_FIELDS).get()
+
+
+def delete_task(user_id, task_id):
+    """Soft-delete the user's task; False if there is none."""
+    tasks = Task.objects.filter(id=task_id, user_id=user_id)
+    with transaction.atomic():
+        old = tasks.select_for_update().values_list("created_at", "duration").first()
+        if old is None:
+            return False
+        tasks.soft_delete()
+        summaries.remove_tasks(user_id, [old])
+        search.unindex_tasks([task_id])
+        versions.bump(user_id)
+        feed.record(user_id, "deleted", [task_id])
+    return True
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from task_app import cache as task_cache
+from task_app import routing
+from task_app.authentication import forget_failed_logins, user_cache_key
+from task_app.models import TaskChangeVersion
+
+# Sent after tasks change through the API, the admin or the archive job,
+# including the bulk and queryset-level writes that never fire
+# post_save/post_delete.
+# Arguments: user_id, action ("created", "updated", "deleted" or "archived"),
+# task_ids.
+tasks_changed = Signal()
+
+
+@receiver(tasks_changed)
+def invalidate_task_cache(sender, user_id, **kwargs):
+    # The owner's next reads must not miss the change on a lagging replica,
+    # and cache what they read there under the new version. Pinned first, for
+    # change feed readers waiting on the cache to be dropped.
+    routing.pin(user_id)
+    task_cache.invalidate(user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_failed_logins(sender, instance, **kwargs):
+    # Credentials that failed may work now the account was created,
+    # reactivated or given a new password.
+    forget_failed_logins(instance.get_username())
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_task_change_version(sender, instance, created, raw=False, **kwargs):
+    # So that task writes only UPDATE it; versions.bump() still creates the
+    # rows of users saved without this signal (fixtures, bulk_create).
+    if created and not raw:
+        TaskChangeVersion.objects.create(user=instance, changed_at=timezone.now())
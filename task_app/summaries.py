@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from task_app.models import TaskDailySummary
+
+# Incremental maintenance of TaskDailySummary. Every write path reports the
+# tasks it added, removed or re-timed, and each affected (user, day) row is
+# adjusted with a single UPDATE ... SET x = x + delta, so the cost depends on
+# the number of days touched, not on the size of the task table. Call these
+# inside the transaction that writes the tasks, so both commit together.
+
+
+def _deltas(rows):
+    """Sum ``(created_at, count, duration)`` changes per day."""
+    tz = timezone.get_current_timezone()
+    days = defaultdict(lambda: [0, 0])
+    for created_at, count, duration in rows:
+        day = days[created_at.astimezone(tz).date()]
+        day[0] += count
+        day[1] += duration
+    return days
+
+
+def _apply(user_id, days):
+    for day, (count, duration) in days.items():
+        if not count and not duration:
+            continue
+        summary = TaskDailySummary.objects.filter(user_id=user_id, day=day)
+        changes = {
+            "task_count": F("task_count") + count,
+            "total_duration": F("total_duration") + duration,
+        }
+        if summary.update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                TaskDailySummary.objects.create(
+                    user_id=user_id, day=day, task_count=count, total_duration=duration
+                )
+        except IntegrityError:
+            # Another writer created the row first.
+            summary.update(**changes)
+
+
+def add_tasks(user_id, tasks):
+    """Count new tasks, given as ``(created_at, duration)`` pairs."""
+    _apply(user_id, _deltas((created_at, 1, d) for created_at, d in tasks))
+
+
+def remove_tasks(user_id, tasks):
+    """Uncount deleted tasks, given as ``(created_at, duration)`` pairs."""
+    _apply(user_id, _deltas((created_at, -1, -d) for created_at, d in tasks))
+
+
+def change_durations(user_id, changes):
+    """Apply ``(created_at, old_duration, new_duration)`` duration updates."""
+    _apply(
+        user_id,
+        _deltas((created_at, 0, new - old) for created_at, old, new in changes),
+    )
@@ -1,23 +1,245 @@
+import logging
+import time
+from datetime import timedelta
+
 from celery import shared_task
-from django.utils.timezone import localtime
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, router
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from task_app import archive, ingest, routing, scheduling
+from task_app.models import (
+    Task,
+    TaskArchive,
+    TaskChangeEvent,
+    TaskIngestKey,
+    TaskReportCursor,
+    TaskTitleToken,
+)
+from task_app.utils import timestamp_formatter
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def print_task_details(self, user_id=1, chunk_size=1000):
+    """Log the user's tasks created or changed since the previous run.
+
+    Runs for the same user never overlap: one that finds another in progress
+    returns at once and leaves the changes to it. A run that reaches its soft
+    time limit, or takes longer than TASK_REPORT_INTERVAL on pools without
+    one, defers the next ones for as long again, so that a slow database
+    gets time to recover rather than a queue of reports.
+    """
+    name = f"{self.name}:{user_id}"
+    if scheduling.deferred(name):
+        scheduling.count_run(self.name, "deferred")
+        return f"Report for user {user_id} deferred after a long run."
+    # The lock outlives the hard time limit, past which the run is killed.
+    timeout = (self.time_limit or settings.CELERY_TASK_TIME_LIMIT) + 5
+    with scheduling.single_flight(name, timeout) as acquired:
+        if not acquired:
+            scheduling.count_run(self.name, "coalesced")
+            return f"Report for user {user_id} already running."
+        start = time.monotonic()
+        try:
+            result = report_changes(user_id, chunk_size)
+        except SoftTimeLimitExceeded:
+            # The limit is below the interval. The cursor holds what was
+            # reported, and the next run not deferred carries on from it.
+            scheduling.defer(name, time.monotonic() - start)
+            result = f"Report for user {user_id} stopped at the time limit."
+        else:
+            elapsed = time.monotonic() - start
+            if elapsed > settings.TASK_REPORT_INTERVAL:
+                scheduling.defer(name, elapsed)
+    scheduling.count_run(self.name, "ran")
+    return result
+
+
+def report_changes(user_id, chunk_size):
+    """Log the tasks created or changed since the stored cursor.
+
+    Tasks are read in (updated_at, id) order in chunks of ``chunk_size``, and
+    the position after each chunk is stored in TaskReportCursor. A run costs
+    O(changed tasks), and an interrupted run resumes where it stopped. The
+    tasks are read from a replica; what a lagging one misses is reported by
+    the next run, since the cursor only moves past tasks that were read.
+    """
+    cursor = TaskReportCursor.objects.filter(user_id=user_id).first()
+    tasks = (
+        Task.objects.filter(user_id=user_id)
+        .only("id", "title", "duration", "created_at", "updated_at")
+        .order_by("updated_at", "id")
+    )
+    format_timestamp = timestamp_formatter()
+    reported = 0
+    while True:
+        page = tasks
+        if cursor is not None:
+            # A range on updated_at keeps this an index seek; the OR form of
+            # the same keyset condition is not always planned as one.
+            page = tasks.filter(updated_at__gte=cursor.updated_at).exclude(
+                updated_at=cursor.updated_at, id__lte=cursor.task_id
+            )
+        with routing.replica_reads():
+            chunk = list(page[:chunk_size])
+        if not chunk:
+            break
+
+        logger.info(
+            "\n".join(
+                f"Title: {task.title}, Duration: {task.duration}, "
+                f"Created At: {format_timestamp(task.created_at)}, "
+                f"Updated At: {format_timestamp(task.updated_at)}"
+                for task in chunk
+            )
+        )
+        reported += len(chunk)
+
+        last = chunk[-1]
+        if cursor is None:
+            cursor = TaskReportCursor.objects.create(
+                user_id=user_id, updated_at=last.updated_at, task_id=last.id
+            )
+        else:
+            cursor.updated_at, cursor.task_id = last.updated_at, last.id
+            cursor.save(update_fields=["updated_at", "task_id"])
+        if len(chunk) < chunk_size:
+            break
+
+    if not reported:
+        return f"No new or changed tasks for user {user_id}."
+    return f"Reported {reported} new or changed tasks for user {user_id}."
 
-from task_app.models import Task
+
+def delete_in_batches(queryset, batch_size, max_batches):
+    """Delete the rows of ``queryset`` ``batch_size`` at a time.
+
+    Each batch is a single DELETE ... WHERE id IN (SELECT TOP (n) id ...),
+    LIMIT n outside SQL Server, committed on its own so that no batch holds
+    its locks for long. Stops after ``max_batches`` batches and returns the
+    number of rows deleted.
+    """
+    # queryset.db would be a replica.
+    connection = connections[router.db_for_write(queryset.model)]
+    quote = connection.ops.quote_name
+    meta = queryset.model._meta
+    batch = queryset.values("pk")[:batch_size].query
+    batch_sql, params = batch.get_compiler(connection=connection).as_sql()
+    sql = (
+        f"DELETE FROM {quote(meta.db_table)} "
+        f"WHERE {quote(meta.pk.column)} IN ({batch_sql})"
+    )
+    deleted = 0
+    for _ in range(max_batches):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            count = cursor.rowcount
+        deleted += count
+        if count < batch_size:
+            break
+    return deleted
 
 
 @shared_task
-def print_task_details():
-    # Fetch all tasks created by user with ID = 1
-    tasks = Task.objects.filter(user_id=1)
-
-    if not tasks:
-        return "No tasks found for user 1."
-
-    task_details = []
-    for task in tasks:
-        created_at = localtime(task.created_at).strftime("%Y-%m-%d %H:%M:%S")
-        updated_at = localtime(task.updated_at).strftime("%Y-%m-%d %H:%M:%S")
-        task_details.append(
-            f"Title: {task.title}, Duration: {task.duration}, Created At: {created_at}, Updated At: {updated_at}"
+def purge_deleted_tasks(batch_size=1000, max_batches=100, archived=False):
+    """Remove soft-deleted tasks, and the tasks and index entries of users
+    that no longer exist, in bounded batches.
+
+    Runs of up to ``max_batches`` batches of each kind keep a single run
+    short; whatever is left is purged by the next one. With ``archived``, the
+    archived tasks of users that no longer exist are removed as well, a scan
+    of the whole archive best left to a quiet hour.
+    """
+    orphaned = ~Exists(User.objects.filter(pk=OuterRef("user_id")))
+    tasks = delete_in_batches(
+        Task.all_objects.filter(deleted_at__isnull=False), batch_size, max_batches
+    )
+    tasks += delete_in_batches(
+        Task.all_objects.filter(orphaned), batch_size, max_batches
+    )
+    if archived:
+        tasks += delete_in_batches(
+            TaskArchive.objects.filter(orphaned), batch_size, max_batches
         )
+    entries = delete_in_batches(
+        TaskTitleToken.objects.filter(orphaned), batch_size, max_batches
+    )
+    if not tasks and not entries:
+        return "Nothing to purge."
+    return f"Purged {tasks} tasks and {entries} search index entries."
+
+
+@shared_task
+def purge_task_events(batch_size=1000, max_batches=100):
+    """Remove change feed events older than TASK_FEED_RETENTION_HOURS, and
+    buffered task keys older than TASK_INGEST_KEY_RETENTION_HOURS."""
+    now = timezone.now()
+    cutoff = now - timedelta(hours=settings.TASK_FEED_RETENTION_HOURS)
+    events = delete_in_batches(
+        TaskChangeEvent.objects.filter(created_at__lt=cutoff), batch_size, max_batches
+    )
+    cutoff = now - timedelta(hours=settings.TASK_INGEST_KEY_RETENTION_HOURS)
+    keys = delete_in_batches(
+        TaskIngestKey.objects.filter(created_at__lt=cutoff), batch_size, max_batches
+    )
+    if not events and not keys:
+        return "Nothing to purge."
+    return f"Purged {events} change feed events and {keys} task keys."
+
+
+@shared_task(
+    bind=True,
+    # The batch went back to the queue, and only a new submission would
+    # schedule another flush: retry until the database is back.
+    autoretry_for=ingest.TRANSIENT_ERRORS,
+    max_retries=None,
+    retry_backoff=True,
+    retry_backoff_max=300,
+)
+def flush_task_buffer(self, max_batches=20):
+    """Create the tasks queued by the create endpoints in buffered mode.
+
+    Scheduled by the first task queued (see task_app.ingest). Runs never
+    overlap: one that finds another in progress schedules a later flush
+    instead. A run that leaves tasks in the queue after ``max_batches``
+    batches queues the next one right away, and one the database could not
+    take is retried with exponential backoff.
+    """
+    timeout = (self.time_limit or settings.CELERY_TASK_TIME_LIMIT) + 5
+    with scheduling.single_flight(self.name, timeout) as acquired:
+        if not acquired:
+            scheduling.count_run(self.name, "coalesced")
+            ingest.schedule_flush()
+            return "Another flush in progress."
+        created, more = ingest.flush(max_batches)
+    scheduling.count_run(self.name, "ran")
+    if more:
+        flush_task_buffer.apply_async(kwargs={"max_batches": max_batches})
+    if not created:
+        return "Nothing to flush."
+    return f"Created {created} buffered tasks."
+
+
+@shared_task
+def archive_old_tasks(after_days=None, batch_size=1000, max_batches=100):
+    """Move tasks created more than ``after_days`` days ago to the archive.
 
-    return "\n".join(task_details)
+    ``after_days`` defaults to the TASK_ARCHIVE_AFTER_DAYS setting. Each run
+    moves at most ``max_batches`` batches; the next run picks up the rest.
+    """
+    if after_days is None:
+        after_days = settings.TASK_ARCHIVE_AFTER_DAYS
+    moved = archive.archive_tasks(
+        timezone.now() - timedelta(days=after_days),
+        batch_size=batch_size,
+        max_batches=max_batches,
+        export_dir=settings.TASK_ARCHIVE_EXPORT_DIR,
+    )
+    if not moved:
+        return "Nothing to archive."
+    return f"Archived {moved} tasks."
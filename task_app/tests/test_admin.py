@@ -0,0 +1,148 @@
+import io
+from unittest import mock
+
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from task_app.models import Task
+from task_app.pagination import EstimatedCountPaginator, estimated_row_count
+from task_app.tests.test_search import expected_tokens, indexed_tokens
+from task_app.tests.test_summaries import aggregate_tasks, summarized_tasks
+
+
+class TaskAdminTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="pw")
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:task_app_task_changelist")
+        self.users = [User.objects.create_user(username=f"user{i}") for i in range(3)]
+
+    def create_tasks(self, count):
+        for user in self.users:
+            Task.objects.bulk_create(
+                Task(title=f"Task {i}", duration=i, user=user) for i in range(count)
+            )
+        for command in ("rebuild_task_summaries", "rebuild_task_search_index"):
+            call_command(command, stdout=io.StringIO())
+        return list(Task.objects.values_list("id", flat=True))
+
+    def action(self, name, task_ids, **data):
+        return self.client.post(
+            self.url,
+            {"action": name, "_selected_action": task_ids, **data},
+            follow=True,
+        )
+
+    def test_changelist_query_count(self):
+        """A changelist page costs the same queries for 3 or 90 tasks"""
+        for count, total in ((1, 3), (30, 93)):
+            self.create_tasks(count)
+            # Session, user, statistics lookup, COUNT(*) since there are no
+            # statistics, the page with its users joined and the date
+            # hierarchy's range and days.
+            with self.assertNumQueries(7):
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context["cl"].result_count, total)
+
+        # A day picked in the date hierarchy is a created_at range, counted
+        # exactly, and needs no further date queries.
+        today = Task.objects.values_list("created_at", flat=True).first()
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                self.url,
+                {
+                    "created_at__year": today.year,
+                    "created_at__month": today.month,
+                    "created_at__day": today.day,
+                },
+            )
+        self.assertEqual(response.context["cl"].result_count, 93)
+
+    def test_changelist_count_is_estimated(self):
+        """Past the threshold, the unfiltered count comes from statistics"""
+        self.create_tasks(10)
+        self.assertIsNone(estimated_row_count(Task))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.assertEqual(estimated_row_count(Task), 30)
+
+        # Rows written since the statistics were gathered are not counted.
+        self.create_tasks(1)
+        with mock.patch.object(EstimatedCountPaginator, "estimate_threshold", 30):
+            with self.assertNumQueries(6) as queries:
+                response = self.client.get(self.url)
+            self.assertEqual(response.context["cl"].result_count, 30)
+            self.assertFalse(
+                any("COUNT(" in query["sql"] for query in queries.captured_queries)
+            )
+
+            # Filtered changelists are still counted exactly.
+            response = self.client.get(self.url, {"q": "user0"})
+            self.assertEqual(response.context["cl"].result_count, 11)
+
+        # Below the threshold, the exact count is cheap enough.
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["cl"].result_count, 33)
+
+    def test_delete_selected(self):
+        """Deleting many tasks runs the same queries as deleting a few"""
+        task_ids = self.create_tasks(20)
+        response = self.action("delete_selected", task_ids[:2])
+        self.assertContains(response, "Are you sure?")
+
+        # The content type of the log entries is cached after its first use.
+        ContentType.objects.get_for_model(Task)
+        # Session, user and count for the changelist, then a locking read, the
+        # DELETE, summary, index, change version and change feed upkeep and
+        # the log insert in a savepoint, then the changelist again after the
+        # redirect. Two users' tasks are selected each time, 6 and then 34.
+        for selected in (
+            task_ids[:3] + task_ids[20:23],
+            task_ids[3:20] + task_ids[23:40],
+        ):
+            with self.assertNumQueries(21):
+                response = self.action("delete_selected", selected, post="yes")
+            self.assertContains(response, f"Successfully deleted {len(selected)} ")
+
+        self.assertEqual(Task.objects.count(), 20)
+        self.assertEqual(summarized_tasks(), aggregate_tasks())
+        self.assertEqual(indexed_tokens(), expected_tokens())
+        logged = LogEntry.objects.filter(action_flag=DELETION)
+        self.assertEqual(
+            sorted(
+                int(object_id)
+                for object_id in logged.values_list("object_id", flat=True)
+            ),
+            sorted(task_ids[:40]),
+        )
+        self.assertEqual(logged.filter(object_repr="Task 0").count(), 2)
+
+    def test_set_duration(self):
+        """The duration action is one UPDATE plus summary upkeep"""
+        task_ids = self.create_tasks(20)
+        # A locking read, the UPDATE, one summary UPDATE per user and day
+        # touched, one change version UPDATE and one change feed INSERT for all
+        # users, between the two changelist requests. Two users' tasks are
+        # selected each time, 6 and then 34.
+        for selected in (
+            task_ids[:3] + task_ids[20:23],
+            task_ids[3:20] + task_ids[23:40],
+        ):
+            with self.assertNumQueries(19):
+                response = self.action(
+                    "set_duration", selected, duration=500, select_across=0
+                )
+            self.assertContains(response, f"Set the duration of {len(selected)} ")
+
+        self.assertEqual(Task.objects.filter(duration=500).count(), 40)
+        self.assertEqual(summarized_tasks(), aggregate_tasks())
+
+        response = self.action("set_duration", task_ids[:1], duration="")
+        self.assertContains(response, "Enter the new duration next to the action.")
+        self.assertEqual(Task.objects.filter(duration=500).count(), 40)
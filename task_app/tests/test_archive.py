@@ -0,0 +1,193 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from task_app.archive import archive_tasks
+from task_app.models import Task, TaskArchive, TaskTitleToken
+from task_app.tasks import archive_old_tasks, purge_deleted_tasks
+from task_app.tests.test_search import expected_tokens, indexed_tokens
+from task_app.tests.test_summaries import summarized_tasks
+
+
+class TaskArchiveTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="archiver")
+        self.other = User.objects.create_user(username="bystander")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now()
+        # Six tasks from over a year ago and nine from the last nine days, for
+        # each user.
+        for user in (self.user, self.other):
+            Task.objects.bulk_create(
+                Task(title=f"Task {i}", duration=i, user=user) for i in range(15)
+            )
+            for age, task_id in enumerate(
+                Task.objects.filter(user=user).values_list("id", flat=True)
+            ):
+                age = 400 - age if age < 6 else age - 6
+                Task.objects.filter(id=task_id).update(
+                    created_at=self.now - timedelta(days=age)
+                )
+        for command in ("rebuild_task_summaries", "rebuild_task_search_index"):
+            call_command(command, stdout=io.StringIO())
+        self.old = list(
+            Task.objects.filter(user=self.user, created_at__lt=self.cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    @property
+    def cutoff(self):
+        return self.now - timedelta(days=365)
+
+    def test_archive_moves_old_tasks(self):
+        """Old tasks move to the archive in bounded batches, recent ones stay"""
+        before = list(Task.objects.order_by("id").values())
+        summaries = summarized_tasks()
+
+        # Twelve old tasks in all, moved oldest first.
+        self.assertEqual(archive_tasks(self.cutoff, batch_size=2, max_batches=3), 6)
+        self.assertEqual(archive_tasks(self.cutoff, batch_size=2), 6)
+        self.assertEqual(archive_tasks(self.cutoff), 0)
+
+        self.assertEqual(Task.objects.count(), 18)
+        self.assertFalse(Task.objects.filter(created_at__lt=self.cutoff).exists())
+        self.assertEqual(
+            list(TaskArchive.objects.order_by("id").values()),
+            [
+                {key: value for key, value in task.items() if key != "deleted_at"}
+                for task in before
+                if task["created_at"] < self.cutoff
+            ],
+        )
+        # Archived tasks leave the search index but still count per day.
+        self.assertEqual(indexed_tokens(), expected_tokens())
+        self.assertEqual(summarized_tasks(), summaries)
+        call_command("rebuild_task_summaries", stdout=io.StringIO())
+        self.assertEqual(summarized_tasks(), summaries)
+
+    def test_batch_query_count(self):
+        """Each batch is a locking read, an insert, two deletes, an update and
+        the change feed insert"""
+        # Within a savepoint, since the test case is a transaction itself. The
+        # update bumps the change versions of the batch's users.
+        with self.assertNumQueries(8):
+            self.assertEqual(archive_tasks(self.cutoff, batch_size=20), 12)
+
+    def test_soft_deleted_tasks_are_left_to_the_purge(self):
+        Task.objects.filter(id=self.old[0]).soft_delete()
+        self.assertEqual(archive_tasks(self.cutoff), 11)
+        self.assertFalse(TaskArchive.objects.filter(id=self.old[0]).exists())
+        self.assertEqual(
+            purge_deleted_tasks(), "Purged 1 tasks and 0 search index entries."
+        )
+
+    def test_retrieve_falls_back_to_archive(self):
+        """Archived tasks are still served by id, to their owner only"""
+        url = reverse("task-detail", args=[self.old[0]])
+        expected = self.client.get(url).data
+        cache.clear()
+        archive_tasks(self.cutoff)
+
+        # The change version, the task table, then the archive.
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, expected)
+
+        other = APIClient()
+        other.force_authenticate(user=self.other)
+        self.assertEqual(other.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        # Archived tasks are read-only.
+        response = self.client.patch(
+            reverse("task-update", args=[self.old[0]]), {"duration": 1}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.delete(reverse("task-delete", args=[self.old[0]]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Hot tasks are still a single query.
+        recent = Task.objects.filter(user=self.user).values_list("id", flat=True)[0]
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("task-detail", args=[recent]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def test_async_retrieve_falls_back_to_archive(self):
+        await Task.objects.filter(id=self.old[0]).aupdate(title="Async archived")
+        await sync_to_async(archive_tasks)(self.cutoff)
+        token = AccessToken.for_user(self.user)
+        response = await self.async_client.get(
+            reverse("async-task-detail", args=[self.old[0]]),
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["title"], "Async archived")
+
+    def test_archive_cache_invalidation(self):
+        """The archive job invalidates the owners' cached listings"""
+        listed = self.client.get(reverse("get-tasks"), {"page_size": 100}).data
+        self.assertEqual(len(listed["results"]), 15)
+        archive_tasks(self.cutoff)
+        listed = self.client.get(reverse("get-tasks"), {"page_size": 100}).data
+        self.assertEqual(len(listed["results"]), 9)
+
+    def test_export(self):
+        """Each batch is written as a gzipped NDJSON file named by its ids"""
+        expected = self.client.get(reverse("task-detail", args=[self.old[0]])).data
+        with tempfile.TemporaryDirectory() as export_dir:
+            with override_settings(
+                TASK_ARCHIVE_AFTER_DAYS=365, TASK_ARCHIVE_EXPORT_DIR=export_dir
+            ):
+                self.assertEqual(archive_old_tasks(batch_size=8), "Archived 12 tasks.")
+                self.assertEqual(archive_old_tasks(), "Nothing to archive.")
+            names = sorted(os.listdir(export_dir))
+            self.assertEqual(len(names), 2)
+            exported = []
+            for name in names:
+                with gzip.open(os.path.join(export_dir, name), "rt") as file:
+                    lines = [json.loads(line) for line in file]
+                ids = [line["id"] for line in lines]
+                self.assertEqual(name, f"tasks-{min(ids)}-{max(ids)}.ndjson.gz")
+                exported += lines
+
+        self.assertEqual(
+            sorted(line["id"] for line in exported),
+            sorted(TaskArchive.objects.values_list("id", flat=True)),
+        )
+        # The API's payload of the task, plus its owner.
+        line = next(line for line in exported if line["id"] == self.old[0])
+        self.assertEqual(line, {**expected, "user_id": self.user.id})
+
+    def test_purge_archived_tasks_of_deleted_users(self):
+        archive_tasks(self.cutoff)
+        self.other.delete()
+        self.assertEqual(
+            purge_deleted_tasks(),
+            "Purged 9 tasks and 18 search index entries.",
+        )
+        self.assertEqual(TaskArchive.objects.count(), 12)
+        self.assertEqual(
+            purge_deleted_tasks(archived=True),
+            "Purged 6 tasks and 0 search index entries.",
+        )
+        self.assertEqual(
+            set(TaskArchive.objects.values_list("user_id", flat=True)),
+            {self.user.id},
+        )
+        self.assertFalse(TaskTitleToken.objects.filter(user_id=self.other.id).exists())
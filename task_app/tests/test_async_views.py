@@ -0,0 +1,129 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app.models import Task
+
+
+class AsyncTaskViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="asyncuser")
+        self.other = User.objects.create_user(username="otheruser")
+        self.task = Task.objects.create(title="Task", duration=30, user=self.user)
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {"headers": {"Authorization": f"Bearer {token}"}}
+
+    async def test_requires_token(self):
+        """Requests without a valid token are rejected like the DRF views"""
+        url = reverse("async-get-tasks")
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            response.json(),
+            {"detail": "Authentication credentials were not provided."},
+        )
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="api"')
+
+        response = await self.async_client.get(
+            url, headers={"Authorization": "Bearer x"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+    async def test_create_task(self):
+        """Tasks are created for the authenticated user"""
+        response = await self.async_client.post(
+            reverse("async-task-create"),
+            {"title": "New Task", "duration": 15},
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task = await Task.objects.aget(id=response.json()["id"])
+        self.assertEqual(task.user_id, self.user.id)
+        self.assertEqual(task.title, "New Task")
+
+    async def test_create_task_invalid_data(self):
+        """Invalid payloads and malformed JSON are rejected with 400"""
+        url = reverse("async-task-create")
+        response = await self.async_client.post(
+            url, {"title": ""}, content_type="application/json", **self.auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("title", response.json())
+
+        response = await self.async_client.post(
+            url, "{", content_type="application/json", **self.auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_payloads_match_sync_views(self):
+        """List and retrieve return the same JSON as the DRF views"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        for name, args in (
+            ("get-tasks", []),
+            ("task-detail", [self.task.id]),
+            ("task-detail", [self.task.id + 100]),
+        ):
+            sync_response = await sync_to_async(client.get)(reverse(name, args=args))
+            response = await self.async_client.get(
+                reverse(f"async-{name}", args=args), **self.auth
+            )
+            self.assertEqual(response.status_code, sync_response.status_code)
+            self.assertEqual(response.json(), sync_response.json())
+
+    async def test_other_users_task(self):
+        """Another user's task is not found for any operation"""
+        task = await Task.objects.acreate(title="Other", duration=1, user=self.other)
+        for name, method in (
+            ("async-task-detail", self.async_client.get),
+            ("async-task-update", self.async_client.patch),
+            ("async-task-delete", self.async_client.delete),
+        ):
+            response = await method(
+                reverse(name, args=[task.id]),
+                {"title": "Mine"},
+                content_type="application/json",
+                **self.auth,
+            )
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual((await Task.objects.aget(id=task.id)).title, "Other")
+
+    async def test_update_invalidates_cached_reads(self):
+        """An update is visible to the next (cached) retrieve and list"""
+        detail = reverse("async-task-detail", args=[self.task.id])
+        await self.async_client.get(detail, **self.auth)
+        await self.async_client.get(reverse("async-get-tasks"), **self.auth)
+
+        response = await self.async_client.patch(
+            reverse("async-task-update", args=[self.task.id]),
+            {"duration": 45},
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["duration"], 45)
+
+        response = await self.async_client.get(detail, **self.auth)
+        self.assertEqual(response.json()["duration"], 45)
+        response = await self.async_client.get(reverse("async-get-tasks"), **self.auth)
+        self.assertEqual(response.json()["results"][0]["duration"], 45)
+
+    async def test_delete_task(self):
+        """Deleting removes the task and later reads return 404"""
+        response = await self.async_client.delete(
+            reverse("async-task-delete", args=[self.task.id]), **self.auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(await Task.objects.filter(id=self.task.id).aexists())
+        response = await self.async_client.get(
+            reverse("async-task-detail", args=[self.task.id]), **self.auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,180 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app.authentication import CachedJWTAuthentication, user_cache_key
+
+
+class LoginTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.client = APIClient()
+        self.url = reverse("token_create")
+
+    def test_login_single_query(self):
+        """A successful login looks the user up exactly once"""
+        data = {"username": "testuser", "password": "testpassword"}
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Token", response.data)
+        self.assertIn("Refresh", response.data)
+
+    def test_login_unknown_username(self):
+        """Login attempt for a username that does not exist"""
+        data = {"username": "nobody", "password": "testpassword"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_repeated_failed_login_rejected_from_cache(self):
+        """A credential pair that just failed is rejected without a query"""
+        data = {"username": "testuser", "password": "wrongpassword"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_after_failed_attempt(self):
+        """A failed attempt does not block the correct password"""
+        data = {"username": "testuser", "password": "wrongpassword"}
+        self.client.post(self.url, data, format="json")
+        data = {"username": "testuser", "password": "testpassword"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_after_account_change(self):
+        """Credentials that just failed work once the account accepts them"""
+        data = {"username": "testuser", "password": "newpassword"}
+        self.client.post(self.url, data, format="json")
+        self.user.set_password("newpassword")
+        self.user.save()
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.is_active = True
+        self.user.save()
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = {"username": "newcomer", "password": "pw"}
+        self.client.post(self.url, data, format="json")
+        User.objects.create_user(**data)
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_token_refresh(self):
+        """A refresh token yields a working access token"""
+        data = {"username": "testuser", "password": "testpassword"}
+        refresh = self.client.post(self.url, data, format="json").data["Refresh"]
+
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": refresh}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + response.data["Token"])
+        response = self.client.get(reverse("get-tasks"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_token_refresh_invalid(self):
+        """An invalid refresh token is rejected"""
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": "not-a-token"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser")
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        # Never cached, so every request runs the same two task queries: the
+        # task table, then the archive. The change version is read once.
+        self.url = reverse("task-detail", args=[9999])
+
+    def test_user_lookup_cached(self):
+        """Only the first request loads the user row"""
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deactivated_user_rejected(self):
+        """Deactivating a user evicts the cached row immediately"""
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_rejected(self):
+        """Deleting a user evicts the cached row immediately"""
+        self.client.get(self.url)
+        self.user.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_request_user_is_full_user(self):
+        """Views still receive a real User instance from the cache"""
+        self.client.get(self.url)
+        response = self.client.post(
+            reverse("task-create"), {"title": "Task", "duration": 5}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.user.task_set.get().title, "Task")
+
+        # Its other fields are loaded when read.
+        authentication = CachedJWTAuthentication()
+        token = authentication.get_validated_token(
+            str(RefreshToken.for_user(self.user).access_token)
+        )
+        user = authentication.get_user(token)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, "testuser")
+
+    def test_credentials_not_cached(self):
+        """The cache keeps the id and active flag, no password hash"""
+        self.client.get(self.url)
+        self.assertEqual(
+            cache.get(user_cache_key(self.user.id)),
+            {"id": self.user.id, "is_active": True},
+        )
+
+    # simplejwt does not reload its settings on override_settings().
+    @mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True)
+    def test_password_change_revokes_cached_tokens(self):
+        self.user.set_password("old-password")
+        self.user.save()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.client.get(self.url)
+        entry = cache.get(user_cache_key(self.user.id))
+        self.assertNotIn(self.user.password, entry.values())
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Set without save(), so the entry stays cached.
+        entry["password_digest"] = "changed"
+        cache.set(user_cache_key(self.user.id), entry)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
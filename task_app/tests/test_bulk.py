@@ -0,0 +1,148 @@
+import io
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from task_app.models import Task
+from task_app.views import BulkTaskView
+
+
+class BulkTaskAPITestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bulkuser")
+        self.other_user = User.objects.create_user(username="otheruser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("task-bulk")
+
+    # Unit tests for bulk creation
+    def test_bulk_create(self):
+        """A JSON array of tasks is created in one request"""
+        data = [{"title": f"Task {i}", "duration": i} for i in range(5)]
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 5)
+        self.assertTrue(all(item["status"] == "created" for item in response.data))
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 5)
+
+    def test_bulk_create_without_returned_ids(self):
+        """Backends whose multi-row INSERTs return no rows still answer with
+        the ids of the new tasks"""
+        Task.objects.create(title="Existing", duration=1, user=self.other_user)
+        data = [{"title": f"Task {i}", "duration": i} for i in range(5)]
+        features = type(connection.features)
+        with mock.patch.object(features, "can_return_rows_from_bulk_insert", False):
+            response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = list(
+            Task.objects.filter(user=self.user)
+            .order_by("id")
+            .values_list("id", "title")
+        )
+        self.assertEqual(
+            [(item["id"], item["task"]["title"]) for item in response.data], created
+        )
+
+    def test_bulk_create_ndjson(self):
+        """Newline-delimited JSON bodies are accepted"""
+        body = '{"title": "First", "duration": 10}\n\n{"title": "Second", "duration": 20}\n'
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Task.objects.values_list("title", flat=True)), ["First", "Second"]
+        )
+
+    def test_bulk_create_invalid_item(self):
+        """One invalid item rejects the whole batch with per-item errors"""
+        data = [{"title": "Valid", "duration": 10}, {"title": "Invalid"}]
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("duration", response.data[1])
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_bulk_create_requires_array(self):
+        """A single object is not accepted by the bulk endpoint"""
+        data = {"title": "Test Task", "duration": 30}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_unauthorized(self):
+        """Bulk creation attempt for unauthenticated user"""
+        self.client.force_authenticate(user=None)
+        data = [{"title": "Test Task", "duration": 30}]
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # Unit tests for bulk update
+    def test_bulk_update(self):
+        """Only the current user's tasks are updated, the rest are reported"""
+        own = Task.objects.create(title="Own", duration=10, user=self.user)
+        foreign = Task.objects.create(
+            title="Foreign", duration=10, user=self.other_user
+        )
+        data = [
+            {"id": own.id, "title": "Own updated", "duration": 15},
+            {"id": foreign.id, "title": "Hijacked"},
+            {"id": 9999, "duration": 1},
+        ]
+        response = self.client.patch(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["status"] for item in response.data],
+            ["updated", "not_found", "not_found"],
+        )
+        self.assertEqual(response.data[0]["task"]["title"], "Own updated")
+
+        own.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual((own.title, own.duration), ("Own updated", 15))
+        self.assertEqual(foreign.title, "Foreign")
+
+    def test_bulk_update_requires_id(self):
+        """Every update item must name the task it changes"""
+        response = self.client.patch(self.url, [{"title": "No id"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("id", response.data[0])
+
+    # Unit tests for bulk deletion
+    def test_bulk_delete(self):
+        """Only the current user's tasks are deleted, the rest are reported"""
+        own = Task.objects.create(title="Own", duration=10, user=self.user)
+        foreign = Task.objects.create(
+            title="Foreign", duration=10, user=self.other_user
+        )
+        response = self.client.delete(self.url, [own.id, foreign.id], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {"id": own.id, "status": "deleted"},
+                {"id": foreign.id, "status": "not_found"},
+            ],
+        )
+        self.assertFalse(Task.objects.filter(id=own.id).exists())
+        self.assertTrue(Task.objects.filter(id=foreign.id).exists())
+
+    def test_bulk_delete_chunks_id_lists(self):
+        """Large id lists are split into bounded IN (...) statements"""
+        Task.objects.bulk_create(
+            Task(title=f"Task {i}", duration=i, user=self.user) for i in range(10)
+        )
+        call_command("rebuild_task_summaries", stdout=io.StringIO())
+        ids = list(Task.objects.values_list("id", flat=True))
+        with mock.patch.object(BulkTaskView, "id_chunk_size", 4):
+            # A SELECT and a DELETE for each of the three chunks, then one
+            # summary UPDATE for the day they were created, one DELETE of
+            # their title index entries, the change version UPDATE and the
+            # change feed INSERT, wrapped in the savepoint atomic() becomes
+            # inside the test transaction.
+            with self.assertNumQueries(12):
+                response = self.client.delete(self.url, ids, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.count(), 0)
@@ -0,0 +1,108 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from task_app import cache as task_cache
+from task_app.models import Task
+
+
+class TaskCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        task_cache.reset_stats()
+        self.user = User.objects.create_user(username="cacheuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title="Test Task", duration=30, user=self.user)
+
+    def test_list_served_from_cache(self):
+        """Repeated listing reads skip the database"""
+        url = reverse("get-tasks")
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.data, second.data)
+        # The page and the user's change version.
+        self.assertEqual(task_cache.stats(), {"hits": 2, "misses": 2})
+
+    def test_list_cached_per_query(self):
+        """Different filters and pages are cached separately"""
+        url = reverse("get-tasks")
+        self.client.get(url)
+        response = self.client.get(url, {"min_duration": 60})
+        self.assertEqual(response.data["results"], [])
+
+    def test_retrieve_served_from_cache(self):
+        """Repeated task reads skip the database, missing tasks are not cached"""
+        url = reverse("task-detail", args=[self.task.id])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data["title"], "Test Task")
+
+        # The task table and the archive are both checked again.
+        url = reverse("task-detail", args=[9999])
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_invalidates(self):
+        """Creating a task shows up in the next listing"""
+        url = reverse("get-tasks")
+        self.client.get(url)
+        self.client.post(
+            reverse("task-create"), {"title": "New", "duration": 5}, format="json"
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.data["results"][0]["title"], "New")
+
+    def test_update_invalidates(self):
+        """Updating a task refreshes both its detail and the listing"""
+        detail_url = reverse("task-detail", args=[self.task.id])
+        list_url = reverse("get-tasks")
+        self.client.get(detail_url)
+        self.client.get(list_url)
+        self.client.patch(
+            reverse("task-update", args=[self.task.id]),
+            {"title": "Updated"},
+            format="json",
+        )
+        self.assertEqual(self.client.get(detail_url).data["title"], "Updated")
+        self.assertEqual(
+            self.client.get(list_url).data["results"][0]["title"], "Updated"
+        )
+
+    def test_delete_invalidates(self):
+        """A deleted task is no longer served from the cache"""
+        url = reverse("task-detail", args=[self.task.id])
+        self.client.get(url)
+        self.client.delete(reverse("task-delete", args=[self.task.id]))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_writes_invalidate(self):
+        """Bulk writes invalidate like their single-item counterparts"""
+        url = reverse("get-tasks")
+        self.client.get(url)
+        self.client.post(
+            reverse("task-bulk"), [{"title": "Bulk", "duration": 5}], format="json"
+        )
+        self.assertEqual(self.client.get(url).data["results"][0]["title"], "Bulk")
+
+        self.client.delete(reverse("task-bulk"), [self.task.id], format="json")
+        titles = [task["title"] for task in self.client.get(url).data["results"]]
+        self.assertEqual(titles, ["Bulk"])
+
+    def test_cache_is_per_user(self):
+        """Another user never sees a cached payload of this user"""
+        url = reverse("get-tasks")
+        self.client.get(url)
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="otheruser")
+        )
+        self.assertEqual(self.client.get(url).data["results"], [])
+        response = self.client.get(reverse("task-detail", args=[self.task.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,169 @@
+import io
+import json
+import tracemalloc
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from task_app.models import Task
+
+
+class Sink:
+    """A stdout that keeps only the amount written."""
+
+    size = 0
+
+    def write(self, text):
+        self.size += len(text)
+
+    def flush(self):
+        pass
+
+
+class PrintTasksCommandTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="commanduser")
+        self.other = User.objects.create_user(username="otheruser")
+
+    def create_tasks(self, count, user=None):
+        Task.objects.bulk_create(
+            Task(title=f"Task {i}", duration=i, user=user or self.user)
+            for i in range(count)
+        )
+
+    def print_tasks(self, *args):
+        stdout = io.StringIO()
+        with mock.patch("time.sleep") as sleep:
+            call_command("print_tasks", *args, stdout=stdout)
+        return stdout.getvalue().splitlines(), sleep
+
+    def test_no_tasks(self):
+        """An empty selection prints a notice instead"""
+        lines, _ = self.print_tasks()
+        self.assertEqual(lines, ["No tasks found in the database."])
+        lines, _ = self.print_tasks("--format", "csv")
+        self.assertEqual(lines, ["No tasks found in the database."])
+
+    def test_print_one_by_one(self):
+        """Without --format each task is followed by an --interval pause"""
+        self.create_tasks(3)
+        lines, sleep = self.print_tasks("--interval", "2.5")
+        self.assertEqual(len(lines), 3)
+        self.assertRegex(
+            lines[0],
+            r"^Task title: Task 0, Duration: 0, "
+            r"Created At: \d{4}-\d\d-\d\d \d\d:\d\d:\d\d$",
+        )
+        self.assertEqual(sleep.call_args_list, [mock.call(2.5)] * 3)
+
+    def test_fast_formats(self):
+        """--format prints every task without sleeping"""
+        self.create_tasks(3)
+        text, sleep = self.print_tasks("--interval", "2.5", "--format", "text")
+        sleep.assert_not_called()
+        self.assertEqual(text, self.print_tasks()[0])
+
+        rows, _ = self.print_tasks("--format", "ndjson")
+        self.assertEqual(
+            [json.loads(row)["title"] for row in rows],
+            [
+                "Task 0",
+                "Task 1",
+                "Task 2",
+            ],
+        )
+        rows, _ = self.print_tasks("--format", "csv")
+        self.assertEqual(rows[0], "id,title,duration,created_at,updated_at")
+        self.assertEqual(len(rows), 4)
+
+    def test_filters(self):
+        """--user, --since and --resume-from-id narrow the printed tasks"""
+        self.create_tasks(4)
+        self.create_tasks(2, user=self.other)
+        ids = list(Task.objects.filter(user=self.user).values_list("id", flat=True))
+
+        lines, _ = self.print_tasks("--user", str(self.other.id), "--format", "text")
+        self.assertEqual(len(lines), 2)
+
+        lines, _ = self.print_tasks(
+            "--user", str(self.user.id), "--resume-from-id", str(ids[1])
+        )
+        self.assertEqual(
+            [line.split(",")[0] for line in lines],
+            [
+                "Task title: Task 2",
+                "Task title: Task 3",
+            ],
+        )
+
+        Task.objects.filter(id=ids[0]).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        lines, _ = self.print_tasks("--user", str(self.user.id), "--since", since)
+        self.assertEqual(len(lines), 3)
+
+    def test_interrupted_run_reports_resume_id(self):
+        """Ctrl-C names the id to pass to --resume-from-id"""
+        self.create_tasks(3)
+        first_id = Task.objects.order_by("id").values_list("id", flat=True)[0]
+        stderr = io.StringIO()
+        with mock.patch("time.sleep", side_effect=[None, KeyboardInterrupt]):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command("print_tasks", stdout=io.StringIO(), stderr=stderr)
+        self.assertIn(f"--resume-from-id {first_id + 1}", stderr.getvalue())
+
+    def test_one_query_per_batch(self):
+        """Each batch of tasks is read with one keyset query"""
+        self.create_tasks(10)
+        with self.assertNumQueries(3):
+            self.print_tasks("--batch-size", "4", "--format", "text")
+
+    def test_batch_size_must_be_positive(self):
+        self.create_tasks(3)
+        commands = [
+            "print_tasks",
+            "rebuild_task_summaries",
+            "rebuild_task_search_index",
+        ]
+        for command in commands:
+            for size in ["0", "-1"]:
+                with self.subTest(command=command, size=size):
+                    with self.assertRaisesMessage(CommandError, "at least 1"):
+                        call_command(command, "--batch-size", size)
+
+    def test_interval_must_not_be_negative(self):
+        for interval in ["-1", "nan"]:
+            with self.subTest(interval=interval):
+                with self.assertRaisesMessage(CommandError, "at least 0"):
+                    call_command("print_tasks", "--interval", interval)
+
+    def test_memory_is_bounded(self):
+        """Peak memory does not grow with the number of printed tasks"""
+
+        def peak_memory(count):
+            Task.objects.all().delete()
+            self.create_tasks(count)
+            stdout = Sink()
+            tracemalloc.start()
+            try:
+                call_command(
+                    "print_tasks",
+                    "--batch-size",
+                    "200",
+                    "--format",
+                    "ndjson",
+                    stdout=stdout,
+                )
+                return tracemalloc.get_traced_memory()[1], stdout.size
+            finally:
+                tracemalloc.stop()
+
+        small_peak, small_size = peak_memory(200)
+        large_peak, large_size = peak_memory(5000)
+        self.assertGreater(large_size, 20 * small_size)
+        self.assertLess(large_peak, 2 * small_peak)
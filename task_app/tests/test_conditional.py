@@ -0,0 +1,307 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app import versions
+from task_app.archive import archive_tasks
+from task_app.models import Task, TaskChangeVersion
+
+
+def version_of(user):
+    return versions.current(user.id)[0]
+
+
+class ChangeVersionTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="versionuser")
+        self.other = User.objects.create_user(username="otheruser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title="Task", duration=30, user=self.user)
+
+    def assertBumps(self, user, request, times=1):
+        before = version_of(user)
+        response = request()
+        self.assertEqual(version_of(user), before + times)
+        return response
+
+    def test_created_with_the_user(self):
+        self.assertEqual(versions.current(self.user.id)[0], 0)
+        self.assertIsNotNone(versions.current(self.user.id)[1])
+
+    def test_single_task_writes(self):
+        """Create, update and delete each bump the owner's version once"""
+        self.assertBumps(
+            self.user,
+            lambda: self.client.post(
+                reverse("task-create"), {"title": "New", "duration": 5}, format="json"
+            ),
+        )
+        url = reverse("task-update", args=[self.task.id])
+        self.assertBumps(
+            self.user, lambda: self.client.patch(url, {"title": "A"}, format="json")
+        )
+        self.assertBumps(
+            self.user, lambda: self.client.patch(url, {"duration": 9}, format="json")
+        )
+        self.assertBumps(
+            self.user,
+            lambda: self.client.delete(reverse("task-delete", args=[self.task.id])),
+        )
+        self.assertEqual(version_of(self.other), 0)
+
+    def test_failed_writes_leave_the_version(self):
+        self.assertBumps(
+            self.user,
+            lambda: self.client.patch(
+                reverse("task-update", args=[9999]), {"title": "A"}, format="json"
+            ),
+            times=0,
+        )
+        self.assertBumps(
+            self.user,
+            lambda: self.client.post(
+                reverse("task-create"), {"title": ""}, format="json"
+            ),
+            times=0,
+        )
+        self.assertBumps(
+            self.user,
+            lambda: self.client.delete(reverse("task-delete", args=[9999])),
+            times=0,
+        )
+
+    def test_bulk_writes(self):
+        """Each bulk request bumps the version once, whatever its size"""
+        url = reverse("task-bulk")
+        response = self.assertBumps(
+            self.user,
+            lambda: self.client.post(
+                url,
+                [{"title": f"T{i}", "duration": i} for i in range(5)],
+                format="json",
+            ),
+        )
+        ids = [item["id"] for item in response.data]
+        self.assertBumps(
+            self.user,
+            lambda: self.client.patch(
+                url, [{"id": task_id, "duration": 1} for task_id in ids], format="json"
+            ),
+        )
+        self.assertBumps(self.user, lambda: self.client.delete(url, ids, format="json"))
+        # Nothing of the user's deleted.
+        self.assertBumps(
+            self.user, lambda: self.client.delete(url, [9999], format="json"), times=0
+        )
+
+    def test_async_writes(self):
+        token = RefreshToken.for_user(self.user).access_token
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertBumps(
+            self.user,
+            lambda: client.post(
+                reverse("async-task-create"),
+                {"title": "New", "duration": 5},
+                format="json",
+            ),
+        )
+        self.assertBumps(
+            self.user,
+            lambda: client.delete(reverse("async-task-delete", args=[self.task.id])),
+        )
+
+    def test_archive(self):
+        old = Task.objects.create(title="Old", duration=1, user=self.other)
+        Task.objects.filter(id=old.id).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        self.assertBumps(
+            self.other,
+            lambda: archive_tasks(timezone.now() - timedelta(days=365)),
+        )
+        self.assertEqual(version_of(self.user), 0)
+
+    def test_bump_creates_missing_rows(self):
+        """Users saved without the post_save signal get their row on bump"""
+        TaskChangeVersion.objects.filter(user=self.other).delete()
+        versions.bump(self.user.id, self.other.id)
+        self.assertGreater(version_of(self.user), 0)
+        self.assertEqual(version_of(self.other), 1)
+
+    def test_bump_is_one_update(self):
+        with self.assertNumQueries(1):
+            versions.bump(self.user.id, self.other.id)
+
+
+class TaskAdminChangeVersionTestCase(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser(username="admin", password="pw")
+        self.client.force_login(admin)
+        self.users = [User.objects.create_user(username=f"user{i}") for i in range(2)]
+        self.tasks = [
+            Task.objects.create(title="Task", duration=1, user=user)
+            for user in self.users
+        ]
+
+    def test_actions(self):
+        """Admin actions bump the version of every user whose tasks changed"""
+        url = reverse("admin:task_app_task_changelist")
+        task_ids = [task.id for task in self.tasks]
+        self.client.post(
+            url,
+            {"action": "set_duration", "_selected_action": task_ids, "duration": 5},
+        )
+        self.assertEqual([version_of(user) for user in self.users], [1, 1])
+        self.client.post(
+            url,
+            {
+                "action": "delete_selected",
+                "_selected_action": task_ids[:1],
+                "post": "yes",
+            },
+        )
+        self.assertEqual([version_of(user) for user in self.users], [2, 1])
+
+    def test_moving_a_task_bumps_both_owners(self):
+        task = self.tasks[0]
+        response = self.client.post(
+            reverse("admin:task_app_task_change", args=[task.id]),
+            {"user": self.users[1].id, "title": "Moved", "duration": 1},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([version_of(user) for user in self.users], [1, 1])
+
+
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="etaguser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title="Task", duration=30, user=self.user)
+        self.other_task = Task.objects.create(title="Other", duration=5, user=self.user)
+
+    def assertNotModified(self, url, headers):
+        """The 304 reads the change version at most, and never a task"""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(len(queries), 1)
+        self.assertIn("task_app_taskchangeversion", queries[0]["sql"])
+        # Once the version is cached, not even that.
+        with self.assertNumQueries(0):
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        return response
+
+    def test_list_validators(self):
+        """Pages carry a strong ETag and the time of the last change"""
+        url = reverse("get-tasks")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertRegex(etag, r'^"0\.[0-9a-f]+"$')
+        changed_at = versions.current(self.user.id)[1]
+        self.assertEqual(response["Last-Modified"], http_date(changed_at.timestamp()))
+
+        not_modified = self.assertNotModified(url, {"If-None-Match": etag})
+        self.assertEqual(not_modified["ETag"], etag)
+        # Other pages and filters have ETags of their own.
+        response = self.client.get(
+            url, {"page_size": 1}, headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_changes_after_writes(self):
+        url = reverse("get-tasks")
+        etag = self.client.get(url)["ETag"]
+        self.client.post(
+            reverse("task-create"), {"title": "New", "duration": 5}, format="json"
+        )
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["title"], "New")
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertNotModified(url, {"If-None-Match": response["ETag"]})
+
+    def test_if_modified_since(self):
+        url = reverse("get-tasks")
+        last_modified = self.client.get(url)["Last-Modified"]
+        self.assertNotModified(url, {"If-Modified-Since": last_modified})
+        earlier = http_date(versions.current(self.user.id)[1].timestamp() - 60)
+        response = self.client.get(url, headers={"If-Modified-Since": earlier})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # If-None-Match takes precedence.
+        response = self.client.get(
+            url, headers={"If-None-Match": '"x"', "If-Modified-Since": last_modified}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_etag_follows_the_task(self):
+        """A task's ETag holds while only the user's other tasks change"""
+        url = reverse("task-detail", args=[self.task.id])
+        etag = self.client.get(url)["ETag"]
+        self.assertNotModified(url, {"If-None-Match": etag})
+
+        self.client.patch(
+            reverse("task-update", args=[self.other_task.id]),
+            {"title": "Changed"},
+            format="json",
+        )
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        # Re-issued for the current version, so the next check is a 304
+        # before reading the task.
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertNotModified(url, {"If-None-Match": response["ETag"]})
+
+        self.client.patch(
+            reverse("task-update", args=[self.task.id]),
+            {"title": "Changed"},
+            format="json",
+        )
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Changed")
+
+    def test_missing_task_has_no_etag(self):
+        response = self.client.get(reverse("task-detail", args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(response.has_header("ETag"))
+
+
+class AsyncConditionalGetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="asyncetag")
+        self.task = Task.objects.create(title="Task", duration=30, user=self.user)
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {"Authorization": f"Bearer {token}"}
+
+    async def test_not_modified(self):
+        for url in (
+            reverse("async-get-tasks"),
+            reverse("async-task-detail", args=[self.task.id]),
+        ):
+            response = await self.async_client.get(url, headers=self.auth)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = await self.async_client.get(
+                url, headers={**self.auth, "If-None-Match": response["ETag"]}
+            )
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
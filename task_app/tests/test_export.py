@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+import tracemalloc
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app.models import Task
+from task_app.serializers import TaskSerializer
+from task_app.views import ExportTaskView
+
+
+class TaskExportTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="exportuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("task-export")
+
+    def create_tasks(self, count, user=None):
+        Task.objects.bulk_create(
+            Task(title=f"Task {i}", duration=i, user=user or self.user)
+            for i in range(count)
+        )
+
+    def export(self, params=None):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        """NDJSON export matches the API's task payloads row for row"""
+        self.create_tasks(3)
+        self.create_tasks(2, user=User.objects.create_user(username="otheruser"))
+        rows = [json.loads(line) for line in self.export().splitlines()]
+
+        tasks = Task.objects.filter(user=self.user).order_by("id")
+        expected = json.loads(json.dumps(TaskSerializer(tasks, many=True).data))
+        self.assertEqual(rows, expected)
+
+    def test_export_csv(self):
+        """CSV export has a header row and one row per task"""
+        self.create_tasks(3)
+        response = self.client.get(self.url, {"format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(
+            rows[0], ["id", "title", "duration", "created_at", "updated_at"]
+        )
+        self.assertEqual([row[1] for row in rows[1:]], ["Task 0", "Task 1", "Task 2"])
+
+    def test_export_filters(self):
+        """Listing filters narrow the export too"""
+        self.create_tasks(5)
+        rows = self.export({"min_duration": 3}).splitlines()
+        self.assertEqual([json.loads(row)["duration"] for row in rows], [3, 4])
+
+    def test_export_unauthorized(self):
+        """Export attempt for unauthenticated user"""
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_one_query_per_chunk(self):
+        """Each chunk is its own bounded keyset query"""
+        self.create_tasks(500)
+        with mock.patch.object(ExportTaskView, "chunk_size", 200):
+            response = self.client.get(self.url)
+            with self.assertNumQueries(3):
+                rows = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(len(rows), 500)
+
+    async def test_export_under_asgi(self):
+        """Under ASGI the export streams as it is read, a chunk at a time"""
+        await sync_to_async(self.create_tasks)(500)
+        token = await sync_to_async(RefreshToken.for_user)(self.user)
+        with mock.patch.object(ExportTaskView, "chunk_size", 200):
+            response = await self.async_client.get(
+                self.url, headers={"Authorization": f"Bearer {token.access_token}"}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.is_async)
+            chunks = response.streaming_content
+            first = await anext(chunks)
+            rest = [chunk async for chunk in chunks]
+        self.assertEqual(len(first.splitlines()), 200)
+        self.assertEqual(len(b"".join([first, *rest]).splitlines()), 500)
+
+    def test_export_memory_bounded(self):
+        """Peak memory does not grow with the number of exported tasks"""
+
+        def peak_memory(count):
+            Task.objects.all().delete()
+            self.create_tasks(count)
+            tracemalloc.start()
+            try:
+                response = self.client.get(self.url)
+                size = sum(len(chunk) for chunk in response.streaming_content)
+                return tracemalloc.get_traced_memory()[1], size
+            finally:
+                tracemalloc.stop()
+
+        with mock.patch.object(ExportTaskView, "chunk_size", 200):
+            small_peak, small_size = peak_memory(200)
+            large_peak, large_size = peak_memory(5000)
+
+        self.assertGreater(large_size, 20 * small_size)
+        self.assertLess(large_peak, 2 * small_peak)
@@ -0,0 +1,337 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app import feed
+from task_app.archive import archive_tasks
+from task_app.models import Task, TaskChangeEvent, TaskIngestKey
+from task_app.tasks import purge_task_events
+
+
+def events_of(user):
+    return list(
+        TaskChangeEvent.objects.filter(user=user)
+        .order_by("id")
+        .values_list("action", "task_ids")
+    )
+
+
+class ChangeEventTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="feeduser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_api_writes(self):
+        response = self.client.post(
+            reverse("task-create"), {"title": "New", "duration": 5}, format="json"
+        )
+        task_id = response.data["id"]
+        self.client.patch(
+            reverse("task-update", args=[task_id]), {"title": "A"}, format="json"
+        )
+        response = self.client.post(
+            reverse("task-bulk"),
+            [{"title": f"T{i}", "duration": i} for i in range(3)],
+            format="json",
+        )
+        ids = [item["id"] for item in response.data]
+        self.client.delete(reverse("task-bulk"), [task_id, *ids], format="json")
+        # Failed writes append nothing.
+        self.client.delete(reverse("task-delete", args=[task_id]))
+        self.assertEqual(
+            events_of(self.user),
+            [
+                ("created", [task_id]),
+                ("updated", [task_id]),
+                ("created", ids),
+                ("deleted", sorted([task_id, *ids])),
+            ],
+        )
+
+    def test_archive(self):
+        task = Task.objects.create(title="Old", duration=1, user=self.user)
+        Task.objects.filter(id=task.id).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        archive_tasks(timezone.now() - timedelta(days=365))
+        self.assertEqual(events_of(self.user), [("archived", [task.id])])
+
+    def test_purge(self):
+        TaskChangeEvent.objects.create(user=self.user, action="created", task_ids=[1])
+        old = TaskChangeEvent.objects.create(
+            user=self.user, action="created", task_ids=[2]
+        )
+        TaskChangeEvent.objects.filter(id=old.id).update(
+            created_at=timezone.now() - timedelta(hours=25)
+        )
+        task = Task.objects.create(title="Queued", duration=1, user=self.user)
+        for key in ["new", "old"]:
+            TaskIngestKey.objects.create(user=self.user, key=key, task=task)
+        TaskIngestKey.objects.filter(key="old").update(
+            created_at=timezone.now() - timedelta(hours=25)
+        )
+        self.assertEqual(
+            purge_task_events(), "Purged 1 change feed events and 1 task keys."
+        )
+        self.assertEqual(events_of(self.user), [("created", [1])])
+        self.assertEqual(TaskIngestKey.objects.get().key, "new")
+        self.assertEqual(purge_task_events(), "Nothing to purge.")
+
+
+class TaskAdminChangeEventTestCase(TestCase):
+    def test_moving_a_task(self):
+        """The previous owner's feed sees the task go"""
+        admin = User.objects.create_superuser(username="admin", password="pw")
+        self.client.force_login(admin)
+        users = [User.objects.create_user(username=f"user{i}") for i in range(2)]
+        task = Task.objects.create(title="Task", duration=1, user=users[0])
+        self.client.post(
+            reverse("admin:task_app_task_change", args=[task.id]),
+            {"user": users[1].id, "title": "Moved", "duration": 1},
+        )
+        self.assertEqual(events_of(users[0]), [("deleted", [task.id])])
+        self.assertEqual(events_of(users[1]), [("updated", [task.id])])
+
+
+@override_settings(TASK_FEED_POLL_INTERVAL=0.01)
+class TaskChangesTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="feeduser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title="Task", duration=30, user=self.user)
+        self.url = reverse("task-changes")
+
+    def changes(self, cursor, **params):
+        return self.client.get(self.url, {"since": cursor, "timeout": 0, **params})
+
+    def start(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["cursor"]
+
+    def create(self, title):
+        return self.client.post(
+            reverse("task-create"), {"title": title, "duration": 5}, format="json"
+        ).data["id"]
+
+    def test_start(self):
+        """Without a cursor, the answer is one at the latest change, at once"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["changed"], [])
+        self.assertEqual(response.data["removed"], [])
+        self.assertEqual(feed.parse_cursor(response.data["cursor"]).event_id, 0)
+
+        self.create("New")
+        cursor = feed.parse_cursor(self.start())
+        self.assertEqual(
+            cursor.event_id, TaskChangeEvent.objects.get(user=self.user).id
+        )
+
+    def test_delta(self):
+        """Changed tasks come with their current payload, newest first, and
+        tasks no longer listed by id"""
+        cursor = self.start()
+        first = self.create("First")
+        second = self.create("Second")
+        self.client.patch(
+            reverse("task-update", args=[first]), {"title": "Edited"}, format="json"
+        )
+        self.client.delete(reverse("task-delete", args=[self.task.id]))
+        # The latest event, the events and the tasks they touched.
+        with self.assertNumQueries(3):
+            response = self.changes(cursor)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(task["id"], task["title"]) for task in response.data["changed"]],
+            [(second, "Second"), (first, "Edited")],
+        )
+        self.assertEqual(
+            response.data["changed"][0],
+            self.client.get(reverse("task-detail", args=[second])).data,
+        )
+        self.assertEqual(response.data["removed"], [self.task.id])
+
+        # Nothing new after the returned cursor.
+        response = self.changes(response.data["cursor"])
+        self.assertEqual(response.data["changed"], [])
+        self.assertEqual(response.data["removed"], [])
+
+    @override_settings(TASK_FEED_MAX_EVENTS=2)
+    def test_events_are_read_in_pages(self):
+        cursor = self.start()
+        ids = [self.create(f"Task {i}") for i in range(3)]
+        response = self.changes(cursor)
+        self.assertEqual([task["id"] for task in response.data["changed"]], ids[1::-1])
+        # The rest, from the next check.
+        response = self.changes(response.data["cursor"])
+        self.assertEqual([task["id"] for task in response.data["changed"]], ids[2:])
+
+    def test_other_users_changes(self):
+        cursor = self.start()
+        other = User.objects.create_user(username="otheruser")
+        Task.objects.create(title="Theirs", duration=1, user=other)
+        feed.record(other.id, "created", [self.task.id])
+        response = self.changes(cursor)
+        self.assertEqual(response.data["changed"], [])
+
+    def test_bad_parameters(self):
+        response = self.changes("abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("since", response.data)
+        response = self.changes(self.start(), timeout=3600)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("timeout", response.data)
+
+    def test_expired_cursor(self):
+        """Events after day-old cursors may be purged: the client reloads"""
+        cursor = feed.Cursor(0, int(time.time()) - 24 * 3600)
+        response = self.changes(feed.format_cursor(cursor))
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_waits_are_refused(self):
+        """Under gunicorn, waiting clients are sent to the ASGI view"""
+        cursor = self.start()
+        response = self.changes(cursor, timeout=10)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("/async/tasks/changes/", response.data["timeout"][0])
+        response = self.client.get(
+            self.url, {"since": cursor}, headers={"Accept": "text/event-stream"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+        response = self.client.get(self.url, {"format": "sse"})
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+        # So does the async view, when a WSGI server runs it.
+        token = RefreshToken.for_user(self.user).access_token
+        client = APIClient(headers={"Authorization": f"Bearer {token}"})
+        url = reverse("async-task-changes")
+        response = client.get(url, {"since": cursor, "timeout": 10})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.get(url, {"format": "sse"})
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+        self.create("New")
+        response = client.get(url, {"since": cursor})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [task["title"] for task in response.json()["changed"]], ["New"]
+        )
+
+
+@override_settings(TASK_FEED_POLL_INTERVAL=0.01)
+class AsyncTaskChangesTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="asyncfeed")
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.url = reverse("async-task-changes")
+
+    async def get(self, params=None, **headers):
+        return await self.async_client.get(
+            self.url, params, headers={**self.auth, **headers}
+        )
+
+    async def create(self, title):
+        response = await self.async_client.post(
+            reverse("async-task-create"),
+            {"title": title, "duration": 5},
+            content_type="application/json",
+            headers=self.auth,
+        )
+        return response.json()["id"]
+
+    async def test_long_poll(self):
+        response = await self.async_client.get(self.url, headers=self.auth)
+        cursor = response.json()["cursor"]
+        task = await Task.objects.acreate(title="New", duration=5, user=self.user)
+        await self.async_client.post(
+            reverse("async-task-create"),
+            {"title": "Other", "duration": 5},
+            content_type="application/json",
+            headers=self.auth,
+        )
+        response = await self.async_client.get(
+            self.url, {"since": cursor, "timeout": 1}, headers=self.auth
+        )
+        changed = response.json()["changed"]
+        self.assertEqual([task["title"] for task in changed], ["Other"])
+        self.assertNotEqual(changed[0]["id"], task.id)
+
+        response = await self.async_client.get(
+            self.url,
+            {"since": response.json()["cursor"], "timeout": 0.02},
+            headers=self.auth,
+        )
+        self.assertEqual(response.json()["changed"], [])
+
+    def test_idle_wait_runs_no_queries(self):
+        # Run from this thread, so that the queries go to its connection.
+        get = async_to_sync(self.get)
+        cursor = get().json()["cursor"]
+        start = time.monotonic()
+        with self.assertNumQueries(0):
+            response = get({"since": cursor, "timeout": 0.05})
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(response.json()["changed"], [])
+        # Issued anew, at the same event.
+        self.assertEqual(
+            feed.parse_cursor(response.json()["cursor"]).event_id,
+            feed.parse_cursor(cursor).event_id,
+        )
+
+    async def test_wait_returns_on_change(self):
+        cursor = (await self.get()).json()["cursor"]
+        sleeps = []
+
+        async def write_while_waiting(seconds):
+            # The first wait is cut short by a change from another request.
+            sleeps.append(seconds)
+            if len(sleeps) == 1:
+                await self.create("Meanwhile")
+
+        with mock.patch("task_app.feed.asyncio.sleep", write_while_waiting):
+            response = await self.get({"since": cursor, "timeout": 10})
+        self.assertEqual(len(sleeps), 1)
+        self.assertEqual(
+            [task["title"] for task in response.json()["changed"]], ["Meanwhile"]
+        )
+
+    @override_settings(TASK_FEED_STREAM_SECONDS=0.1, TASK_FEED_HEARTBEAT_SECONDS=0.05)
+    async def test_event_stream(self):
+        cursor = (await self.get()).json()["cursor"]
+        task_id = await self.create("New")
+        start = time.monotonic()
+        response = await self.get({"since": cursor}, Accept="text/event-stream")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        # Closed after TASK_FEED_STREAM_SECONDS, for the client to reconnect.
+        self.assertLess(time.monotonic() - start, 1)
+        messages = content.decode().split("\n\n")
+        # The cursor the stream starts from, the changes, then heartbeats.
+        self.assertEqual(messages[0], f"id: {cursor}")
+        lines = messages[1].split("\n")
+        self.assertEqual(lines[1], "event: changes")
+        self.assertIn(f'"id":{task_id}', lines[2])
+        self.assertRegex(messages[2], r"^id: \d+\.\d+$")
+        self.assertEqual(messages[-1], "")
+
+        # Reconnecting from the last id sent.
+        last_id = messages[-2].removeprefix("id: ")
+        response = await self.get({"format": "sse"}, **{"Last-Event-ID": last_id})
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertNotIn(b"event: changes", content)
@@ -0,0 +1,297 @@
+from unittest import mock
+
+from celery.app.trace import build_tracer
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from kombu import Queue
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app import ingest, scheduling
+from task_app.models import Task, TaskChangeEvent, TaskIngestKey
+from task_app.tasks import flush_task_buffer
+
+
+def purge_buffer():
+    with ingest._connection() as connection:
+        names = [settings.TASK_INGEST_QUEUE, settings.TASK_INGEST_DEAD_LETTER_QUEUE]
+        for name in names:
+            queue = Queue(name)(connection.default_channel)
+            queue.declare()
+            queue.purge()
+
+
+def dead_letters():
+    with ingest._connection() as connection:
+        queue = Queue(settings.TASK_INGEST_DEAD_LETTER_QUEUE)(
+            connection.default_channel
+        )
+        queue.declare()
+        messages = []
+        while (message := queue.get()) is not None:
+            messages.append(message.payload)
+        return messages
+
+
+@override_settings(TASK_INGEST_BUFFERED=True, TASK_INGEST_BROKER_URL="memory://")
+class BufferedCreateTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        purge_buffer()
+        self.user = User.objects.create_user(username="ingestuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        patcher = mock.patch.object(flush_task_buffer, "apply_async")
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create(self, title, key=None, duration=5):
+        headers = {"Idempotency-Key": key} if key else {}
+        return self.client.post(
+            reverse("task-create"),
+            {"title": title, "duration": duration},
+            format="json",
+            headers=headers,
+        )
+
+    def ingest_status(self, key):
+        return self.client.get(reverse("task-ingest-status", args=[key]))
+
+    def test_accepted(self):
+        """The task is queued, not written, and a flush is scheduled once"""
+        with self.assertNumQueries(0):
+            response = self.create("Queued")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        key = response.data["key"]
+        self.assertEqual(response.data["status"], "pending")
+        self.assertEqual(
+            response["Location"], reverse("task-ingest-status", args=[key])
+        )
+        self.create("Another")
+        self.assertFalse(Task.objects.exists())
+        self.apply_async.assert_called_once_with(countdown=1)
+
+        response = self.ingest_status(key)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data, {"key": key, "status": "pending"})
+
+    def test_flush(self):
+        keys = [self.create(f"Task {i}", duration=i).data["key"] for i in range(3)]
+        self.assertEqual(flush_task_buffer(), "Created 3 buffered tasks.")
+        tasks = list(Task.objects.order_by("id").values_list("title", "duration"))
+        self.assertEqual(tasks, [(f"Task {i}", i) for i in range(3)])
+
+        response = self.ingest_status(keys[1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {
+                "key": keys[1],
+                "status": "created",
+                "task_id": Task.objects.get(title="Task 1").id,
+            },
+        )
+        # Like any other write: listed at once, in the stats and in the feed.
+        response = self.client.get(reverse("get-tasks"))
+        self.assertEqual(len(response.data["results"]), 3)
+        response = self.client.get(reverse("task-stats"))
+        self.assertEqual(response.data["task_count"], 3)
+        self.assertEqual(
+            list(TaskChangeEvent.objects.values_list("action", flat=True)),
+            ["created"],
+        )
+        self.assertEqual(flush_task_buffer(), "Nothing to flush.")
+
+    def test_idempotency_key(self):
+        """A task submitted again under its key is queued and created once"""
+        first = self.create("Once", key="client-key-1")
+        second = self.create("Once", key="client-key-1")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.data["key"], "client-key-1")
+        flush_task_buffer()
+        self.assertEqual(Task.objects.count(), 1)
+
+        # Also once created.
+        self.create("Once", key="client-key-1")
+        self.assertEqual(flush_task_buffer(), "Nothing to flush.")
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_redelivery(self):
+        """Tasks delivered again after their batch committed are skipped"""
+        items = [
+            {"user_id": self.user.id, "key": key, "task": {"title": key, "duration": 0}}
+            for key in "ab"
+        ]
+        self.assertEqual(ingest.write(items), 2)
+        self.assertEqual(ingest.write([*items, {**items[0], "key": "c"}]), 1)
+        self.assertEqual(
+            sorted(TaskIngestKey.objects.values_list("key", flat=True)),
+            ["a", "b", "c"],
+        )
+
+    def test_failed_batch_is_requeued(self):
+        """A batch the database could not take goes back to the queue, and
+        the flush schedules its own retry, with no further submission needed"""
+        self.create("Retried")
+        self.apply_async.reset_mock()
+        # As a worker runs it, where a retry is sent to the broker.
+        run = build_tracer(
+            flush_task_buffer.name, flush_task_buffer, app=flush_task_buffer.app
+        )
+        with mock.patch.object(ingest, "write", side_effect=OperationalError):
+            run("flush-1", (), {}, {"retries": 0})
+            run("flush-2", (), {}, {"retries": 3})
+            # Called directly, the error is raised.
+            with self.assertRaises(OperationalError):
+                flush_task_buffer()
+        first, later = self.apply_async.call_args_list
+        # Backing off exponentially, with jitter.
+        self.assertLessEqual(first.kwargs["countdown"], 1)
+        self.assertLessEqual(later.kwargs["countdown"], 8)
+        self.assertEqual(later.kwargs["retries"], 4)
+        self.assertFalse(Task.objects.exists())
+
+        self.assertEqual(flush_task_buffer(), "Created 1 buffered tasks.")
+        self.assertEqual(Task.objects.get().title, "Retried")
+
+    def test_failing_task_is_dead_lettered(self):
+        """A task that cannot be written is set aside, not retried forever"""
+        write = ingest.write
+
+        def failing_write(items):
+            if any(item["key"] == "poison" for item in items):
+                raise ValueError("cannot be written")
+            return write(items)
+
+        self.create("Before")
+        self.create("Poison", key="poison")
+        self.create("After")
+        with mock.patch.object(ingest, "write", side_effect=failing_write):
+            with self.assertLogs("task_app.ingest", "ERROR"):
+                self.assertEqual(flush_task_buffer(), "Created 2 buffered tasks.")
+        self.assertEqual(
+            sorted(Task.objects.values_list("title", flat=True)), ["After", "Before"]
+        )
+        self.assertEqual(flush_task_buffer(), "Nothing to flush.")
+        [dead] = dead_letters()
+        self.assertEqual(dead["key"], "poison")
+        self.assertEqual(dead["task"]["title"], "Poison")
+
+        response = self.ingest_status("poison")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"key": "poison", "status": "failed"})
+
+    def test_flush_without_returned_ids(self):
+        """Tasks get their keys on databases not returning bulk inserted ids"""
+        keys = [self.create(f"Task {i}").data["key"] for i in range(3)]
+        features = type(connection.features)
+        with mock.patch.object(features, "can_return_rows_from_bulk_insert", False):
+            self.assertEqual(flush_task_buffer(), "Created 3 buffered tasks.")
+        for i, key in enumerate(keys):
+            response = self.ingest_status(key)
+            self.assertEqual(
+                response.data["task_id"], Task.objects.get(title=f"Task {i}").id
+            )
+
+    @override_settings(TASK_INGEST_BATCH_SIZE=2)
+    def test_batches(self):
+        for i in range(5):
+            self.create(f"Task {i}")
+        self.apply_async.reset_mock()
+        with mock.patch.object(ingest, "write", wraps=ingest.write) as write:
+            self.assertEqual(
+                flush_task_buffer(max_batches=2), "Created 4 buffered tasks."
+            )
+            batches = [len(call.args[0]) for call in write.call_args_list]
+        self.assertEqual(batches, [2, 2])
+        # The rest is flushed by the next run, queued right away.
+        self.apply_async.assert_called_once_with(kwargs={"max_batches": 2})
+        self.assertEqual(
+            flush_task_buffer(max_batches=2), "Created 1 buffered tasks."
+        )
+        self.assertEqual(Task.objects.count(), 5)
+
+    def test_batch_query_count(self):
+        other = User.objects.create_user(username="otheruser")
+        items = [
+            {"user_id": user.id, "key": str(i), "task": {"title": "T", "duration": i}}
+            for user in [self.user, other]
+            for i in range(50)
+        ]
+        # The SELECT of the keys already done, the INSERTs of the tasks and
+        # their keys, then per user a summary UPDATE, the INSERT it falls back
+        # to in its own savepoint, and the title index INSERT, then the change
+        # version UPDATE and the change feed INSERT of both users, wrapped in
+        # the savepoint atomic() becomes inside the test transaction.
+        with self.assertNumQueries(17):
+            self.assertEqual(ingest.write(items), 100)
+
+    def test_overlapping_runs(self):
+        """A run finding another in progress leaves the tasks to a later one"""
+        self.create("Queued")
+        # The flush scheduled by the submission has started.
+        cache.delete("ingest:flush-scheduled")
+        self.apply_async.reset_mock()
+        with scheduling.single_flight(flush_task_buffer.name, 60):
+            self.assertEqual(flush_task_buffer(), "Another flush in progress.")
+        self.assertFalse(Task.objects.exists())
+        self.apply_async.assert_called_once_with(countdown=1)
+
+    def test_bad_requests(self):
+        response = self.create("Bad key", key="not a key!")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Idempotency-Key", response.data)
+        response = self.client.post(
+            reverse("task-create"), {"duration": 5}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("title", response.data)
+        self.assertFalse(self.apply_async.called)
+
+    def test_other_users_keys(self):
+        key = self.create("Mine").data["key"]
+        flush_task_buffer()
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username="otheruser"))
+        response = other.get(reverse("task-ingest-status", args=[key]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.ingest_status("unknown")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(TASK_INGEST_BUFFERED=False)
+    def test_unbuffered(self):
+        response = self.create("Direct")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(self.apply_async.called)
+
+
+@override_settings(TASK_INGEST_BUFFERED=True, TASK_INGEST_BROKER_URL="memory://")
+class AsyncBufferedCreateTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        purge_buffer()
+        self.user = User.objects.create_user(username="asyncingest")
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {"Authorization": f"Bearer {token}"}
+        patcher = mock.patch.object(flush_task_buffer, "apply_async")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_accepted(self):
+        response = await self.async_client.post(
+            reverse("async-task-create"),
+            {"title": "Queued", "duration": 5},
+            content_type="application/json",
+            headers={**self.auth, "Idempotency-Key": "async-1"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json(), {"key": "async-1", "status": "pending"})
+        self.assertEqual(
+            response["Location"], reverse("task-ingest-status", args=["async-1"])
+        )
+        self.assertFalse(await Task.objects.aexists())
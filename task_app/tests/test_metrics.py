@@ -0,0 +1,136 @@
+import re
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app import cache as task_cache
+from task_app import metrics
+from task_app.models import Task
+
+
+SCRAPER = {"Authorization": "Bearer scrape-token"}
+
+
+@override_settings(
+    METRICS_ENABLED=True, METRICS_SAMPLE_RATE=1.0, METRICS_TOKEN="scrape-token"
+)
+class MetricsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        task_cache.reset_stats()
+        self.user = User.objects.create_user(username="metricsuser")
+        Task.objects.create(title="Task", duration=30, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"), headers=SCRAPER)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        return response.content.decode()
+
+    def test_server_timing_header(self):
+        """Sampled responses report total, database and serializer time"""
+        response = self.client.get(reverse("get-tasks"))
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="2 queries", '
+            r"serialize;dur=[\d.]+$",
+        )
+        serialize = float(
+            re.search(r"serialize;dur=([\d.]+)", response["Server-Timing"])[1]
+        )
+        self.assertGreater(serialize, 0)
+
+    def test_metrics_endpoint(self):
+        """Per-view latency, queries and response sizes are exported"""
+        for _ in range(2):
+            self.client.get(reverse("get-tasks"))
+        body = self.scrape()
+        self.assertIn(
+            'http_request_duration_seconds_count{view="get-tasks",method="GET"} 2',
+            body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="get-tasks",method="GET",'
+            'le="+Inf"} 2',
+            body,
+        )
+        self.assertIn(
+            'http_requests_total{view="get-tasks",method="GET",status="200"} 2', body
+        )
+        # The change version and the page, then the second read is served
+        # from the task cache.
+        self.assertIn('db_queries_total{view="get-tasks"} 2', body)
+        self.assertIn('http_response_size_bytes_count{view="get-tasks"} 2', body)
+        self.assertIn('task_cache_requests_total{outcome="hit"} 2', body)
+        self.assertRegex(
+            body, r'serialization_duration_seconds_total\{view="get-tasks"\} [\d.e-]+\n'
+        )
+
+    def test_sampling(self):
+        """Requests outside the sample are neither timed nor recorded"""
+        with override_settings(METRICS_SAMPLE_RATE=0.5):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            with mock.patch("random.random", side_effect=[0.9, 0.1]):
+                skipped = client.get(reverse("get-tasks"))
+                sampled = client.get(reverse("get-tasks"))
+        self.assertNotIn("Server-Timing", skipped)
+        self.assertIn("Server-Timing", sampled)
+        self.assertIn(
+            'http_request_duration_seconds_count{view="get-tasks",method="GET"} 1',
+            self.scrape(),
+        )
+
+    async def test_async_requests(self):
+        """Under ASGI the middleware runs without a thread of its own and
+        still counts the queries the views run through sync_to_async"""
+
+        async def view(request):
+            pass
+
+        self.assertTrue(iscoroutinefunction(metrics.MetricsMiddleware(view)))
+        token = await sync_to_async(RefreshToken.for_user)(self.user)
+        response = await self.async_client.get(
+            reverse("async-get-tasks"),
+            headers={"Authorization": f"Bearer {token.access_token}"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="[1-9]\d* queries", ',
+        )
+        response = await self.async_client.get(reverse("metrics"), headers=SCRAPER)
+        self.assertIn(
+            'http_request_duration_seconds_count{view="async-get-tasks",'
+            'method="GET"} 1',
+            response.content.decode(),
+        )
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        """Disabled metrics add no header and hide the endpoint"""
+        response = self.client.get(reverse("get-tasks"))
+        self.assertNotIn("Server-Timing", response)
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_endpoint_requires_token(self):
+        """Only scrapers presenting METRICS_TOKEN see the metrics"""
+        url = reverse("metrics")
+        for headers in [{}, {"Authorization": "Bearer wrong"}]:
+            response = self.client.get(url, headers=headers)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="metrics"')
+        with override_settings(METRICS_TOKEN=""):
+            response = self.client.get(url, headers=SCRAPER)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,100 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from task_app.models import Task
+
+
+class TaskQueryCountTestCase(APITestCase):
+    """Per-request query budgets for the task endpoints.
+
+    Authentication is forced so only the queries issued by the views count.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="queryuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title="Test Task", duration=30, user=self.user)
+        # Writes then adjust today's existing summary row.
+        call_command("rebuild_task_summaries", stdout=io.StringIO())
+
+    def test_create_query_count(self):
+        """Task creation is an INSERT plus the summary, title index, change
+        version and change feed writes"""
+        # All inside the savepoint atomic() becomes in the test transaction.
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                reverse("task-create"), {"title": "New", "duration": 5}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_list_query_count(self):
+        """A page of tasks is a single SELECT regardless of table size"""
+        Task.objects.bulk_create(
+            Task(title=f"Task {i}", duration=i, user=self.user) for i in range(50)
+        )
+        # After the user's change version, cached for the next page.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("get-tasks"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_query_count(self):
+        """Task retrieval is a single SELECT, plus the archive's when not found"""
+        # After the user's change version, cached for the next read.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("task-detail", args=[self.task.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("task-detail", args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_query_count(self):
+        """Task update is a conditional UPDATE, index upkeep and a read back"""
+        url = reverse("task-update", args=[self.task.id])
+        # A new title replaces the task's title index entries, bumps the
+        # change version and appends a change feed event, in a savepoint.
+        with self.assertNumQueries(8):
+            response = self.client.patch(url, {"title": "Updated"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # A new duration also reads the old one under a row lock and adjusts
+        # the summary, in a savepoint.
+        with self.assertNumQueries(8):
+            response = self.client.patch(url, {"duration": 45}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        url = reverse("task-update", args=[9999])
+        with self.assertNumQueries(3):
+            response = self.client.patch(url, {"title": "Updated"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_invalid_data_query_count(self):
+        """Invalid update payloads are rejected before touching the database"""
+        url = reverse("task-update", args=[self.task.id])
+        with self.assertNumQueries(0):
+            response = self.client.patch(url, {"duration": "long"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_delete_query_count(self):
+        """Task deletion locks the row, deletes it, its summary and index entries"""
+        # SELECT ... FOR UPDATE, the soft-delete, summary and version UPDATEs,
+        # the index DELETE and the change feed INSERT inside a savepoint.
+        with self.assertNumQueries(8):
+            response = self.client.delete(reverse("task-delete", args=[self.task.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(3):
+            response = self.client.delete(reverse("task-delete", args=[self.task.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,161 @@
+import io
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, router, transaction
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app import routing
+from task_app.models import Task
+from task_app.tasks import print_task_details
+
+REPLICAS = ["replica_0", "replica_1"]
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class PrimaryReplicaRoutingTestCase(TransactionTestCase):
+    """Routing between the test database and two more connections to it,
+    standing in for replicas."""
+
+    def setUp(self):
+        cache.clear()
+        default = connections["default"]
+        for alias in REPLICAS:
+            connections[alias] = type(default)(default.settings_dict, alias)
+        self.user = User.objects.create_user(username="routeduser")
+        self.other = User.objects.create_user(username="otheruser")
+        Task.objects.create(title="Task", duration=30, user=self.user)
+        self.client = self.client_for(self.user)
+
+    def tearDown(self):
+        for alias in REPLICAS:
+            connections[alias].close()
+            del connections[alias]
+
+    def client_for(self, user):
+        client = APIClient()
+        token = RefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    @contextmanager
+    def count_queries(self):
+        """Yield a dict filled with the number of queries run on the primary
+        and on the replicas."""
+        counts = {}
+        with ExitStack() as stack:
+            captured = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in ["default", *REPLICAS]
+            }
+            yield counts
+        counts["primary"] = len(captured["default"])
+        counts["replicas"] = sum(len(captured[alias]) for alias in REPLICAS)
+
+    def test_request_reads_go_to_replicas(self):
+        with self.count_queries() as counts:
+            response = self.client.get(reverse("get-tasks"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        # The user, the change version and the page.
+        self.assertEqual(counts, {"primary": 0, "replicas": 3})
+
+    def test_writers_read_from_the_primary(self):
+        """After a write, the user's reads stick to the primary for a while"""
+        with self.count_queries() as counts:
+            response = self.client.post(
+                reverse("task-create"), {"title": "New", "duration": 5}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Only the user lookup, before the write.
+        self.assertEqual(counts["replicas"], 1)
+
+        with self.count_queries() as counts:
+            response = self.client.get(reverse("get-tasks"))
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(counts, {"primary": 2, "replicas": 0})
+
+        # Other users keep reading from the replicas.
+        with self.count_queries() as counts:
+            self.client_for(self.other).get(reverse("get-tasks"))
+        self.assertEqual(counts["primary"], 0)
+
+        # Until the pin expires.
+        cache.clear()
+        with self.count_queries() as counts:
+            self.client.get(reverse("get-tasks"))
+        self.assertEqual(counts["primary"], 0)
+
+    def test_sticky_window(self):
+        with override_settings(DB_PRIMARY_STICKY_SECONDS=0):
+            self.client.delete(reverse("task-delete", args=[Task.objects.get().id]))
+        with self.count_queries() as counts:
+            self.client.get(reverse("get-tasks"))
+        self.assertEqual(counts["primary"], 0)
+
+    async def test_session_users_under_asgi(self):
+        """The async middleware routes session users who wrote recently to the
+        primary"""
+
+        async def get_response(request):
+            return HttpResponse(Task.objects.all().db)
+
+        middleware = routing.PrimaryReplicaMiddleware(get_response)
+
+        async def read_as(user):
+            client = APIClient()
+            await sync_to_async(client.force_login)(user)
+            request = AsyncRequestFactory().get("/")
+            session = client.cookies[settings.SESSION_COOKIE_NAME].value
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = session
+            SessionMiddleware(get_response).process_request(request)
+            AuthenticationMiddleware(get_response).process_request(request)
+            return (await middleware(request)).content.decode()
+
+        await sync_to_async(routing.pin)(self.user.pk)
+        self.assertEqual(await read_as(self.user), routing.PRIMARY)
+        self.assertIn(await read_as(self.other), REPLICAS)
+
+    def test_reads_outside_requests(self):
+        """Jobs read from the primary unless they opt into the replicas"""
+        self.assertEqual(Task.objects.all().db, routing.PRIMARY)
+        with routing.replica_reads():
+            self.assertIn(Task.objects.all().db, REPLICAS)
+            # Transactions still read their own writes.
+            with transaction.atomic():
+                self.assertEqual(Task.objects.all().db, routing.PRIMARY)
+            self.assertEqual(router.db_for_write(Task), routing.PRIMARY)
+
+    def test_batch_readers_use_replicas(self):
+        with self.count_queries() as counts:
+            call_command("print_tasks", format="ndjson", stdout=io.StringIO())
+        self.assertEqual(counts, {"primary": 0, "replicas": 1})
+
+        with self.count_queries() as counts:
+            print_task_details(user_id=self.user.id)
+        # The cursor is read and written on the primary.
+        self.assertEqual(counts["replicas"], 1)
+
+    def test_migrations_skip_replicas(self):
+        self.assertFalse(router.allow_migrate("replica_0", "task_app"))
+        self.assertTrue(router.allow_migrate("default", "task_app"))
+
+
+class RoutingWithoutReplicasTestCase(TransactionTestCase):
+    def test_everything_uses_default(self):
+        with routing.replica_reads():
+            self.assertEqual(Task.objects.all().db, "default")
+        routing.pin(1)
+        self.assertIsNone(cache.get("db:primary:1"))
@@ -0,0 +1,252 @@
+import io
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from task_app.models import Task, TaskChangeEvent, TaskTitleToken
+from task_app.search import matching_task_ids, tokenize
+
+
+def indexed_tokens():
+    return {
+        (task_id, token)
+        for task_id, token in TaskTitleToken.objects.values_list("task_id", "token")
+    }
+
+
+def expected_tokens():
+    return {
+        (task_id, token)
+        for task_id, title in Task.objects.values_list("id", "title")
+        for token in tokenize(title)
+    }
+
+
+class TaskSearchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="searchuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("task-search")
+
+    def create(self, title, client=None):
+        response = (client or self.client).post(
+            reverse("task-create"), {"title": title, "duration": 5}, format="json"
+        )
+        return response.data["id"]
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {"q": q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task["title"] for task in response.data["results"]]
+
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("Fix the LOGIN page, fix it-now!"),
+            {"fix", "the", "login", "page", "it", "now"},
+        )
+        self.assertEqual(tokenize("Café naïve"), {"café", "naïve"})
+        self.assertEqual(tokenize("x" * 100), {"x" * 64})
+
+    def test_search_matches_word_prefixes(self):
+        """Every term has to start a word of the title, in any case"""
+        self.create("Write the quarterly report")
+        self.create("Report bug in login")
+        self.create("Deploy reporting service")
+        self.create("Reportage")
+
+        self.assertEqual(
+            self.search("report"),
+            [
+                "Reportage",
+                "Deploy reporting service",
+                "Report bug in login",
+                "Write the quarterly report",
+            ],
+        )
+        self.assertEqual(self.search("REPORT login"), ["Report bug in login"])
+        self.assertEqual(self.search("quart rep"), ["Write the quarterly report"])
+        self.assertEqual(self.search("port"), [])
+        self.assertEqual(
+            self.search("report", page_size=2),
+            ["Reportage", "Deploy reporting service"],
+        )
+
+    def test_terms_ending_in_any_character(self):
+        """Terms ending in the last letter or digit match like any other, on
+        collations that do not sort by code point too"""
+        self.create("Pop quiz")
+        self.create("Quizzes to grade")
+        self.create("Budget 2019")
+        self.create("Archive 20190 logs")
+
+        self.assertEqual(self.search("quiz"), ["Quizzes to grade", "Pop quiz"])
+        self.assertEqual(self.search("2019"), ["Archive 20190 logs", "Budget 2019"])
+        self.assertEqual(self.search("z"), [])
+        # A prefix match, not a range up to "qui{".
+        self.assertIn("LIKE", str(matching_task_ids("quiz").query))
+
+    def test_search_is_per_user(self):
+        other = APIClient()
+        other.force_authenticate(user=User.objects.create_user(username="other"))
+        self.create("Shared word", client=other)
+        self.create("Shared word")
+        self.assertEqual(self.search("shared"), ["Shared word"])
+
+    def test_search_validation(self):
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.create("Anything")
+        self.assertEqual(self.search("!!! ..."), [])
+
+    def test_search_combines_with_filters(self):
+        """The listing filters and cursor pagination apply to search results"""
+        for duration in (5, 50):
+            self.client.post(
+                reverse("task-create"),
+                {"title": "Long task", "duration": duration},
+                format="json",
+            )
+        response = self.client.get(self.url, {"q": "long", "min_duration": 10})
+        self.assertEqual([t["duration"] for t in response.data["results"]], [50])
+
+    def test_search_query_count(self):
+        """A search is one SELECT with the index lookups as subqueries"""
+        for i in range(20):
+            self.create(f"Task number {i}")
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"q": "task 1"})
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_index_follows_writes(self):
+        """Creates, retitles and deletes through the API keep the index exact"""
+        first = self.create("Alpha beta")
+        second = self.create("Gamma")
+        self.client.patch(
+            reverse("task-update", args=[first]), {"title": "Delta"}, format="json"
+        )
+        self.client.patch(
+            reverse("task-update", args=[second]), {"duration": 9}, format="json"
+        )
+        bulk = self.client.post(
+            reverse("task-bulk"),
+            [
+                {"title": "Bulk one", "duration": 1},
+                {"title": "Bulk two", "duration": 2},
+            ],
+            format="json",
+        ).data
+        self.client.patch(
+            reverse("task-bulk"),
+            [{"id": bulk[0]["id"], "title": "Renamed"}, {"id": second, "duration": 3}],
+            format="json",
+        )
+        self.assertEqual(indexed_tokens(), expected_tokens())
+        self.assertEqual(self.search("alpha"), [])
+        self.assertEqual(self.search("renamed"), ["Renamed"])
+
+        self.client.delete(reverse("task-delete", args=[first]))
+        self.client.delete(reverse("task-bulk"), [bulk[1]["id"]], format="json")
+        self.assertEqual(indexed_tokens(), expected_tokens())
+        self.assertEqual(self.search("delta"), [])
+
+    def test_bulk_create_without_returned_ids(self):
+        """Tasks created in bulk are indexed, and recorded in the change feed,
+        under their ids when the INSERT does not return them"""
+        features = type(connection.features)
+        with mock.patch.object(features, "can_return_rows_from_bulk_insert", False):
+            response = self.client.post(
+                reverse("task-bulk"),
+                [{"title": f"Bulk entry {i}", "duration": i} for i in range(3)],
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(indexed_tokens(), expected_tokens())
+        self.assertEqual(len(self.search("bulk entry")), 3)
+        self.assertEqual(
+            TaskChangeEvent.objects.get(user=self.user).task_ids,
+            list(Task.objects.order_by("id").values_list("id", flat=True)),
+        )
+
+    def test_rebuild_command(self):
+        """The rebuild indexes tasks written around the API and drops stale rows"""
+        Task.objects.bulk_create(
+            Task(title=f"Imported task {i}", duration=i, user=self.user)
+            for i in range(5)
+        )
+        for task_id in (997, 998, 999):
+            TaskTitleToken.objects.create(user=self.user, task_id=task_id, token="x")
+        stdout = io.StringIO()
+        call_command("rebuild_task_search_index", "--batch-size", "2", stdout=stdout)
+        self.assertEqual(
+            stdout.getvalue().strip(),
+            "Reindexed 5 tasks, removed 3 stale index entries.",
+        )
+        self.assertEqual(indexed_tokens(), expected_tokens())
+        self.assertEqual(len(self.search("imported")), 4)
+
+
+class TaskAdminSearchTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="pw")
+        self.client.force_login(self.admin)
+        self.owner = User.objects.create_user(username="owner")
+        client = APIClient()
+        client.force_authenticate(user=self.owner)
+        for title in ("Quarterly report", "Plan the offsite", "Report review"):
+            client.post(
+                reverse("task-create"), {"title": title, "duration": 5}, format="json"
+            )
+        self.url = reverse("admin:task_app_task_changelist")
+
+    def changelist(self, q):
+        response = self.client.get(self.url, {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return sorted(task.title for task in response.context["cl"].result_list)
+
+    def test_admin_search_uses_index(self):
+        """Admin search matches title words and exact usernames, without
+        LIKE '%term%' scans"""
+        self.assertEqual(
+            self.changelist("report"), ["Quarterly report", "Report review"]
+        )
+        self.assertEqual(
+            self.changelist("owner"),
+            sorted(["Quarterly report", "Plan the offsite", "Report review"]),
+        )
+        self.assertEqual(self.changelist("own"), [])
+
+        # Session, user, count, the page and the date hierarchy's two.
+        with self.assertNumQueries(6) as queries:
+            self.client.get(self.url, {"q": "report"})
+        self.assertFalse(
+            any("'%report" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_admin_edits_update_index(self):
+        task = Task.objects.get(title="Plan the offsite")
+        response = self.client.post(
+            reverse("admin:task_app_task_change", args=[task.id]),
+            {"user": self.owner.id, "title": "Plan the retreat", "duration": 5},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.client.post(
+            reverse("admin:task_app_task_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": [Task.objects.get(title="Report review").id],
+                "post": "yes",
+            },
+        )
+        self.assertEqual(indexed_tokens(), expected_tokens())
+        self.assertEqual(self.changelist("retreat"), ["Plan the retreat"])
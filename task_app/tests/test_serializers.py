@@ -0,0 +1,144 @@
+import datetime
+import decimal
+import json
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+
+from task_app.models import Task
+from task_app.renderers import FastJSONRenderer
+from task_app.serializers import TASK_FIELDS, TaskSerializer, task_payloads
+
+TITLES = [
+    "Plain task",
+    "Naïve café ✓",
+    "Emoji 🚀 and 漢字",
+    'Quotes " and \\ backslashes',
+    "Line\u2028and paragraph\u2029separators",
+    "Control \t\n characters",
+]
+
+
+class TaskPayloadTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="payloaduser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        created_at = timezone.make_aware(datetime.datetime(2024, 5, 1, 12, 30, 15))
+        Task.objects.bulk_create(
+            Task(
+                title=title,
+                duration=i * 7,
+                user=self.user,
+                created_at=created_at + datetime.timedelta(microseconds=i * 123457),
+                updated_at=created_at + datetime.timedelta(days=i),
+            )
+            for i, title in enumerate(TITLES)
+        )
+        # auto_now(_add) ignores the values above on insert.
+        for i, task in enumerate(Task.objects.order_by("id")):
+            Task.objects.filter(id=task.id).update(
+                created_at=created_at + datetime.timedelta(microseconds=i * 123457),
+                updated_at=created_at + datetime.timedelta(days=i),
+            )
+        self.tasks = Task.objects.filter(user=self.user).order_by("-id")
+
+    def assert_same_json(self, fast_data, serializer_data):
+        self.assertEqual(
+            FastJSONRenderer().render(fast_data), JSONRenderer().render(serializer_data)
+        )
+
+    def test_task_payloads_match_serializer(self):
+        """values() payloads render to the same bytes as TaskSerializer's"""
+        payloads = task_payloads(list(self.tasks.values(*TASK_FIELDS)))
+        expected = TaskSerializer(self.tasks, many=True).data
+        self.assertEqual(payloads, expected)
+        self.assert_same_json(payloads, expected)
+
+    @override_settings(TIME_ZONE="Asia/Karachi")
+    def test_task_payloads_in_local_time_zone(self):
+        """Timestamps are converted to the current time zone like DRF does"""
+        payloads = task_payloads(list(self.tasks.values(*TASK_FIELDS)))
+        self.assertTrue(payloads[0]["created_at"].endswith("+05:00"))
+        self.assert_same_json(payloads, TaskSerializer(self.tasks, many=True).data)
+
+    def test_list_response_bytes(self):
+        """The list endpoint returns the bytes the serializer would have"""
+        response = self.client.get(reverse("get-tasks"), {"page_size": 100})
+        expected = response.json()
+        expected["results"] = TaskSerializer(self.tasks, many=True).data
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+
+    def test_detail_response_bytes(self):
+        """Retrieve and update return the bytes the serializer would have"""
+        task = self.tasks[1]
+        response = self.client.get(reverse("task-detail", args=[task.id]))
+        self.assertEqual(
+            response.content, JSONRenderer().render(TaskSerializer(task).data)
+        )
+
+        response = self.client.patch(
+            reverse("task-update", args=[task.id]), {"duration": 99}, format="json"
+        )
+        task.refresh_from_db()
+        self.assertEqual(
+            response.content, JSONRenderer().render(TaskSerializer(task).data)
+        )
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    def assert_same_bytes(self, data, **kwargs):
+        self.assertEqual(
+            FastJSONRenderer().render(data, **kwargs),
+            JSONRenderer().render(data, **kwargs),
+        )
+
+    def test_matches_json_renderer(self):
+        """Output is byte for byte JSONRenderer's for the types DRF encodes"""
+        errors = serializers.ValidationError({"title": ["This field is required."]})
+        values = [
+            errors.detail,
+            {"nested": [{"a": 1, "b": [True, False, None]}], "empty": {}},
+            [1, -2, 0, 2**63 - 1],
+            (1, 2, 3),
+            "Line\u2028and paragraph\u2029separators with ✓ and 🚀",
+            timezone.make_aware(datetime.datetime(2024, 5, 1, 12, 30, 15, 123456)),
+            datetime.datetime(2024, 5, 1, 12, 30, 15),
+            datetime.date(2024, 5, 1),
+            datetime.time(12, 30, 15, 123456),
+            datetime.timedelta(days=1, seconds=5),
+            decimal.Decimal("12.50"),
+            uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            gettext_lazy("Task not found"),
+            {1: "integer keys"},
+            2**70,
+        ]
+        for value in values:
+            with self.subTest(value=value):
+                self.assert_same_bytes(value)
+                self.assert_same_bytes({"value": value})
+
+    def test_indented_output(self):
+        """Indented output, as requested by the browsable API, is unchanged"""
+        data = {"results": [{"id": 1, "title": "Task"}]}
+        self.assert_same_bytes(data, renderer_context={"indent": 4})
+        self.assert_same_bytes(data, accepted_media_type="application/json; indent=2")
+
+    def test_empty_body(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_without_orjson(self):
+        """Without orjson installed, the stdlib encoder produces the same bytes"""
+        data = {"title": "Naïve café ✓\u2028", "duration": 5}
+        expected = FastJSONRenderer().render(data)
+        with mock.patch("task_app.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+        self.assertEqual(json.loads(expected), data)
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Prints the settings the profile picked by the environment ends up with.
+SCRIPT = """
+import json
+from django.conf import settings
+print(json.dumps({
+    "DEBUG": settings.DEBUG,
+    "ALLOWED_HOSTS": settings.ALLOWED_HOSTS,
+    "DATABASE": settings.DATABASES["default"],
+    "CACHE": settings.CACHES["default"]["BACKEND"],
+    "LOADERS": settings.TEMPLATES[0]["OPTIONS"].get("loaders"),
+}))
+"""
+
+# Variables the settings read, cleared so the host's do not leak in.
+ENVIRONMENT = (
+    "DJANGO_ENV",
+    "DJANGO_DEBUG",
+    "DJANGO_SECRET_KEY",
+    "DJANGO_ALLOWED_HOSTS",
+    "CACHE_URL",
+    "DB_CONN_MAX_AGE",
+)
+
+
+class SettingsProfileTestCase(SimpleTestCase):
+    def load(self, **environ):
+        """The settings of a fresh process with ``environ`` set."""
+        env = {k: v for k, v in os.environ.items() if k not in ENVIRONMENT}
+        env.update(environ, DJANGO_SETTINGS_MODULE="selteq_task.settings")
+        return subprocess.run(
+            [sys.executable, "-c", SCRIPT],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+    def test_development(self):
+        result = self.load()
+        self.assertEqual(result.returncode, 0, result.stderr)
+        loaded = json.loads(result.stdout)
+        self.assertFalse(loaded["DEBUG"])
+        self.assertIn("localhost", loaded["ALLOWED_HOSTS"])
+
+        result = self.load(DJANGO_DEBUG="1")
+        self.assertTrue(json.loads(result.stdout)["DEBUG"])
+
+    def test_production(self):
+        result = self.load(
+            DJANGO_ENV="prod",
+            DJANGO_SECRET_KEY="secret",
+            DJANGO_ALLOWED_HOSTS="tasks.example.com",
+            CACHE_URL="redis://redis:6380/1",
+            DB_HOST="db.example.com",
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        loaded = json.loads(result.stdout)
+        self.assertFalse(loaded["DEBUG"])
+        self.assertEqual(loaded["ALLOWED_HOSTS"], ["tasks.example.com"])
+        self.assertEqual(loaded["DATABASE"]["HOST"], "db.example.com")
+        self.assertEqual(loaded["DATABASE"]["CONN_MAX_AGE"], 60)
+        self.assertTrue(loaded["DATABASE"]["CONN_HEALTH_CHECKS"])
+        self.assertEqual(
+            loaded["CACHE"], "django.core.cache.backends.redis.RedisCache"
+        )
+        self.assertEqual(
+            loaded["LOADERS"][0][0], "django.template.loaders.cached.Loader"
+        )
+
+    def test_production_requires_secrets(self):
+        result = self.load(DJANGO_ENV="prod", DJANGO_ALLOWED_HOSTS="example.com")
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("Set DJANGO_SECRET_KEY", result.stderr)
+        result = self.load(DJANGO_ENV="prod", DJANGO_SECRET_KEY="secret")
+        self.assertIn("Set DJANGO_ALLOWED_HOSTS", result.stderr)
@@ -0,0 +1,160 @@
+import io
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from task_app.models import Task, TaskTitleToken
+from task_app.tasks import purge_deleted_tasks
+from task_app.tests.test_summaries import aggregate_tasks, summarized_tasks
+
+
+def statements(queries):
+    """Captured SQL with literals and savepoint names blanked out."""
+    return [
+        re.sub(r"'[^']*'|\b\d+\b|\"s\d+_x\d+\"", "?", query["sql"]) for query in queries
+    ]
+
+
+class SoftDeleteTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="softuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_tasks(self, count, user=None):
+        Task.objects.bulk_create(
+            Task(title=f"Task {i}", duration=i, user=user or self.user)
+            for i in range(count)
+        )
+        for command in ("rebuild_task_summaries", "rebuild_task_search_index"):
+            call_command(command, stdout=io.StringIO())
+        return list(
+            Task.objects.filter(user=user or self.user).values_list("id", flat=True)
+        )
+
+    def test_deleted_tasks_are_hidden(self):
+        """A deleted task stays in the table but out of every read"""
+        task_ids = self.create_tasks(3)
+        response = self.client.delete(reverse("task-delete", args=[task_ids[0]]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        task = Task.all_objects.get(id=task_ids[0])
+        self.assertIsNotNone(task.deleted_at)
+        self.assertFalse(Task.objects.filter(id=task.id).exists())
+        self.assertFalse(self.user.task_set.filter(id=task.id).exists())
+
+        for name, args in (("task-detail", [task.id]), ("task-delete", [task.id])):
+            method = self.client.get if name == "task-detail" else self.client.delete
+            response = method(reverse(name, args=args))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.patch(
+            reverse("task-update", args=[task.id]), {"duration": 1}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        listed = [
+            t["id"] for t in self.client.get(reverse("get-tasks")).data["results"]
+        ]
+        self.assertEqual(sorted(listed), task_ids[1:])
+        response = self.client.get(reverse("task-search"), {"q": "task"})
+        self.assertNotIn(task.id, [t["id"] for t in response.data["results"]])
+        self.assertEqual(self.client.get(reverse("task-stats")).data["task_count"], 2)
+        self.assertEqual(summarized_tasks(), aggregate_tasks())
+
+        response = self.client.delete(
+            reverse("task-bulk"), task_ids[1:] + [task.id], format="json"
+        )
+        self.assertEqual(
+            [result["status"] for result in response.data],
+            ["deleted", "deleted", "not_found"],
+        )
+        self.assertEqual(Task.all_objects.filter(deleted_at__isnull=False).count(), 3)
+        self.assertEqual(summarized_tasks(), aggregate_tasks())
+
+    def test_delete_cost_is_independent_of_table_size(self):
+        """Deleting a task runs the same statements with 5 or 5,000 tasks"""
+        runs = []
+        for count in (5, 5000):
+            task_id = self.create_tasks(count)[-1]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.delete(reverse("task-delete", args=[task_id]))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            runs.append(statements(queries))
+        self.assertEqual(runs[0], runs[1])
+        # The task row is marked by primary key rather than deleted.
+        self.assertTrue(
+            any(
+                sql.startswith('UPDATE "task_app_task" SET "deleted_at"')
+                for sql in runs[0]
+            )
+        )
+        self.assertFalse(
+            any(sql.startswith('DELETE FROM "task_app_task"') for sql in runs[0])
+        )
+
+    def test_user_delete_leaves_tasks_to_the_purge(self):
+        """Deleting a user costs the same however many tasks they have"""
+        runs = []
+        for count in (5, 2000):
+            user = User.objects.create_user(username=f"owner{count}")
+            self.create_tasks(count, user=user)
+            with CaptureQueriesContext(connection) as queries:
+                user_id, _ = user.id, user.delete()
+            runs.append(statements(queries))
+            self.assertEqual(Task.all_objects.filter(user_id=user_id).count(), count)
+        self.assertEqual(runs[0], runs[1])
+        self.assertFalse(any('"task_app_task"' in sql for sql in runs[0]))
+
+
+class PurgeDeletedTasksTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="keeper")
+        self.gone = User.objects.create_user(username="gone")
+        for user in (self.user, self.gone):
+            Task.objects.bulk_create(
+                Task(title=f"Task {i}", duration=i, user=user) for i in range(10)
+            )
+        call_command("rebuild_task_search_index", stdout=io.StringIO())
+        self.deleted = list(
+            Task.objects.filter(user=self.user).values_list("id", flat=True)[:7]
+        )
+        Task.objects.filter(id__in=self.deleted).soft_delete()
+        self.gone.delete()
+
+    def test_purge_in_bounded_batches(self):
+        """Each run deletes at most max_batches batches of each kind"""
+        # Seven soft-deleted tasks, then the deleted user's ten tasks and
+        # twenty index entries ("task" and the number of each title).
+        self.assertEqual(
+            purge_deleted_tasks(batch_size=2, max_batches=2),
+            "Purged 8 tasks and 4 search index entries.",
+        )
+        self.assertEqual(
+            purge_deleted_tasks(batch_size=100),
+            "Purged 9 tasks and 16 search index entries.",
+        )
+        self.assertEqual(purge_deleted_tasks(), "Nothing to purge.")
+
+        self.assertEqual(
+            sorted(Task.all_objects.values_list("id", flat=True)),
+            sorted(Task.objects.filter(user=self.user).values_list("id", flat=True)),
+        )
+        self.assertEqual(Task.all_objects.count(), 3)
+        self.assertFalse(TaskTitleToken.objects.filter(user_id=self.gone.id).exists())
+        self.assertEqual(TaskTitleToken.objects.filter(user=self.user).count(), 20)
+
+    def test_batch_query_count(self):
+        """Each batch is a single DELETE statement"""
+        # 3 + 3 + 1 soft-deleted tasks, 3 + 3 + 3 + 1 tasks and 3 x 6 + 2
+        # index entries of the deleted user.
+        with self.assertNumQueries(14):
+            purge_deleted_tasks(batch_size=3)
@@ -0,0 +1,253 @@
+import io
+import random
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from task_app.models import Task, TaskDailySummary
+
+
+def aggregate_tasks():
+    """Per (user, day) counts and durations computed from the task table."""
+    rows = (
+        Task.objects.annotate(day=TruncDate("created_at"))
+        .values_list("user_id", "day")
+        .annotate(Count("id"), Sum("duration"))
+        .order_by()
+    )
+    return {(user_id, day): (count, total) for user_id, day, count, total in rows}
+
+
+def summarized_tasks():
+    rows = TaskDailySummary.objects.exclude(task_count=0, total_duration=0)
+    return {
+        (row.user_id, row.day): (row.task_count, row.total_duration) for row in rows
+    }
+
+
+class TaskSummaryTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create_user(username=f"user{i}") for i in range(2)]
+        self.clients = []
+        for user in self.users:
+            client = APIClient()
+            client.force_authenticate(user=user)
+            # The async views authenticate the token themselves.
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+            )
+            self.clients.append(client)
+        self.now = timezone.now()
+
+    def at_day(self, offset):
+        """Patch the clock so new tasks are created ``offset`` days ago."""
+        return mock.patch(
+            "django.utils.timezone.now",
+            return_value=self.now - timedelta(days=offset, minutes=offset),
+        )
+
+    def task_ids(self, user):
+        return list(Task.objects.filter(user=user).values_list("id", flat=True))
+
+    def random_step(self, rng):
+        index = rng.randrange(len(self.users))
+        user, client = self.users[index], self.clients[index]
+        ids = self.task_ids(user)
+        action = rng.choice(
+            ["create", "create", "bulk_create", "update", "retitle", "bulk_update"]
+            + ["delete", "bulk_delete", "async_create", "async_update"]
+        )
+        if action in ("create", "async_create") or not ids:
+            name = "task-create" if action == "create" else "async-task-create"
+            with self.at_day(rng.randrange(5)):
+                response = client.post(
+                    reverse(name),
+                    {"title": "Task", "duration": rng.randrange(100)},
+                    format="json",
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        elif action == "bulk_create":
+            items = [
+                {"title": "Bulk", "duration": rng.randrange(100)}
+                for _ in range(rng.randrange(1, 6))
+            ]
+            with self.at_day(rng.randrange(5)):
+                response = client.post(reverse("task-bulk"), items, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        elif action in ("update", "async_update"):
+            name = "task-update" if action == "update" else "async-task-update"
+            response = client.patch(
+                reverse(name, args=[rng.choice(ids)]),
+                {"duration": rng.randrange(100)},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        elif action == "retitle":
+            response = client.patch(
+                reverse("task-update", args=[rng.choice(ids)]),
+                {"title": "Renamed"},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        elif action == "bulk_update":
+            # Duplicates and missing ids are part of the workload too.
+            items = [
+                {"id": rng.choice(ids + [999999]), "duration": rng.randrange(100)}
+                for _ in range(rng.randrange(1, 6))
+            ]
+            response = client.patch(reverse("task-bulk"), items, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        elif action == "delete":
+            response = client.delete(reverse("task-delete", args=[rng.choice(ids)]))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        else:
+            chosen = rng.sample(ids, rng.randrange(1, len(ids) + 1)) + [999999]
+            response = client.delete(reverse("task-bulk"), chosen, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_randomized_workload_matches_aggregate(self):
+        """Summaries equal a full aggregate after random writes through the API"""
+        for seed in range(3):
+            rng = random.Random(seed)
+            for _ in range(60):
+                self.random_step(rng)
+            self.assertEqual(summarized_tasks(), aggregate_tasks(), f"seed {seed}")
+        self.assertTrue(aggregate_tasks())
+
+    def test_stats_endpoint(self):
+        """Per-day counts, totals and averages, oldest day first"""
+        client = self.clients[0]
+        for offset, durations in ((2, [10, 20]), (0, [5])):
+            with self.at_day(offset):
+                items = [{"title": "Task", "duration": d} for d in durations]
+                client.post(reverse("task-bulk"), items, format="json")
+        with self.at_day(0):
+            self.clients[1].post(
+                reverse("task-create"), {"title": "Other", "duration": 99}
+            )
+
+        with self.assertNumQueries(1):
+            response = client.get(reverse("task-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        today = timezone.localdate(self.now)
+        self.assertEqual(
+            response.json(),
+            {
+                "task_count": 3,
+                "total_duration": 35,
+                "average_duration": 35 / 3,
+                "days": [
+                    {
+                        "day": str(today - timedelta(days=2)),
+                        "task_count": 2,
+                        "total_duration": 30,
+                        "average_duration": 15.0,
+                    },
+                    {
+                        "day": str(today),
+                        "task_count": 1,
+                        "total_duration": 5,
+                        "average_duration": 5.0,
+                    },
+                ],
+            },
+        )
+
+        response = client.get(reverse("task-stats"), {"since": str(today)})
+        self.assertEqual(response.data["task_count"], 1)
+        response = client.get(reverse("task-stats"), {"until": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stats_cache_invalidated_by_writes(self):
+        """Stats are cached per user until one of their tasks changes"""
+        client = self.clients[0]
+        client.post(reverse("task-create"), {"title": "Task", "duration": 10})
+        client.get(reverse("task-stats"))
+        with self.assertNumQueries(0):
+            response = client.get(reverse("task-stats"))
+        self.assertEqual(response.data["total_duration"], 10)
+
+        task_id = self.task_ids(self.users[0])[0]
+        client.patch(reverse("task-update", args=[task_id]), {"duration": 25})
+        response = client.get(reverse("task-stats"))
+        self.assertEqual(response.data["total_duration"], 25)
+
+        client.delete(reverse("task-delete", args=[task_id]))
+        response = client.get(reverse("task-stats"))
+        self.assertEqual(
+            response.data,
+            {
+                "task_count": 0,
+                "total_duration": 0,
+                "average_duration": None,
+                "days": [],
+            },
+        )
+
+    def test_rebuild_command(self):
+        """The rebuild recomputes drifted summaries in batches of users"""
+        for user in self.users:
+            for offset in range(3):
+                with self.at_day(offset):
+                    Task.objects.bulk_create(
+                        Task(title="Task", duration=offset + i, user=user)
+                        for i in range(4)
+                    )
+        TaskDailySummary.objects.create(
+            user=self.users[0], day=self.now.date(), task_count=99, total_duration=1
+        )
+        self.assertNotEqual(summarized_tasks(), aggregate_tasks())
+
+        stdout = io.StringIO()
+        call_command("rebuild_task_summaries", "--batch-size", "1", stdout=stdout)
+        self.assertEqual(stdout.getvalue().strip(), "Rebuilt 6 daily summaries.")
+        self.assertEqual(summarized_tasks(), aggregate_tasks())
+
+        Task.objects.filter(user=self.users[1]).delete()
+        call_command(
+            "rebuild_task_summaries", "--user", str(self.users[1].id), stdout=stdout
+        )
+        self.assertEqual(summarized_tasks(), aggregate_tasks())
+        self.assertEqual(TaskDailySummary.objects.filter(user=self.users[0]).count(), 3)
+
+    def test_rebuild_with_concurrent_create(self):
+        """A task created on a day whose row the rebuild just deleted makes
+        the batch count again instead of failing the rebuild"""
+        Task.objects.create(title="Old", duration=3, user=self.users[0])
+        bulk_create = TaskDailySummary.objects.bulk_create
+        created = []
+
+        def create_then_insert(*args, **kwargs):
+            if not created:
+                # As the create endpoint would, between the DELETE and the
+                # INSERT. A connection of its own would commit; the test's
+                # shares the batch's transaction and is rolled back with it.
+                created.append(
+                    self.clients[0].post(
+                        reverse("task-create"),
+                        {"title": "New", "duration": 5},
+                        format="json",
+                    )
+                )
+            return bulk_create(*args, **kwargs)
+
+        stdout = io.StringIO()
+        with mock.patch.object(
+            TaskDailySummary.objects, "bulk_create", side_effect=create_then_insert
+        ) as insert:
+            call_command("rebuild_task_summaries", stdout=stdout)
+        self.assertEqual(created[0].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(insert.call_count, 2)
+        self.assertEqual(stdout.getvalue().strip(), "Rebuilt 1 daily summaries.")
+        self.assertEqual(summarized_tasks(), aggregate_tasks())
@@ -0,0 +1,173 @@
+import threading
+from unittest import mock
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from task_app import metrics, scheduling
+from task_app.models import Task, TaskReportCursor
+from task_app.tasks import print_task_details
+
+
+class PrintTaskDetailsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reportuser")
+        Task.objects.bulk_create(
+            Task(title=f"Task {i}", duration=i, user=self.user) for i in range(5)
+        )
+
+    def report(self, **kwargs):
+        with self.assertLogs("task_app.tasks", level="INFO") as logs:
+            result = print_task_details(user_id=self.user.id, **kwargs)
+        lines = "\n".join(record.getMessage() for record in logs.records)
+        return result, lines.splitlines()
+
+    def test_first_run_reports_all_tasks(self):
+        """The first run logs every task of the user and stores a cursor"""
+        User.objects.create_user(username="otheruser").task_set.create(
+            title="Other", duration=1
+        )
+        result, lines = self.report()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[0].startswith("Title: Task 0, Duration: 0, Created At: "))
+        self.assertIn("Reported 5", result)
+        cursor = TaskReportCursor.objects.get(user=self.user)
+        self.assertEqual(cursor.task_id, Task.objects.filter(user=self.user).last().id)
+
+    def test_next_run_reports_only_changes(self):
+        """Later runs only log tasks created or updated since the last one"""
+        self.report()
+        with self.assertNoLogs("task_app.tasks", level="INFO"):
+            result = print_task_details(user_id=self.user.id)
+        self.assertIn("No new or changed tasks", result)
+
+        changed = Task.objects.filter(user=self.user).first()
+        Task.objects.filter(id=changed.id).update(
+            title="Changed", updated_at=timezone.now()
+        )
+        self.user.task_set.create(title="New", duration=1)
+        _, lines = self.report()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("Title: Changed,"))
+        self.assertTrue(lines[1].startswith("Title: New,"))
+
+    def test_chunked_reads(self):
+        """Each chunk costs one read and one cursor write"""
+        # Cursor lookup, then read + cursor write for chunks of 2, 2 and 1.
+        with self.assertNumQueries(7):
+            _, lines = self.report(chunk_size=2)
+        self.assertEqual(len(lines), 5)
+
+    def test_unknown_user(self):
+        """A user without tasks is reported as unchanged and gets no cursor"""
+        result = print_task_details(user_id=self.user.id + 100)
+        self.assertIn("No new or changed tasks", result)
+        self.assertFalse(TaskReportCursor.objects.exists())
+
+
+class PrintTaskDetailsSingleFlightTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="flightuser")
+        Task.objects.bulk_create(
+            Task(title=f"Task {i}", duration=i, user=self.user) for i in range(5)
+        )
+
+    def runs(self):
+        name = "task_app.tasks.print_task_details"
+        return {
+            outcome: count
+            for (_, outcome), count in scheduling.run_counts([name]).items()
+        }
+
+    def test_concurrent_runs_coalesce(self):
+        """Of runs fired at once for a user, one reports and the rest skip"""
+        count = 6
+        start = threading.Barrier(count)
+        others_done = threading.Event()
+        finished = []
+        results = []
+        logged = []
+
+        def log(message):
+            # Keep the reporting run busy until every other run returned.
+            others_done.wait(timeout=10)
+            logged.append(message)
+
+        def invoke():
+            start.wait()
+            try:
+                results.append(print_task_details(user_id=self.user.id))
+            finally:
+                connection.close()
+                finished.append(True)
+                if len(finished) == count - 1:
+                    others_done.set()
+
+        with mock.patch("task_app.tasks.logger.info", side_effect=log):
+            threads = [threading.Thread(target=invoke) for _ in range(count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=20)
+
+        self.assertEqual(len(logged), 1)
+        self.assertEqual(len(logged[0].splitlines()), 5)
+        self.assertEqual(
+            sorted(results),
+            [f"Report for user {self.user.id} already running."] * (count - 1)
+            + [f"Reported 5 new or changed tasks for user {self.user.id}."],
+        )
+        self.assertEqual(TaskReportCursor.objects.count(), 1)
+        self.assertEqual(self.runs(), {"ran": 1, "coalesced": count - 1, "deferred": 0})
+        self.assertIn(
+            'celery_task_runs_total{task="task_app.tasks.print_task_details",'
+            f'outcome="coalesced"}} {count - 1}',
+            metrics.render(),
+        )
+
+        # The lock was released with the run.
+        with self.assertLogs("task_app.tasks", level="INFO"):
+            self.user.task_set.create(title="Later", duration=1)
+            self.assertIn("Reported 1", print_task_details(user_id=self.user.id))
+
+    def test_soft_time_limit_defers_the_next(self):
+        """A run stopped at its soft time limit skips the runs due during as
+        long, and the next one resumes from the cursor"""
+        with mock.patch(
+            "task_app.tasks.report_changes", side_effect=SoftTimeLimitExceeded
+        ), mock.patch("task_app.tasks.time.monotonic", side_effect=[0, 50]):
+            self.assertEqual(
+                print_task_details(user_id=self.user.id),
+                f"Report for user {self.user.id} stopped at the time limit.",
+            )
+        self.assertEqual(
+            print_task_details(user_id=self.user.id),
+            f"Report for user {self.user.id} deferred after a long run.",
+        )
+        self.assertEqual(self.runs(), {"ran": 1, "coalesced": 0, "deferred": 1})
+
+        cache.delete(f"singleflight:deferred:{print_task_details.name}:{self.user.id}")
+        with self.assertLogs("task_app.tasks", level="INFO"):
+            self.assertIn("Reported 5", print_task_details(user_id=self.user.id))
+
+    def test_long_run_defers_the_next(self):
+        """A run longer than the interval, on a pool without soft time limits,
+        skips the runs due during as long"""
+        with mock.patch("task_app.tasks.time.monotonic", side_effect=[0, 150]):
+            with self.assertLogs("task_app.tasks", level="INFO"):
+                print_task_details(user_id=self.user.id)
+        self.assertEqual(
+            print_task_details(user_id=self.user.id),
+            f"Report for user {self.user.id} deferred after a long run.",
+        )
+        # Other users are reported as usual.
+        self.assertIn("No new or changed", print_task_details(user_id=self.user.id + 1))
+        self.assertEqual(self.runs(), {"ran": 2, "coalesced": 0, "deferred": 1})
+
+        cache.delete(f"singleflight:deferred:{print_task_details.name}:{self.user.id}")
+        self.assertIn("No new or changed", print_task_details(user_id=self.user.id))
@@ -1,5 +1,10 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
@@ -8,6 +13,7 @@ from task_app.models import Task
 
 class TaskAPITestCase(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(
             username="testuser", password="testpassword"
         )
@@ -63,15 +69,61 @@ class TaskAPITestCase(APITestCase):
         response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        # Check only latest 4 tasks are returned
-        self.assertEqual(len(response.data), 4)
-        task_titles = [task["title"] for task in response.data]
+        # Check only latest 4 tasks are returned on the first page
+        self.assertEqual(len(response.data["results"]), 4)
+        task_titles = [task["title"] for task in response.data["results"]]
 
         self.assertEqual(task_titles[0], "Task 5")
         self.assertEqual(task_titles[1], "Task 4")
         self.assertEqual(task_titles[2], "Task 3")
         self.assertEqual(task_titles[3], "Task 2")
 
+    def test_get_tasks_cursor_pagination(self):
+        """Following the next cursor walks every task exactly once"""
+        for i in range(10):
+            Task.objects.create(title=f"Task {i+1}", duration=30, user=self.user)
+
+        url = reverse("get-tasks") + "?page_size=3"
+        titles = []
+        while url:
+            response = self.client.get(url, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles.extend(task["title"] for task in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(titles, [f"Task {i}" for i in range(10, 0, -1)])
+
+    def test_get_tasks_filters(self):
+        """Duration and timestamp range filters narrow the listing"""
+        for duration in (10, 20, 30, 40):
+            Task.objects.create(
+                title=f"Task {duration}", duration=duration, user=self.user
+            )
+        Task.objects.filter(duration=10).update(
+            created_at=timezone.now() - timedelta(days=7)
+        )
+
+        url = reverse("get-tasks")
+        response = self.client.get(url, {"min_duration": 20, "max_duration": 30})
+        self.assertEqual(
+            [task["title"] for task in response.data["results"]],
+            ["Task 30", "Task 20"],
+        )
+
+        created_after = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get(url, {"created_after": created_after})
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertNotIn(
+            "Task 10", [task["title"] for task in response.data["results"]]
+        )
+
+    def test_get_tasks_invalid_filter(self):
+        """Malformed filter values are rejected"""
+        url = reverse("get-tasks")
+        response = self.client.get(url, {"min_duration": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("min_duration", response.data)
+
     def test_get_tasks_unauthorized(self):
         """Test for unauthenticated user attempts to get tasks"""
         self.client.force_authenticate(user=None)
@@ -134,18 +186,36 @@ class TaskAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(response.data["error"], "Task not found")
 
-    def test_task_update_only_title(self):
-        """Test for only task title update"""
+    def test_task_update_title_and_duration(self):
+        """Test for task title and duration update"""
         task = Task.objects.create(title="Test Task", duration=30, user=self.user)
         url = reverse("task-update", args=[task.id])
         data = {"title": "Updated Task Title", "duration": 45}
         response = self.client.patch(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["title"], "Updated Task Title")
+        self.assertEqual(response.data["duration"], 45)
 
-        """ Check if the task duration remains the same """
+        """ Check if both fields were persisted """
         task.refresh_from_db()
-        self.assertEqual(task.duration, 30)
+        self.assertEqual((task.title, task.duration), ("Updated Task Title", 45))
+
+    def test_task_update_only_duration(self):
+        """Test for only task duration update"""
+        task = Task.objects.create(title="Test Task", duration=30, user=self.user)
+        url = reverse("task-update", args=[task.id])
+        response = self.client.patch(url, {"duration": 45}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Test Task")
+        self.assertEqual(response.data["duration"], 45)
+
+    def test_task_update_invalid_data(self):
+        """Task update attempt with an invalid duration"""
+        task = Task.objects.create(title="Test Task", duration=30, user=self.user)
+        url = reverse("task-update", args=[task.id])
+        response = self.client.patch(url, {"duration": "long"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("duration", response.data)
 
     def test_task_update_unauthorized(self):
         """Test update attempt for unauthorized user"""
@@ -156,6 +226,21 @@ class TaskAPITestCase(APITestCase):
         response = self.client.patch(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_task_update_then_deleted(self):
+        """An update answers with the row it wrote, even if the task is
+        deleted as soon as the update commits"""
+        task = Task.objects.create(title="Test Task", duration=30, user=self.user)
+        url = reverse("task-update", args=[task.id])
+        delete_url = reverse("task-delete", args=[task.id])
+        with mock.patch(
+            "task_app.views.tasks_changed.send",
+            side_effect=lambda **kwargs: self.client.delete(delete_url),
+        ):
+            response = self.client.patch(url, {"duration": 45}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["duration"], 45)
+        self.assertFalse(Task.objects.filter(id=task.id).exists())
+
     def test_task_update_task_not_found(self):
         """Task update attempt for non-existent task"""
         invalid_task_id = 99
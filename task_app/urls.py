@@ -1,13 +1,58 @@
 from django.urls import path
 
-from task_app.views import (CreateTaskView, CustomJwtAuthToken, DeleteTaskView,
-                            GetTaskView, RetrieveTaskView, UpdateTaskView)
+from task_app.async_views import (AsyncCreateTaskView, AsyncDeleteTaskView,
+                                  AsyncGetTaskView, AsyncRetrieveTaskView,
+                                  AsyncTaskChangesView, AsyncUpdateTaskView)
+from task_app.views import (BulkTaskView, CreateTaskView, CustomJwtAuthToken,
+                            CustomJwtRefreshToken, DeleteTaskView,
+                            ExportTaskView, GetTaskView, RetrieveTaskView,
+                            SearchTaskView, TaskChangesView,
+                            TaskIngestStatusView, TaskStatsView,
+                            UpdateTaskView)
 
 urlpatterns = [
     path("token/", CustomJwtAuthToken.as_view(), name="token_create"),
+    path("token/refresh/", CustomJwtRefreshToken.as_view(), name="token_refresh"),
     path("tasks/create/", CreateTaskView.as_view(), name="task-create"),
     path("tasks/", GetTaskView.as_view(), name="get-tasks"),
+    path("tasks/bulk/", BulkTaskView.as_view(), name="task-bulk"),
+    path("tasks/export/", ExportTaskView.as_view(), name="task-export"),
+    path("tasks/stats/", TaskStatsView.as_view(), name="task-stats"),
+    path("tasks/search/", SearchTaskView.as_view(), name="task-search"),
+    path("tasks/changes/", TaskChangesView.as_view(), name="task-changes"),
+    path(
+        "tasks/ingest/<str:key>/",
+        TaskIngestStatusView.as_view(),
+        name="task-ingest-status",
+    ),
     path("tasks/<int:task_id>/", RetrieveTaskView.as_view(), name="task-detail"),
     path("tasks/<int:task_id>/update/", UpdateTaskView.as_view(), name="task-update"),
     path("tasks/<int:task_id>/delete/", DeleteTaskView.as_view(), name="task-delete"),
+    # Async variants of the task endpoints, for ASGI deployments.
+    path(
+        "async/tasks/create/",
+        AsyncCreateTaskView.as_view(),
+        name="async-task-create",
+    ),
+    path("async/tasks/", AsyncGetTaskView.as_view(), name="async-get-tasks"),
+    path(
+        "async/tasks/changes/",
+        AsyncTaskChangesView.as_view(),
+        name="async-task-changes",
+    ),
+    path(
+        "async/tasks/<int:task_id>/",
+        AsyncRetrieveTaskView.as_view(),
+        name="async-task-detail",
+    ),
+    path(
+        "async/tasks/<int:task_id>/update/",
+        AsyncUpdateTaskView.as_view(),
+        name="async-task-update",
+    ),
+    path(
+        "async/tasks/<int:task_id>/delete/",
+        AsyncDeleteTaskView.as_view(),
+        name="async-task-delete",
+    ),
 ]
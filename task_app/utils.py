@@ -0,0 +1,99 @@
+import argparse
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+# SQL Server rejects statements carrying more than 2100 parameters, so every
+# IN (...) list and multi-row INSERT/UPDATE has to be split below this.
+MAX_QUERY_PARAMS = 2100
+
+
+def positive_int(value):
+    """argparse type of the commands' batch sizes: an integer of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"Must be at least 1: {value!r}")
+    return number
+
+
+def non_negative_float(value):
+    """argparse type of the commands' waits: a number of at least 0."""
+    number = float(value)
+    if not number >= 0:
+        raise argparse.ArgumentTypeError(f"Must be at least 0: {value!r}")
+    return number
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def aiterate(iterable):
+    """Yield the items of a synchronous ``iterable``, each one produced in
+    sync_to_async's thread, where the ORM may run."""
+    iterator = iter(iterable)
+    done = object()
+    # StopIteration cannot cross sync_to_async, hence the default.
+    advance = sync_to_async(next)
+    while (item := await advance(iterator, done)) is not done:
+        yield item
+
+
+def iterate_in_chunks(queryset, chunk_size, pk=lambda row: row.pk):
+    """Yield lists of up to ``chunk_size`` rows in primary key order.
+
+    Each chunk is its own ``pk > last`` query. QuerySet.iterator() would be a
+    single query, but backends without chunked reads (SQL Server) buffer its
+    whole result, while this keeps memory bounded everywhere. ``pk`` extracts
+    the primary key from a row, e.g. ``itemgetter(0)`` for values_list().
+    """
+    queryset = queryset.order_by("pk")
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_pk = pk(chunk[-1])
+
+
+def datetime_formatter():
+    """Return a function formatting aware datetimes like DRF's DateTimeField.
+
+    The target timezone is resolved once up front, so formatting a row costs
+    one astimezone() and one isoformat() call.
+    """
+    tz = timezone.get_current_timezone()
+    if tz.utcoffset(None) == timedelta(0):
+        # UTC: every value gets the "Z" suffix, and converting to the fixed
+        # datetime.timezone.utc skips zoneinfo's per-value offset lookup.
+        def format_utc(value):
+            return value.astimezone(dt_timezone.utc).isoformat()[:-6] + "Z"
+
+        return format_utc
+
+    def format_datetime(value):
+        text = value.astimezone(tz).isoformat()
+        if text.endswith("+00:00"):
+            text = text[:-6] + "Z"
+        return text
+
+    return format_datetime
+
+
+def timestamp_formatter():
+    """Like datetime_formatter(), producing "YYYY-MM-DD HH:MM:SS" strings."""
+    tz = timezone.get_current_timezone()
+
+    def format_timestamp(value):
+        # Same text as strftime("%Y-%m-%d %H:%M:%S"), without parsing a format.
+        return value.astimezone(tz).isoformat(" ", "seconds")[:19]
+
+    return format_timestamp
@@ -0,0 +1,47 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from task_app.models import TaskChangeVersion
+from task_app.utils import MAX_QUERY_PARAMS, chunked
+
+# Per-user change versions, the validators of conditional task reads. Like
+# the summaries, every write path bumps the version of each user whose tasks
+# it changed, inside the transaction that writes the tasks, so a version is
+# never visible before the change it counts.
+
+
+def bump(*user_ids):
+    """Count a change to the tasks of each of the users, in one UPDATE."""
+    now = timezone.now()
+    changes = {"version": F("version") + 1, "changed_at": now}
+    for chunk in chunked(set(user_ids), MAX_QUERY_PARAMS - 100):
+        if TaskChangeVersion.objects.filter(user_id__in=chunk).update(
+            **changes
+        ) == len(chunk):
+            continue
+        # Users created without their row. Those whose row turns out to
+        # exist get a second bump, which readers cannot tell from one.
+        for user_id in chunk:
+            try:
+                with transaction.atomic():
+                    TaskChangeVersion.objects.create(
+                        user_id=user_id, version=1, changed_at=now
+                    )
+            except IntegrityError:
+                TaskChangeVersion.objects.filter(user_id=user_id).update(**changes)
+
+
+def _current(user_id):
+    return TaskChangeVersion.objects.filter(user_id=user_id).values_list(
+        "version", "changed_at"
+    )
+
+
+def current(user_id):
+    """``(version, changed_at)``, ``(0, None)`` if the tasks never changed."""
+    return _current(user_id).first() or (0, None)
+
+
+async def acurrent(user_id):
+    return await _current(user_id).afirst() or (0, None)
@@ -1,94 +1,527 @@
-from django.contrib.auth.models import User
-from rest_framework import status
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from rest_framework import exceptions, serializers, status
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from task_app.models import Task
-from task_app.serializers import TaskSerializer
+from task_app import cache, conditional, feed, ingest, search, summaries, versions
+from task_app.exports import csv_lines, export_batches, ndjson_lines
+from task_app.filters import filter_summaries, filter_tasks, search_tasks
+from task_app.models import Task, TaskArchive, TaskDailySummary
+from task_app.pagination import TaskCursorPagination
+from task_app.parsers import NDJSONParser
+from task_app.renderers import (
+    CSVRenderer,
+    EventStreamRenderer,
+    FastJSONRenderer,
+    NDJSONRenderer,
+)
+from task_app.serializers import (
+    TASK_FIELDS,
+    LoginSerializer,
+    TaskBulkUpdateSerializer,
+    TaskDailySummarySerializer,
+    TaskSerializer,
+    task_payload,
+    task_payloads,
+)
+from task_app.services import create_task, delete_task, update_task
+from task_app.signals import tasks_changed
+from task_app.utils import MAX_QUERY_PARAMS, aiterate, chunked
 
 
 class CustomJwtAuthToken(TokenObtainPairView):
-    serializer_class = TokenObtainPairSerializer
+    serializer_class = LoginSerializer
 
     def post(self, request, *args, **kwargs):
-        username = request.data.get("username")
-        if not User.objects.filter(username=username).exists():
-            return Response({"detail": "Invalid username"}, status=401)
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        access_token = serializer.validated_data["access"]
-        return Response({"Token": access_token})
+        return Response(
+            {
+                "Token": serializer.validated_data["access"],
+                "Refresh": serializer.validated_data["refresh"],
+            }
+        )
+
+
+class CustomJwtRefreshToken(TokenRefreshView):
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+        data = {"Token": response.data["access"]}
+        if "refresh" in response.data:
+            data["Refresh"] = response.data["refresh"]
+        return Response(data)
+
+
+def get_ingest_key(request):
+    """The Idempotency-Key of a buffered create, or a new key without one."""
+    key = request.headers.get("Idempotency-Key")
+    if key is None:
+        return ingest.new_key()
+    if not ingest.KEY_PATTERN.match(key):
+        raise serializers.ValidationError(
+            {"Idempotency-Key": ["Up to 64 letters, digits, '-' or '_'."]}
+        )
+    return key
+
+
+def ingest_accepted(key):
+    """The 202 body and headers for a buffered create. A task submitted again
+    under the same key gets the same answer, and is created once."""
+    data = {"key": key, "status": "pending"}
+    return data, {"Location": reverse("task-ingest-status", args=[key])}
 
 
 class CreateTaskView(APIView):
+    """Create a task. With TASK_INGEST_BUFFERED, queue it instead and answer
+    202 Accepted with its key, to follow at GET /tasks/ingest/<key>/."""
+
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         serializer = TaskSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save(user=request.user)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if settings.TASK_INGEST_BUFFERED:
+            key = get_ingest_key(request)
+            ingest.submit(request.user.id, key, serializer.validated_data)
+            data, headers = ingest_accepted(key)
+            return Response(data, status=status.HTTP_202_ACCEPTED, headers=headers)
+        task = create_task(request.user.id, serializer.validated_data)
+        tasks_changed.send(
+            sender=Task,
+            user_id=request.user.id,
+            action="created",
+            task_ids=[task.id],
+        )
+        return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
+
 
+class TaskPageMixin:
+    pagination_class = TaskCursorPagination
 
-class GetTaskView(APIView):
+    def get_tasks(self, request):
+        return filter_tasks(
+            Task.objects.filter(user=request.user), request.query_params
+        )
+
+    def get_page(self, request):
+        tasks = self.get_tasks(request)
+        paginator = self.pagination_class()
+        # The cursor paginator reads its position from dict rows as well.
+        page = paginator.paginate_queryset(
+            tasks.values(*TASK_FIELDS), request, view=self
+        )
+        return paginator.get_paginated_response(task_payloads(page)).data
+
+
+class GetTaskView(TaskPageMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        tasks = Task.objects.filter(user=request.user).all().order_by("-id")[:4]
-        serializer = TaskSerializer(tasks, many=True)
-        return Response(serializer.data)
+        version, changed_at = conditional.changes(request.user.id)
+        etag = conditional.not_modified(request, version, changed_at)
+        if etag:
+            return conditional.not_modified_response(etag, changed_at)
+        cached = cache.get_or_set(
+            request.user.id,
+            cache.request_key(request, "page"),
+            lambda: conditional.entry(version, changed_at, self.get_page(request)),
+        )
+        return conditional.add_validators(
+            Response(cached["data"]),
+            conditional.etag(request, cached["version"]),
+            cached["changed_at"],
+        )
+
+
+class SearchTaskView(TaskPageMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        data = cache.get_or_set(
+            request.user.id,
+            cache.request_key(request, "search"),
+            lambda: self.get_page(request),
+        )
+        return Response(data)
+
+    def get_tasks(self, request):
+        return search_tasks(
+            super().get_tasks(request), request.query_params, request.user.id
+        )
 
 
 class RetrieveTaskView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, task_id):
-        task = Task.objects.raw(
-            "SELECT * FROM task_app_task WHERE id = %s AND user_id = %s",
-            [task_id, request.user.id],
+        version, changed_at = conditional.changes(request.user.id)
+        etag = conditional.task_not_modified(request, version)
+        if etag:
+            return conditional.not_modified_response(etag, changed_at)
+        cached = cache.get_or_set(
+            request.user.id,
+            f"task:{task_id}",
+            lambda: conditional.entry(
+                version, changed_at, self.get_task(request, task_id)
+            ),
         )
-        if task:
-            serializer = TaskSerializer(task[0])
-            return Response(serializer.data)
-        return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+        if cached is None:
+            return Response(
+                {"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        # Changes to the user's other tasks leave this one's stamp as it was.
+        task_stamp = conditional.stamp(cached["data"])
+        etag = conditional.not_modified(
+            request, cached["version"], cached["changed_at"], task_stamp
+        )
+        if etag:
+            return conditional.not_modified_response(etag, cached["changed_at"])
+        return conditional.add_validators(
+            Response(cached["data"]),
+            conditional.etag(request, cached["version"], task_stamp),
+            cached["changed_at"],
+        )
+
+    def get_task(self, request, task_id):
+        # Tasks moved out by archive_old_tasks are looked up by primary key in
+        # the archive, only when the task table has no such task.
+        for model in (Task, TaskArchive):
+            task = (
+                model.objects.filter(id=task_id, user_id=request.user.id)
+                .values(*TASK_FIELDS)
+                .first()
+            )
+            if task:
+                return task_payload(task)
+        return None
 
 
 class UpdateTaskView(APIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request, task_id):
-        task = Task.objects.raw(
-            "SELECT * FROM task_app_task WHERE id = %s AND user_id = %s",
-            [task_id, request.user.id],
-        )
-        if task:
-            task = task[0]
-            new_title = request.data.get("title", task.title)
-            Task.objects.raw(
-                "UPDATE task_app_task SET title = %s WHERE id = %s AND user_id = %s",
-                [new_title, task.id, request.user.id],
+        serializer = TaskSerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        task = update_task(request.user.id, task_id, serializer.validated_data)
+        if task is None:
+            return Response(
+                {"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND
             )
-            task.title = new_title
-            task.save()
-            serializer = TaskSerializer(task)
-            return Response(serializer.data)
-        return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+        tasks_changed.send(
+            sender=Task, user_id=request.user.id, action="updated", task_ids=[task_id]
+        )
+        return Response(task_payload(task))
 
 
 class DeleteTaskView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, task_id):
-        task = Task.objects.raw(
-            "SELECT * FROM task_app_task WHERE id = %s AND user_id = %s",
-            [task_id, request.user.id],
-        )
-        if task:
-            task[0].delete()
+        if delete_task(request.user.id, task_id):
+            tasks_changed.send(
+                sender=Task,
+                user_id=request.user.id,
+                action="deleted",
+                task_ids=[task_id],
+            )
             return Response({"message": "Task deleted successfully"})
         return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class CursorExpired(exceptions.APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "The cursor has expired, reload the tasks."
+    default_code = "cursor_expired"
+
+
+def event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Sent as it is written, not buffered by a proxy.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# Waiting for changes, by long-poll or event stream, is only served under
+# ASGI, where a waiting client holds no thread. Under gunicorn, each waiting
+# client would hold one of its few threads for up to TASK_FEED_TIMEOUT
+# seconds, or TASK_FEED_STREAM_SECONDS for a stream.
+WAIT_UNDER_ASGI = "Wait for changes at /async/tasks/changes/, served under ASGI."
+
+
+class TaskChangesMixin:
+    def get_cursor(self, request):
+        """The cursor in ?since=, or in Last-Event-ID when an event stream
+        reconnects. None to start from the latest change."""
+        value = request.query_params.get("since") or request.headers.get(
+            "Last-Event-ID"
+        )
+        if not value:
+            return None
+        cursor = feed.parse_cursor(value)
+        if cursor is None:
+            raise serializers.ValidationError({"since": ["Not a valid cursor."]})
+        if feed.expired(cursor):
+            raise CursorExpired()
+        return cursor
+
+    def can_wait(self, request):
+        """Whether the view may hold the request until there are changes."""
+        return False
+
+    def wants_stream(self, request):
+        """Whether the client asks for an event stream, if it may have one."""
+        stream = request.query_params.get("format") == "sse" or (
+            "text/event-stream" in request.headers.get("Accept", "")
+        )
+        if stream and not self.can_wait(request):
+            raise exceptions.NotAcceptable(WAIT_UNDER_ASGI)
+        return stream
+
+    def get_timeout(self, request):
+        """The seconds to wait for changes in ?timeout=, the most allowed by
+        default."""
+        if self.can_wait(request):
+            max_timeout, messages = settings.TASK_FEED_TIMEOUT, None
+        else:
+            max_timeout, messages = 0, {"max_value": WAIT_UNDER_ASGI}
+        field = serializers.FloatField(
+            min_value=0, max_value=max_timeout, error_messages=messages
+        )
+        try:
+            return field.run_validation(
+                request.query_params.get("timeout", max_timeout)
+            )
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({"timeout": exc.detail})
+
+
+class TaskChangesView(TaskChangesMixin, APIView):
+    """Changes to the user's tasks after a cursor, instead of polling the
+    task list.
+
+    Answers at once with the changes, if any, and the cursor to ask from
+    next. Without a cursor, answers with one at the latest change. Waiting
+    for changes (?timeout=) and event streams are only served by
+    AsyncTaskChangesView.
+    """
+
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, EventStreamRenderer]
+
+    def get(self, request):
+        cursor = self.get_cursor(request)
+        # Both refuse to wait here.
+        self.wants_stream(request)
+        self.get_timeout(request)
+        if cursor is None:
+            cursor, changes = feed.start(request.user.id), None
+        else:
+            cursor, changes = feed.check(request.user.id, cursor)
+        return Response(feed.response_data(cursor, changes))
+
+
+class TaskIngestStatusView(APIView):
+    """Whether a task queued by a buffered create has been created yet."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, key):
+        result = ingest.status(request.user.id, key)
+        if result is None:
+            return Response(
+                {"error": "Unknown task key"}, status=status.HTTP_404_NOT_FOUND
+            )
+        state, task_id = result
+        if state == "pending":
+            return Response(
+                {"key": key, "status": state}, status=status.HTTP_202_ACCEPTED
+            )
+        if state == ingest.FAILED:
+            return Response({"key": key, "status": state})
+        return Response({"key": key, "status": state, "task_id": task_id})
+
+
+class TaskStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        data = cache.get_or_set(
+            request.user.id,
+            cache.request_key(request, "stats"),
+            lambda: self.get_stats(request),
+        )
+        return Response(data)
+
+    def get_stats(self, request):
+        # Reads one summary row per day instead of aggregating the tasks.
+        days = filter_summaries(
+            TaskDailySummary.objects.filter(user=request.user, task_count__gt=0),
+            request.query_params,
+        ).order_by("day")
+        days = TaskDailySummarySerializer(days, many=True).data
+        task_count = sum(day["task_count"] for day in days)
+        total_duration = sum(day["total_duration"] for day in days)
+        return {
+            "task_count": task_count,
+            "total_duration": total_duration,
+            "average_duration": total_duration / task_count if task_count else None,
+            "days": days,
+        }
+
+
+class ExportTaskView(APIView):
+    permission_classes = [IsAuthenticated]
+    # Selected with ?format=ndjson|csv (DRF's format override), NDJSON by default.
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    chunk_size = 2000
+    formats = {"ndjson": ndjson_lines, "csv": csv_lines}
+
+    def get(self, request):
+        tasks = filter_tasks(
+            Task.objects.filter(user=request.user), request.query_params
+        )
+        batches = export_batches(tasks, self.chunk_size)
+        renderer = request.accepted_renderer
+        lines = self.formats[renderer.format](batches)
+        if isinstance(request._request, ASGIRequest):
+            # Django's ASGI handler would read a synchronous iterator into a
+            # list before sending the first byte.
+            lines = aiterate(lines)
+        response = StreamingHttpResponse(lines, content_type=renderer.media_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="tasks.{renderer.format}"'
+        )
+        return response
+
+
+class BulkTaskView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+    max_items = 10000
+    # Leaves room for the user_id parameter next to each IN (...) list.
+    id_chunk_size = MAX_QUERY_PARAMS - 100
+
+    def post(self, request):
+        serializer = TaskSerializer(
+            data=request.data, many=True, max_length=self.max_items
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            tasks = serializer.save(user=request.user)
+            summaries.add_tasks(
+                request.user.id, [(task.created_at, task.duration) for task in tasks]
+            )
+            search.index_tasks(
+                request.user.id, [(task.id, task.title) for task in tasks]
+            )
+            versions.bump(request.user.id)
+            feed.record(request.user.id, "created", [task.id for task in tasks])
+        tasks_changed.send(
+            sender=Task,
+            user_id=request.user.id,
+            action="created",
+            task_ids=[task.id for task in tasks],
+        )
+        results = [
+            {"id": task["id"], "status": "created", "task": task}
+            for task in TaskSerializer(tasks, many=True).data
+        ]
+        return Response(results, status=status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        serializer = TaskBulkUpdateSerializer(
+            data=request.data, many=True, partial=True, max_length=self.max_items
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        ids = [item["id"] for item in serializer.validated_data]
+        with transaction.atomic():
+            tasks = []
+            for chunk in chunked(set(ids), self.id_chunk_size):
+                tasks.extend(
+                    Task.objects.select_for_update().filter(
+                        user=request.user, id__in=chunk
+                    )
+                )
+            old = {task.id: (task.title, task.duration) for task in tasks}
+            updated = serializer.update(tasks, serializer.validated_data)
+            summaries.change_durations(
+                request.user.id,
+                [(task.created_at, old[task.id][1], task.duration) for task in updated],
+            )
+            search.reindex_tasks(
+                request.user.id,
+                [
+                    (task.id, task.title)
+                    for task in updated
+                    if task.title != old[task.id][0]
+                ],
+            )
+            if updated:
+                versions.bump(request.user.id)
+                feed.record(request.user.id, "updated", [task.id for task in updated])
+        if updated:
+            tasks_changed.send(
+                sender=Task,
+                user_id=request.user.id,
+                action="updated",
+                task_ids=[task.id for task in updated],
+            )
+        updated = {task["id"]: task for task in TaskSerializer(updated, many=True).data}
+        results = [
+            (
+                {"id": task_id, "status": "updated", "task": updated[task_id]}
+                if task_id in updated
+                else {"id": task_id, "status": "not_found"}
+            )
+            for task_id in ids
+        ]
+        return Response(results)
+
+    def delete(self, request):
+        ids = serializers.ListField(
+            child=serializers.IntegerField(),
+            allow_empty=False,
+            max_length=self.max_items,
+        ).run_validation(request.data)
+        deleted = set()
+        removed = []
+        with transaction.atomic():
+            for chunk in chunked(set(ids), self.id_chunk_size):
+                tasks = Task.objects.filter(user=request.user, id__in=chunk)
+                rows = tasks.select_for_update().values_list(
+                    "id", "created_at", "duration"
+                )
+                found = {task_id: rest for task_id, *rest in rows}
+                if found:
+                    Task.objects.filter(id__in=found).soft_delete()
+                    deleted.update(found)
+                    removed.extend(found.values())
+            summaries.remove_tasks(request.user.id, removed)
+            search.unindex_tasks(sorted(deleted))
+            if deleted:
+                versions.bump(request.user.id)
+                feed.record(request.user.id, "deleted", sorted(deleted))
+        if deleted:
+            tasks_changed.send(
+                sender=Task,
+                user_id=request.user.id,
+                action="deleted",
+                task_ids=sorted(deleted),
+            )
+        results = [
+            {"id": task_id, "status": "deleted" if task_id in deleted else "not_found"}
+            for task_id in ids
+        ]
+        return Response(results)